@@ -0,0 +1,486 @@
+"""
+HIRA 요양기관 업무포털 색인분류 추출 크롤러 공통 기반
+브라우저/세션 준비, 팝업과 색인분류검색 모달 열기, 그리드 스냅샷, 클릭, CSV 스트리밍 저장을 공유한다
+"""
+
+import asyncio
+import csv
+import logging
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from aiolimiter import AsyncLimiter
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Locator
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# 그리드 텍스트만 읽으므로 차단할 리소스 유형 (HIRA 자체 스타일시트는 그리드 렌더링용으로 허용)
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media', 'stylesheet'}
+ALLOWED_STYLESHEET_HOST = 'biz.hira.or.kr'
+
+# Nexacro 애플리케이션 초기화 완료 여부
+NEXACRO_READY_JS = "() => !!(window.nexacro && nexacro.getApplication && nexacro.getApplication())"
+
+# 모달 닫기 버튼 후보 (하나의 합집합 선택자로 묶어 한 번에 조회)
+CLOSE_BTN_SELECTORS = (
+    'button:has-text("닫기")',
+    'button:has-text("확인")',
+    'button:has-text("취소")',
+    '[title="닫기"]',
+    '.close-btn',
+    '[class*="close"]'
+)
+
+# 색인분류검색 모달이 열려 있는지 확인하는 후보 (modal_div.html에서 발견된 구조)
+MODAL_OPEN_SELECTOR = ', '.join((
+    '#InfoBank_RvStdInqIdxPL',          # 실제 modal_div.html에서 발견된 모달 ID
+    'div[id*="RvStdInqIdxPL"]',
+    'div[style*="z-index: 1000002"]'    # 모달의 z-index 값
+))
+
+# 그리드 행 JavaScript 클릭 (포커스/스크롤 없이 click 이벤트만 발생)
+DISPATCH_CLICK_JS = "el => el.dispatchEvent(new MouseEvent('click', {bubbles: true, cancelable: true}))"
+
+# 검색 입력 필드 값 (보이지 않으면 빈 문자열)
+INPUT_VALUE_JS = "(sel) => { const el = document.querySelector(sel); return el && el.offsetParent !== null ? el.value.trim() : ''; }"
+
+# 분류 그리드 행 스냅샷 (인자: 선택자)
+# 보이는 행을 텍스트 기준으로 중복 제거하여 최대 30개까지 {i, id, text}로 반환
+ROW_SNAPSHOT_JS = """
+(sel) => {
+    const seen = new Set();
+    const out = [];
+    const els = document.querySelectorAll(sel);
+    for (let i = 0; i < els.length && out.length < 30; i++) {
+        const e = els[i];
+        if (e.offsetParent === null) continue;
+        const text = (e.textContent || '').trim();
+        if (!text || seen.has(text)) continue;
+        seen.add(text);
+        out.push({i: i, id: e.id || '', text: text});
+    }
+    return out;
+}
+"""
+
+# 트리 구조 후보 요소(클래스에 tree/node/... 포함 또는 LI/TD/SPAN)를 최대 50개 수집하는 스크립트
+TREE_CANDIDATES_JS = """
+() => {
+    const keywords = ['tree', 'node', 'list', 'item', 'row', 'cell'];
+    const out = [];
+    const els = document.querySelectorAll('div, span, td, li, a, button');
+    for (let i = 0; i < els.length && out.length < 50; i++) {
+        const e = els[i];
+        const text = (e.textContent || '').trim();
+        if (!text || text.length >= 100) continue;
+        const cls = e.getAttribute('class') || '';
+        const lowerCls = cls.toLowerCase();
+        if (keywords.some(k => lowerCls.includes(k)) || ['LI', 'TD', 'SPAN'].includes(e.tagName)) {
+            out.push({index: i, tag: e.tagName, text: text.slice(0, 50), class: cls.slice(0, 50)});
+        }
+    }
+    return out;
+}
+"""
+
+
+class HIRAMapperBase:
+    """색인분류 추출 크롤러 공통 기능 (하위 클래스는 순회 방식과 CSV 컬럼만 정의)"""
+    
+    # 결과 CSV 컬럼과 파일명 접두어 (하위 클래스에서 지정)
+    csv_fieldnames: List[str] = []
+    csv_prefix = "hira_classification"
+    
+    def __init__(self, output_dir: str = "./output", concurrency: int = 4, headless: bool = True,
+                 rate_limit: float = 5.0, slow_mo: int = 0):
+        """
+        공통 크롤러 상태 초기화
+        
+        Args:
+            output_dir: 출력 파일 저장 디렉토리
+            concurrency: 동시에 사용할 워커 페이지 수
+            headless: 헤드리스 모드 여부
+            rate_limit: 모든 워커를 합친 초당 최대 클릭 수
+            slow_mo: Playwright 동작 간 대기(ms), 디버깅용
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(exist_ok=True)
+        self.concurrency = max(1, concurrency)
+        self.headless = headless
+        self.slow_mo = slow_mo
+        
+        # 워커 전체가 공유하는 클릭 속도 제한과 클릭 후 무작위 대기 범위(초)
+        self.limiter = AsyncLimiter(max_rate=rate_limit, time_period=1.0)
+        self.request_delay: Tuple[float, float] = (0.05, 0.2)
+        
+        # HIRA 웹사이트 URL
+        self.main_url = "https://biz.hira.or.kr/index.do"
+        self.popup_url = "https://biz.hira.or.kr/popup.ndo?formname=qya_bizcom%3A%3AInfoBank.xfdl&framename=InfoBank"
+        self.popup_url_prefix = self.popup_url.split('?')[0]
+        
+        # CSS 선택자 (하위 클래스에서 항목 추가)
+        self.selectors = {
+            'search_input': '#InfoBank_form_divMain_divWork1_edtSearchTxt_input',
+            'classification_btn': '#InfoBank_form_divMain_divWork1_btnIdxDiv',
+            'modal': '#InfoBank_RvStdInqIdxPL',
+            'main_menu': ':text("심사기준 종합서비스"), :text("InfoBank"), a[href*="InfoBank"], [onclick*="InfoBank"]',
+            'modal_close_candidates': ', '.join(CLOSE_BTN_SELECTORS) + ' >> visible=true'
+        }
+        
+        # 분류 데이터는 메모리에 모으지 않고 CSV로 바로 기록 (워커 간 쓰기는 락으로 직렬화)
+        self.csv_path: Optional[Path] = None
+        self._csv_fh = None
+        self._writer: Optional[csv.DictWriter] = None
+        self._write_lock = asyncio.Lock()
+        self.row_count = 0
+        
+        # Nexacro 세션 유지용 메인 페이지 참조 (컨텍스트별, 워커들이 공유하므로 메뉴로 팝업 열기는 한 번에 하나씩)
+        self.main_pages: Dict[BrowserContext, Page] = {}
+        self._popup_lock = asyncio.Lock()
+        
+        # Playwright 드라이버와 브라우저 (재시도 시에도 드라이버는 하나만 유지, aclose에서 정리)
+        self._pw = None
+        self._browser: Optional[Browser] = None
+    
+    async def setup_browser(self) -> Tuple[Browser, BrowserContext]:
+        """브라우저 설정 및 컨텍스트 생성"""
+        if self._pw is None:
+            self._pw = await async_playwright().start()
+        
+        browser = await self._pw.chromium.launch(
+            headless=self.headless,
+            slow_mo=self.slow_mo,
+            args=['--disable-dev-shm-usage', '--no-sandbox']
+        )
+        
+        self._browser = browser
+        context = await self.create_context(browser)
+        
+        return browser, context
+    
+    async def create_context(self, browser: Browser) -> BrowserContext:
+        """공유 브라우저에서 독립된 컨텍스트(세션)를 생성한다"""
+        context = await browser.new_context(
+            viewport={'width': 1920, 'height': 1080}
+        )
+        
+        # 이미지/폰트/미디어 등 불필요한 리소스 차단
+        await context.route('**/*', self._block_unneeded_resources)
+        
+        return context
+    
+    async def _block_unneeded_resources(self, route):
+        """분류 추출에 필요 없는 리소스 요청을 차단한다"""
+        request = route.request
+        resource_type = request.resource_type
+        
+        if resource_type in BLOCKED_RESOURCE_TYPES and not (
+            resource_type == 'stylesheet' and ALLOWED_STYLESHEET_HOST in request.url
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def wait_for_element(self, page: Page, selector: str, state: str = 'visible', timeout: int = 10000) -> bool:
+        """요소가 지정한 상태가 될 때까지 기다린다 (고정 대기 대신 사용)"""
+        try:
+            await page.locator(selector).first.wait_for(state=state, timeout=timeout)
+            return True
+        except PlaywrightTimeoutError:
+            logger.debug(f"요소 대기 시간 초과: {selector} ({state})")
+            return False
+    
+    async def debug_modal_elements(self, page: Page, modal_title: str = ""):
+        """모달 내부 요소들을 디버깅용으로 출력"""
+        try:
+            logger.info(f"=== {modal_title} 모달 요소 분석 시작 ===")
+            
+            # 트리 구조나 리스트 요소로 보이는 후보를 브라우저 안에서 한 번에 필터링
+            tree_elements = await page.evaluate(TREE_CANDIDATES_JS)
+            
+            logger.info(f"트리 구조 후보 요소 {len(tree_elements)}개 발견")
+            for elem in tree_elements[:20]:  # 상위 20개만 출력
+                logger.info(f"[{elem['index']}] {elem['tag']} - '{elem['text']}' (class: {elem['class']})")
+            
+            logger.info(f"=== {modal_title} 모달 요소 분석 완료 ===")
+        
+        except Exception as e:
+            logger.error(f"모달 요소 분석 실패: {e}")
+    
+    async def open_main_page(self, context: BrowserContext) -> Page:
+        """메인 페이지를 열고 Nexacro 세션을 확보한다"""
+        try:
+            main_page = self.main_pages.get(context)
+            if main_page is None or main_page.is_closed():
+                logger.info(f"메인 페이지 접속: {self.main_url}")
+                main_page = await context.new_page()
+                self.main_pages[context] = main_page
+                await main_page.goto(self.main_url, wait_until='networkidle', timeout=30000)
+                
+                # Nexacro 애플리케이션 로딩 대기 (메뉴가 그려질 때까지)
+                logger.info("Nexacro 메인 애플리케이션 로딩 대기...")
+                if not await self.wait_for_element(main_page, self.selectors['main_menu'], timeout=20000):
+                    logger.warning("메인 메뉴가 표시되지 않았습니다. 계속 진행...")
+                
+                logger.info("메인 페이지 로딩 완료 - 세션 확보")
+            
+            return main_page
+        
+        except Exception as e:
+            logger.error(f"메인 페이지 열기 실패: {e}")
+            raise
+    
+    async def open_popup_page(self, context: BrowserContext) -> Page:
+        """메인 페이지에서 팝업을 열거나 직접 팝업 페이지에 접속한다"""
+        try:
+            # 방법 1: 메인 페이지에서 팝업 링크 찾기
+            # 같은 메인 페이지에서 여러 워커가 동시에 expect_page를 걸면 같은 팝업을 받을 수 있으므로 이 구간만 직렬화
+            async with self._popup_lock:
+                popup_page = await self._open_popup_from_menu(context)
+            
+            # 방법 2: 직접 팝업 URL 접속 (메인 페이지 referer 설정)
+            if popup_page is None:
+                logger.info("메뉴에서 팝업 열기 실패, 직접 팝업 URL로 접속")
+                popup_page = await context.new_page()
+                
+                # referer를 메인 페이지로 설정하여 팝업 URL 접속
+                await popup_page.goto(
+                    self.popup_url,
+                    wait_until='networkidle',
+                    timeout=30000,
+                    referer=self.main_url
+                )
+            
+            await self.wait_for_popup_ready(popup_page)
+            
+            return popup_page
+        
+        except Exception as e:
+            logger.error(f"팝업 페이지 열기 실패: {e}")
+            raise
+    
+    async def _open_popup_from_menu(self, context: BrowserContext) -> Optional[Page]:
+        """메인 페이지 메뉴를 클릭해 팝업을 연다 (실패하면 None)"""
+        main_page = await self.open_main_page(context)
+        
+        # 심사기준 종합서비스 또는 InfoBank 메뉴 찾기
+        menu_selectors = [
+            "text=심사기준 종합서비스",
+            "text=InfoBank",
+            "a[href*='InfoBank']",
+            "[onclick*='InfoBank']",
+            "text=수가코드",
+            "text=요양급여"
+        ]
+        
+        for selector in menu_selectors:
+            try:
+                menu_link = main_page.locator(selector).first
+                if await menu_link.is_visible():
+                    logger.info(f"메뉴 링크 발견: {selector}")
+                    
+                    # 팝업이 열릴 것을 기대
+                    async with context.expect_page() as popup_info:
+                        await menu_link.click()
+                    
+                    popup_page = await popup_info.value
+                    await popup_page.wait_for_load_state('networkidle', timeout=30000)
+                    logger.info("메뉴에서 팝업 열기 성공")
+                    return popup_page
+            
+            except Exception as e:
+                logger.debug(f"메뉴 선택자 {selector} 시도 실패: {e}")
+                continue
+        
+        return None
+    
+    async def wait_for_popup_ready(self, popup_page: Page):
+        """Nexacro 애플리케이션 초기화와 기본 검색 입력창 표시를 기다린다"""
+        logger.info("Nexacro 팝업 애플리케이션 로딩 대기...")
+        try:
+            await popup_page.wait_for_function(NEXACRO_READY_JS, timeout=10000)
+        except PlaywrightTimeoutError:
+            logger.debug("Nexacro 애플리케이션 준비 신호 대기 시간 초과")
+        
+        if await self.wait_for_element(popup_page, self.selectors['search_input'], timeout=20000):
+            logger.info("팝업 페이지 로딩 완료")
+        else:
+            logger.warning("기본 검색 입력창을 찾을 수 없음. 계속 진행...")
+    
+    async def ensure_popup_page(self, context: BrowserContext, popup_page: Optional[Page] = None) -> Page:
+        """팝업 페이지가 닫혔거나 다른 주소로 이동했으면 다시 연다"""
+        # 열려 있고 팝업 주소에 머물러 있으면 그대로 사용 (대부분의 경우, 브라우저 왕복 없음)
+        if popup_page is not None and not popup_page.is_closed() and popup_page.url.startswith(self.popup_url_prefix):
+            return popup_page
+        
+        if popup_page is None:
+            return await self.open_popup_page(context)
+        
+        if popup_page.is_closed():
+            logger.warning("팝업 페이지가 닫혔습니다. 재접속을 시도합니다.")
+            return await self.open_popup_page(context)
+        
+        # 다른 주소로 이동한 경우 같은 페이지에서 팝업 주소로 복귀
+        logger.warning(f"팝업 페이지가 다른 주소로 이동했습니다 ({popup_page.url}). 팝업 주소로 복귀합니다.")
+        await popup_page.goto(self.popup_url, wait_until='domcontentloaded', timeout=30000, referer=self.main_url)
+        await self.wait_for_popup_ready(popup_page)
+        
+        return popup_page
+    
+    async def open_classification_modal(self, page: Page) -> bool:
+        """색인분류검색 모달을 연다"""
+        try:
+            logger.info("색인분류검색 모달 열기 시도...")
+            
+            # 모달이 이미 열려있으면 버튼 클릭과 대기 없이 바로 성공 (후보 선택자를 한 번에 조회)
+            if await page.locator(MODAL_OPEN_SELECTOR).count() > 0:
+                logger.info("색인분류검색 모달이 이미 열려있습니다.")
+                return True
+            
+            # 1순위: 정확한 ID로 클릭, 2순위: 정확한 텍스트로 클릭 (Playwright 자동 대기 사용)
+            try:
+                await page.locator(self.selectors['classification_btn']).click(timeout=5000)
+                logger.info("색인분류검색 버튼 클릭 성공 (ID 방식)")
+            except PlaywrightTimeoutError:
+                logger.info("ID로 버튼을 클릭하지 못해 텍스트로 재시도합니다.")
+                await page.get_by_text('색인분류검색', exact=True).first.click(timeout=5000)
+                logger.info("색인분류검색 버튼 클릭 성공 (텍스트 방식)")
+            
+            # 모달이 나타나면 성공
+            await page.wait_for_selector(self.selectors['modal'], timeout=8000)
+            logger.info("색인분류검색 모달이 성공적으로 열렸습니다.")
+            return True
+        
+        except PlaywrightTimeoutError as e:
+            logger.error(f"색인분류검색 버튼 클릭 또는 모달 대기 시간 초과: {e}")
+            await self.debug_modal_elements(page, "색인분류")
+            return False
+        
+        except Exception as e:
+            logger.error(f"색인분류검색 모달 열기 실패: {e}")
+            return False
+    
+    async def close_modal(self, page: Page):
+        """모달을 닫는다"""
+        try:
+            # 모든 후보 중 처음 보이는 닫기 버튼을 한 번의 조회로 찾는다
+            close_btn = page.locator(self.selectors['modal_close_candidates']).first
+            if await close_btn.is_visible():
+                await close_btn.click()
+                logger.info("모달을 닫았습니다.")
+                await self.wait_for_element(page, self.selectors['modal'], state='hidden', timeout=5000)
+                return
+            
+            logger.warning("모달 닫기 버튼을 찾을 수 없습니다.")
+        
+        except Exception as e:
+            logger.error(f"모달 닫기 실패: {e}")
+    
+    async def get_input_field_value(self, page: Page) -> str:
+        """검색 입력 필드에서 자동 입력된 값을 한 번의 evaluate로 가져온다"""
+        try:
+            return await page.evaluate(INPUT_VALUE_JS, self.selectors['search_input'])
+        except Exception as e:
+            logger.debug(f"입력 필드 값 가져오기 실패: {e}")
+        return ""
+    
+    async def _snapshot_rows(self, page: Page, grid_sel: str) -> List[Dict]:
+        """그리드에서 보이는 고유 행들의 ID와 텍스트를 한 번의 evaluate로 가져온다"""
+        return await page.evaluate(ROW_SNAPSHOT_JS, grid_sel)
+    
+    def _row_locator(self, page: Page, grid_sel: str, row: Dict) -> Locator:
+        """행 ID로 바로 찾는 Locator (ID가 없으면 그리드 내 인덱스 사용)"""
+        if row['id']:
+            return page.locator(f'[id="{row["id"]}"]')
+        return page.locator(grid_sel).nth(row['i'])
+    
+    async def _click_with_fallback(self, element: Locator, label: str, delay: bool = True):
+        """
+        그리드 행을 클릭한다 (워커 전체 속도 제한)
+        
+        그리드 행은 클릭 가능한 것이 확실하므로 actionability 검사를 생략한 강제 클릭을 먼저 쓰고,
+        실패할 때만 JavaScript로 click 이벤트를 직접 발생시킨다.
+        delay=False면 클릭 후 무작위 대기를 호출 측에 맡긴다 (응답 대기와 겹칠 때 사용).
+        """
+        async with self.limiter:
+            try:
+                await element.click(force=True)
+            except Exception as e:
+                logger.warning(f"{label} 강제 클릭 실패, JavaScript 클릭 시도: {e}")
+                await element.evaluate(DISPATCH_CLICK_JS)
+        if delay:
+            await asyncio.sleep(random.uniform(*self.request_delay))
+    
+    def open_csv(self, resume_path: Optional[Path] = None):
+        """
+        결과 CSV 파일을 열고 헤더를 기록한다
+        
+        Args:
+            resume_path: 이어서 기록할 이전 실행의 CSV (있으면 헤더 없이 이어 쓰기)
+        """
+        if resume_path is not None and resume_path.exists():
+            self.csv_path = resume_path
+            mode = 'a'
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.csv_path = self.output_dir / f"{self.csv_prefix}_{timestamp}.csv"
+            mode = 'w'
+        
+        # 줄 단위 버퍼링으로 행마다 디스크에 반영 (중단되어도 수집분 보존)
+        self._csv_fh = open(self.csv_path, mode, newline='', encoding='utf-8-sig', buffering=1)
+        self._writer = csv.DictWriter(self._csv_fh, fieldnames=self.csv_fieldnames)
+        
+        if mode == 'w':
+            self._writer.writeheader()
+            logger.info(f"CSV 파일 생성: {self.csv_path}")
+        else:
+            logger.info(f"이전 실행 CSV에 이어서 기록: {self.csv_path}")
+    
+    async def write_row(self, row: Dict):
+        """분류 행 하나를 CSV에 기록한다"""
+        async with self._write_lock:
+            self._writer.writerow(row)
+            self.row_count += 1
+    
+    def close_csv(self) -> str:
+        """
+        결과 CSV 파일을 닫는다
+        
+        Returns:
+            저장된 파일 경로 (저장된 행이 없으면 빈 문자열)
+        """
+        if self._csv_fh is None:
+            return ""
+        
+        try:
+            self._csv_fh.close()
+            self._csv_fh = None
+            self._writer = None
+            
+            if not self.row_count:
+                logger.warning("저장할 데이터가 없습니다.")
+                return ""
+            
+            logger.info(f"CSV 파일 저장 완료: {self.csv_path}")
+            logger.info(f"총 {self.row_count}개 항목 저장")
+            
+            return str(self.csv_path)
+        
+        except Exception as e:
+            logger.error(f"CSV 저장 실패: {e}")
+            return ""
+    
+    async def aclose(self):
+        """남아 있는 브라우저를 닫고 Playwright 드라이버를 종료한다"""
+        try:
+            if self._browser is not None and self._browser.is_connected():
+                await self._browser.close()
+        except Exception as e:
+            logger.warning(f"브라우저 종료 중 오류: {e}")
+        finally:
+            self._browser = None
+            if self._pw is not None:
+                await self._pw.stop()
+                self._pw = None
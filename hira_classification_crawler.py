@@ -4,28 +4,120 @@ HIRA 요양기관 업무포털 색인분류 검색 기반 자동화 크롤러
 """
 
 import asyncio
+import atexit
+import csv
+import functools
 import logging
+import logging.handlers
+import json
 import os
-import time
 from datetime import datetime
 from pathlib import Path
+from queue import SimpleQueue
 from typing import List, Dict, Optional, Tuple
 import pandas as pd
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hira_classification_crawler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 로깅 설정 (파일/콘솔 출력은 별도 스레드의 QueueListener가 담당하여 이벤트 루프를 막지 않음)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler('hira_classification_crawler.log', encoding='utf-8'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue: SimpleQueue = SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # 최종 포맷은 리스너 측 핸들러가 적용
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger(__name__)
 
+# 진행률 로그 출력 간격 (처리한 수가코드 수 기준)
+PROGRESS_LOG_INTERVAL = 10
+
+# 결과 CSV 컬럼
+RESULT_FIELDNAMES = ['code', 'success', 'error', 'filename', 'timestamp']
+
+# 엑셀 파싱 캐시 디렉토리 (다운로드 디렉토리 아래, 다운로드 파일과 섞이지 않도록 분리)
+PARSE_CACHE_DIRNAME = '.parse_cache'
+
+# 분류 탐색에 필요 없는 리소스 (차단하여 페이지 로딩 단축)
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media', 'stylesheet'}
+BLOCKED_URL_KEYWORDS = ('google-analytics', 'googletagmanager', 'doubleclick')
+
+# 분류 트리 항목을 찾기 위한 선택자 템플릿 ({name}에 분류명이 들어간다)
+# :text()는 텍스트를 포함하는 가장 작은 요소와 일치하므로 span/div/td:has-text 후보를 대신한다
+# (has-text 후보를 합치면 DOM 순서상 바깥 컨테이너가 먼저 잡힌다)
+LEVEL_SELECTOR_TEMPLATES = (
+    ':text("{name}")',
+    '[title="{name}"]'
+)
+
+
+# 컨텍스트당 메모리를 줄이기 위한 Chromium 실행 옵션
+CHROMIUM_ARGS = [
+    '--disable-dev-shm-usage',
+    '--no-zygote',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows'
+]
+
+# 색인분류 검색 버튼 후보 선택자
+CLASSIFICATION_BTN_SELECTORS = (
+    ':text("색인분류 검색")',
+    'button:has-text("색인분류")',
+    '[title*="색인분류"]',
+    '[onclick*="classification"]',
+    'input[value*="색인분류"]'
+)
+
+# 분류 모달 닫기 버튼 후보 선택자
+CLOSE_BTN_SELECTORS = (
+    ':text("닫기")',
+    ':text("확인")',
+    'button:has-text("닫기")',
+    'button:has-text("확인")',
+    '[title="닫기"]'
+)
+
+# 입력창의 현재 값을 읽는 스크립트 (인자: 입력창 선택자)
+INPUT_VALUE_JS = "sel => { const el = document.querySelector(sel); return el ? el.value.trim() : ''; }"
+
+# 입력창에 클릭 전과 다른 값이 채워졌는지 확인하는 스크립트 (인자: [입력창 선택자, 클릭 전 값])
+INPUT_CHANGED_JS = "([sel, prev]) => { const el = document.querySelector(sel); const v = el ? el.value.trim() : ''; return !!v && v !== prev; }"
+
+
+@functools.lru_cache(maxsize=None)
+def level_item_selector(name: str) -> str:
+    """분류명에 해당하는 트리 항목의 보이는 요소를 한 번에 찾는 합집합 선택자를 반환한다."""
+    union = ', '.join(template.format(name=name) for template in LEVEL_SELECTOR_TEMPLATES)
+    return f'{union} >> visible=true'
+
+
+def read_excel_columns(file_path: str, usecols: List[int]) -> pd.DataFrame:
+    """
+    엑셀 파일에서 필요한 컬럼만 문자열로 읽는다.
+    
+    calamine 엔진을 우선 사용하고, python-calamine이 없으면 openpyxl로 대체한다.
+    """
+    try:
+        return pd.read_excel(file_path, engine='calamine', usecols=usecols, dtype=str)
+    except ImportError:
+        logger.warning("python-calamine이 설치되어 있지 않아 openpyxl 엔진을 사용합니다.")
+        return pd.read_excel(file_path, engine='openpyxl', usecols=usecols, dtype=str)
+
+
 class HIRAClassificationCrawler:
-    def __init__(self, excel_file_path: str, classification_mapping_file: str, download_dir: str = "./downloads"):
+    def __init__(self, excel_file_path: str, classification_mapping_file: str, download_dir: str = "./downloads",
+                 concurrency: int = 6, headless: bool = True):
         """
         HIRA 색인분류 검색 크롤러 초기화
         
@@ -33,11 +125,15 @@ class HIRAClassificationCrawler:
             excel_file_path: 수가코드가 포함된 엑셀 파일 경로
             classification_mapping_file: 수가코드-분류경로 매핑 엑셀 파일 경로
             download_dir: 다운로드 디렉토리 경로
+            concurrency: 동시에 실행할 브라우저 컨텍스트(워커) 수
+            headless: 브라우저를 화면 없이 실행할지 여부 (클릭 동작 확인 시 False)
         """
         self.excel_file_path = excel_file_path
         self.classification_mapping_file = classification_mapping_file
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(exist_ok=True)
+        self.concurrency = max(1, concurrency)
+        self.headless = headless
         
         # HIRA 웹사이트 URL 및 CSS 선택자
         self.popup_url = "https://biz.hira.or.kr/popup.ndo?formname=qya_bizcom%3A%3AInfoBank.xfdl&framename=InfoBank"
@@ -46,26 +142,77 @@ class HIRAClassificationCrawler:
             'search_button': '#InfoBank_form_divMain_divWork1_btnS0001',  # 조회 버튼
             'excel_button': '#InfoBank_form_divMain_divWork1_btnE0001TextBoxElement',  # 엑셀 다운로드 버튼
             'search_input': '#InfoBank_form_divMain_divWork1_edtSearchTxt_input',  # 검색 입력창 (확인용)
-            'modal_close_btn': 'text=닫기'  # 모달 닫기 버튼
+            'modal_close_btn': 'text=닫기',  # 모달 닫기 버튼
+            'modal_root': '#InfoBank_RvStdInqIdxPL',  # 색인분류 검색 모달
+            'middle_rows': '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv2_body div[id*="gridrow"]',  # 중분류 그리드 행
+            'minor_rows': '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv3_body div[id*="gridrow"]',  # 소분류 그리드 행
+            'result_rows': '#InfoBank_form_divMain_divWork1_grdRvStdInq_body div[id*="gridrow"]',  # 조회 결과 그리드 행
+            'no_data_msg': 'text=조회된 데이터가 없습니다'  # 조회 결과 없음 메시지
         }
         
         # 분류 경로 매핑 데이터
         self.code_classification_map: Dict[str, Dict] = {}
         
-        # 다운로드 결과 추적
-        self.results: List[Dict] = []
+        # 여러 후보 선택자를 하나로 합친 선택자 (보이는 첫 요소를 한 번의 호출로 찾는다)
+        self._classification_btn_sel = ', '.join(CLASSIFICATION_BTN_SELECTORS) + ' >> visible=true'
+        self._close_btn_sel = ', '.join(CLOSE_BTN_SELECTORS) + ' >> visible=true'
         
+        # 다운로드 결과 추적 (결과는 CSV에 바로 기록하고 건수만 유지)
+        self.results_file: Optional[Path] = None
+        self._results_fh = None
+        self._results_writer: Optional[csv.DictWriter] = None
+        self.processed_count = 0
+        self.success_count = 0
+        
+    def _parse_cache_path(self, file_path: str, kind: str) -> Path:
+        """원본 파일의 수정 시각과 크기를 키로 하는 파싱 캐시 경로를 반환한다."""
+        stat = os.stat(file_path)
+        return self.download_dir / PARSE_CACHE_DIRNAME / f"{kind}_{Path(file_path).stem}_{stat.st_mtime_ns}_{stat.st_size}.json"
+    
+    def _load_parse_cache(self, file_path: str, kind: str):
+        """파싱 캐시가 있으면 읽어 반환하고, 없거나 손상되었으면 None을 반환한다."""
+        cache_path = self._parse_cache_path(file_path, kind)
+        if not cache_path.exists():
+            return None
+        
+        try:
+            return json.loads(cache_path.read_text(encoding='utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            logger.warning(f"파싱 캐시 읽기 실패, 원본 파일을 다시 읽습니다: {cache_path} ({e})")
+            return None
+    
+    def _save_parse_cache(self, file_path: str, kind: str, data):
+        """파싱 결과를 캐시 파일로 저장하고 같은 원본의 이전 캐시는 지운다."""
+        cache_path = self._parse_cache_path(file_path, kind)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            for stale_path in cache_path.parent.glob(f"{kind}_{Path(file_path).stem}_*.json"):
+                # 이름이 접두어로 겹치는 다른 원본의 캐시는 제외 (수정 시각/크기에는 '_'가 없음)
+                if stale_path != cache_path and stale_path.stem.count('_') == cache_path.stem.count('_'):
+                    stale_path.unlink(missing_ok=True)
+            cache_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"파싱 캐시 저장 실패: {cache_path} ({e})")
+    
     def read_excel_codes(self) -> List[str]:
         """
         엑셀 파일에서 수가코드 목록을 읽어온다.
         
+        파일이 바뀌지 않았으면 이전 실행의 파싱 캐시를 사용한다.
+        
         Returns:
             수가코드 리스트
         """
         try:
-            df = pd.read_excel(self.excel_file_path)
-            codes = df.iloc[:, 0].astype(str).tolist()
-            codes = [code.strip() for code in codes if pd.notna(code) and str(code).strip()]
+            cached_codes = self._load_parse_cache(self.excel_file_path, 'codes')
+            if cached_codes is not None:
+                logger.info(f"캐시에서 {len(cached_codes)}개의 수가코드를 읽었습니다.")
+                return cached_codes
+            
+            df = read_excel_columns(self.excel_file_path, usecols=[0])
+            codes = df.iloc[:, 0].dropna().str.strip().tolist()
+            codes = [code for code in codes if code]
+            self._save_parse_cache(self.excel_file_path, 'codes', codes)
             
             logger.info(f"엑셀 파일에서 {len(codes)}개의 수가코드를 읽었습니다.")
             return codes
@@ -82,21 +229,29 @@ class HIRAClassificationCrawler:
         코드 | 대분류 | 중분류 | 소분류
         A001 | 진료비 | 기본진료료 | 외래진료료
         
+        파일이 바뀌지 않았으면 이전 실행의 파싱 캐시를 사용한다.
+        
         Returns:
             매핑 딕셔너리
         """
         try:
-            df = pd.read_excel(self.classification_mapping_file)
-            mapping = {}
-            
-            for _, row in df.iterrows():
-                code = str(row.iloc[0]).strip()  # 첫 번째 컬럼: 코드
-                if pd.notna(code) and code:
-                    mapping[code] = {
-                        'major': str(row.iloc[1]).strip() if pd.notna(row.iloc[1]) else '',  # 대분류
-                        'middle': str(row.iloc[2]).strip() if pd.notna(row.iloc[2]) else '',  # 중분류
-                        'minor': str(row.iloc[3]).strip() if pd.notna(row.iloc[3]) else ''   # 소분류
-                    }
+            cached_mapping = self._load_parse_cache(self.classification_mapping_file, 'mapping')
+            if cached_mapping is not None:
+                logger.info(f"캐시에서 {len(cached_mapping)}개의 매핑을 읽었습니다.")
+                return cached_mapping
+            
+            # 앞의 4개 컬럼: 코드 | 대분류 | 중분류 | 소분류
+            df = read_excel_columns(self.classification_mapping_file, usecols=[0, 1, 2, 3])
+            df.columns = ['code', 'major', 'middle', 'minor']
+            df = df.dropna(subset=['code'])
+            
+            df['code'] = df['code'].astype(str).str.strip()
+            for column in ['major', 'middle', 'minor']:
+                df[column] = df[column].fillna('').astype(str).str.strip()
+            df = df[df['code'] != '']
+            
+            mapping = dict(zip(df['code'], df[['major', 'middle', 'minor']].to_dict('records')))
+            self._save_parse_cache(self.classification_mapping_file, 'mapping', mapping)
             
             logger.info(f"분류 매핑 파일에서 {len(mapping)}개의 매핑을 읽었습니다.")
             return mapping
@@ -105,40 +260,55 @@ class HIRAClassificationCrawler:
             logger.error(f"분류 매핑 파일 읽기 실패: {e}")
             raise
     
-    async def setup_browser(self) -> tuple[Browser, BrowserContext, Page]:
+    async def setup_browser(self) -> Browser:
         """
-        브라우저 설정 및 페이지 생성
+        워커들이 공유할 브라우저를 실행한다.
         
         Returns:
-            browser, context, page 튜플
+            browser 객체
         """
         playwright = await async_playwright().start()
         
         browser = await playwright.chromium.launch(
-            headless=False,  # GUI 모드로 실행하여 클릭 동작 확인 가능
-            slow_mo=1500     # 동작 간 1.5초 대기 (클릭 동작을 명확히 확인)
+            headless=self.headless,  # 디버깅 시 headless=False로 실행하면 클릭 동작 확인 가능
+            slow_mo=0,               # 고정 지연 대신 이벤트 기반 대기 사용
+            args=CHROMIUM_ARGS
         )
         
+        return browser
+    
+    async def create_worker_page(self, browser: Browser) -> Tuple[BrowserContext, Page]:
+        """
+        워커 하나가 사용할 독립 컨텍스트와 페이지를 생성한다.
+        
+        Args:
+            browser: 공유 브라우저 객체
+            
+        Returns:
+            context, page 튜플
+        """
         context = await browser.new_context(
             accept_downloads=True,
-            viewport={'width': 1920, 'height': 1080}
+            viewport={'width': 1366, 'height': 768},
+            java_script_enabled=True,
+            bypass_csp=True
         )
         
-        page = await context.new_page()
+        # 이미지/폰트/미디어/스타일시트 및 분석 스크립트 요청 차단 (이후 생성되는 페이지에도 적용)
+        await context.route('**/*', self._block_unneeded_resources)
         
-        # 다운로드 이벤트 리스너 추가
-        page.on('download', self._handle_download)
+        # 다운로드는 expect_download로만 받아 한 번만 저장한다
+        page = await context.new_page()
         
-        return browser, context, page
+        return context, page
     
-    async def _handle_download(self, download):
-        """다운로드 이벤트 핸들러"""
-        try:
-            filename = f"temp_{int(time.time())}_{download.suggested_filename}"
-            await download.save_as(self.download_dir / filename)
-            logger.info(f"파일 다운로드 완료: {filename}")
-        except Exception as e:
-            logger.error(f"다운로드 처리 실패: {e}")
+    async def _block_unneeded_resources(self, route):
+        """분류 탐색에 필요 없는 리소스 요청을 차단한다."""
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(k in request.url for k in BLOCKED_URL_KEYWORDS):
+            await route.abort()
+        else:
+            await route.continue_()
     
     async def open_classification_modal(self, page: Page) -> bool:
         """
@@ -151,46 +321,24 @@ class HIRAClassificationCrawler:
             모달 열기 성공 여부
         """
         try:
-            logger.info("색인분류 검색 버튼을 찾고 있습니다...")
-            
-            # 색인분류 검색 버튼 찾기 (여러 가능한 선택자 시도)
-            classification_selectors = [
-                'text=색인분류 검색',
-                'button:has-text("색인분류")',
-                '[title*="색인분류"]',
-                '[onclick*="classification"]',
-                'input[value*="색인분류"]'
-            ]
-            
-            classification_btn = None
-            for selector in classification_selectors:
-                try:
-                    btn = page.locator(selector)
-                    if await btn.is_visible():
-                        classification_btn = btn
-                        logger.info(f"색인분류 검색 버튼 발견: {selector}")
-                        break
-                except:
-                    continue
-            
-            if classification_btn is None:
+            logger.debug("색인분류 검색 버튼을 찾고 있습니다...")
+            
+            # 색인분류 검색 버튼 찾기 (후보 선택자 합집합으로 한 번에 탐색)
+            classification_btn = page.locator(self._classification_btn_sel).first
+            try:
+                await classification_btn.wait_for(state='visible', timeout=10000)
+            except PlaywrightTimeoutError:
                 logger.error("색인분류 검색 버튼을 찾을 수 없습니다.")
                 return False
             
-            # 버튼이 활성화될 때까지 대기
-            await classification_btn.wait_for(state='enabled', timeout=10000)
-            
-            # 클릭 전 페이지 상태 확인
-            await asyncio.sleep(2)
-            
             # 색인분류 검색 버튼 클릭
-            logger.info("색인분류 검색 버튼을 클릭합니다...")
+            logger.debug("색인분류 검색 버튼을 클릭합니다...")
             await classification_btn.click()
             
             # 모달이 나타날 때까지 대기
-            await asyncio.sleep(3)
+            await page.wait_for_selector(self.selectors['modal_root'], state='visible', timeout=5000)
             
-            logger.info("색인분류 검색 모달이 열렸습니다.")
+            logger.debug("색인분류 검색 모달이 열렸습니다.")
             return True
             
         except Exception as e:
@@ -211,198 +359,175 @@ class HIRAClassificationCrawler:
             분류 선택 성공 여부
         """
         try:
-            logger.info(f"분류 경로 탐색 시작: {major} → {middle} → {minor}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"분류 경로 탐색 시작: {major} → {middle} → {minor}")
             
             # 1단계: 대분류 클릭
-            logger.info(f"대분류 '{major}' 클릭 시도...")
-            major_selectors = [
-                f'text={major}',
-                f'[title="{major}"]',
-                f'span:has-text("{major}")',
-                f'div:has-text("{major}")',
-                f'td:has-text("{major}")'
-            ]
-            
-            major_clicked = False
-            for selector in major_selectors:
-                try:
-                    major_element = page.locator(selector).first
-                    if await major_element.is_visible():
-                        await major_element.click()
-                        logger.info(f"대분류 '{major}' 클릭 성공")
-                        major_clicked = True
-                        break
-                except:
-                    continue
-            
-            if not major_clicked:
-                logger.error(f"대분류 '{major}'를 찾을 수 없습니다.")
+            if not await self.click_classification_item(page, major, '대분류'):
                 return False
             
             # 중분류가 로드될 때까지 대기
-            await asyncio.sleep(2)
+            await page.wait_for_selector(self.selectors['middle_rows'], state='visible', timeout=5000)
             
             # 2단계: 중분류 클릭
-            logger.info(f"중분류 '{middle}' 클릭 시도...")
-            middle_selectors = [
-                f'text={middle}',
-                f'[title="{middle}"]',
-                f'span:has-text("{middle}")',
-                f'div:has-text("{middle}")',
-                f'td:has-text("{middle}")'
-            ]
-            
-            middle_clicked = False
-            for selector in middle_selectors:
-                try:
-                    middle_element = page.locator(selector).first
-                    if await middle_element.is_visible():
-                        await middle_element.click()
-                        logger.info(f"중분류 '{middle}' 클릭 성공")
-                        middle_clicked = True
-                        break
-                except:
-                    continue
-            
-            if not middle_clicked:
-                logger.error(f"중분류 '{middle}'를 찾을 수 없습니다.")
+            if not await self.click_classification_item(page, middle, '중분류'):
                 return False
             
             # 소분류가 로드될 때까지 대기
-            await asyncio.sleep(2)
-            
-            # 3단계: 소분류 클릭
-            logger.info(f"소분류 '{minor}' 클릭 시도...")
-            minor_selectors = [
-                f'text={minor}',
-                f'[title="{minor}"]',
-                f'span:has-text("{minor}")',
-                f'div:has-text("{minor}")',
-                f'td:has-text("{minor}")'
-            ]
-            
-            minor_clicked = False
-            for selector in minor_selectors:
-                try:
-                    minor_element = page.locator(selector).first
-                    if await minor_element.is_visible():
-                        await minor_element.click()
-                        logger.info(f"소분류 '{minor}' 클릭 성공")
-                        minor_clicked = True
-                        break
-                except:
-                    continue
-            
-            if not minor_clicked:
-                logger.error(f"소분류 '{minor}'를 찾을 수 없습니다.")
+            await page.wait_for_selector(self.selectors['minor_rows'], state='visible', timeout=5000)
+            
+            # 3단계: 소분류 클릭 (이전 경로의 코드가 남아 있을 수 있으므로 클릭 전 값을 기억)
+            prev_value = await page.evaluate(INPUT_VALUE_JS, self.selectors['search_input'])
+            if not await self.click_classification_item(page, minor, '소분류'):
                 return False
             
-            # 소분류 클릭 후 검색창에 코드가 입력될 때까지 대기
-            await asyncio.sleep(3)
+            # 소분류 클릭 후 검색창 값이 새 코드로 바뀔 때까지 대기
+            await page.wait_for_function(
+                INPUT_CHANGED_JS,
+                arg=[self.selectors['search_input'], prev_value],
+                timeout=5000
+            )
             
-            logger.info(f"분류 경로 탐색 완료: {major} → {middle} → {minor}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"분류 경로 탐색 완료: {major} → {middle} → {minor}")
             return True
             
         except Exception as e:
             logger.error(f"분류 트리 탐색 실패: {e}")
             return False
     
+    async def click_classification_item(self, page: Page, name: str, label: str) -> bool:
+        """
+        분류 트리의 한 단계에서 이름이 일치하는 항목을 클릭한다.
+        
+        Args:
+            page: Playwright 페이지 객체
+            name: 분류명
+            label: 로그용 단계 이름
+            
+        Returns:
+            클릭 성공 여부
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{label} '{name}' 클릭 시도...")
+        
+        element = page.locator(level_item_selector(name)).first
+        try:
+            await element.wait_for(state='visible', timeout=5000)
+        except PlaywrightTimeoutError:
+            logger.error(f"{label} '{name}'를 찾을 수 없습니다.")
+            return False
+        
+        await element.click()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{label} '{name}' 클릭 성공")
+        return True
+    
     async def close_classification_modal(self, page: Page):
         """분류 모달을 닫는다."""
         try:
-            close_selectors = [
-                'text=닫기',
-                'text=확인',
-                'button:has-text("닫기")',
-                'button:has-text("확인")',
-                '[title="닫기"]'
-            ]
-            
-            for selector in close_selectors:
-                try:
-                    close_btn = page.locator(selector)
-                    if await close_btn.is_visible():
-                        await close_btn.click()
-                        logger.info("분류 모달을 닫았습니다.")
-                        await asyncio.sleep(2)
-                        return
-                except:
-                    continue
-                    
-            logger.warning("모달 닫기 버튼을 찾을 수 없습니다.")
+            close_btn = page.locator(self._close_btn_sel).first
+            if not await close_btn.is_visible():
+                logger.warning("모달 닫기 버튼을 찾을 수 없습니다.")
+                return
+            
+            await close_btn.click()
+            logger.debug("분류 모달을 닫았습니다.")
+            await page.wait_for_selector(self.selectors['modal_root'], state='hidden', timeout=5000)
             
         except Exception as e:
             logger.error(f"모달 닫기 실패: {e}")
     
-    async def search_and_download_by_classification(self, page: Page, code: str) -> Dict:
+    def get_classification_error(self, code: str) -> Optional[str]:
         """
-        색인분류를 통해 수가코드를 검색하고 엑셀 파일을 다운로드한다.
+        수가코드의 분류 경로가 탐색 가능한지 확인한다.
         
         Args:
-            page: Playwright 페이지 객체
             code: 수가코드
             
         Returns:
-            처리 결과 딕셔너리
+            탐색할 수 없으면 오류 메시지, 가능하면 None
         """
-        result = {
-            'code': code,
-            'success': False,
-            'error': None,
-            'filename': None,
-            'timestamp': datetime.now().isoformat()
-        }
+        classification = self.code_classification_map.get(code)
+        if classification is None:
+            return "분류 매핑 정보 없음"
+        if not all([classification['major'], classification['middle'], classification['minor']]):
+            return "분류 정보 불완전"
+        return None
+    
+    async def search_and_download_group(self, page: Page, codes: List[str]) -> List[Dict]:
+        """
+        같은 분류 경로(대/중/소분류)를 공유하는 수가코드들을 한 번에 처리한다.
         
-        try:
-            logger.info(f"수가코드 '{code}' 색인분류 검색 시작")
-            
-            # 1. 분류 매핑 확인
-            if code not in self.code_classification_map:
-                result['error'] = "분류 매핑 정보 없음"
-                logger.warning(f"수가코드 '{code}': 분류 매핑 정보가 없습니다.")
-                return result
-            
-            classification = self.code_classification_map[code]
-            major = classification['major']
-            middle = classification['middle']
-            minor = classification['minor']
+        색인분류 검색은 선택한 소분류 기준으로 조회되므로 같은 경로의 수가코드들은
+        분류 탐색, 조회, 엑셀 다운로드를 한 번만 수행하고 결과 파일을 공유한다.
+        
+        Args:
+            page: Playwright 페이지 객체
+            codes: 분류 경로가 같은 수가코드 리스트
             
-            if not all([major, middle, minor]):
-                result['error'] = "분류 정보 불완전"
-                logger.warning(f"수가코드 '{code}': 분류 정보가 불완전합니다. ({major}, {middle}, {minor})")
-                return result
+        Returns:
+            수가코드별 처리 결과 딕셔너리 리스트
+        """
+        timestamp = datetime.now().isoformat()
+        file_prefix = codes[0] if len(codes) == 1 else f"{codes[0]}_외{len(codes) - 1}건"
+        
+        logger.info(f"수가코드 '{file_prefix}' 색인분류 검색 시작")
+        outcome = await self._search_and_download(page, self.code_classification_map[codes[0]], file_prefix)
+        
+        return [{'code': code, **outcome, 'timestamp': timestamp} for code in codes]
+    
+    async def _search_and_download(self, page: Page, classification: Dict, file_prefix: str) -> Dict:
+        """
+        분류 경로를 탐색한 뒤 조회하고 엑셀 파일을 다운로드한다.
+        
+        Args:
+            page: Playwright 페이지 객체
+            classification: 대/중/소분류 딕셔너리
+            file_prefix: 로그와 다운로드 파일명에 사용할 수가코드 표기
             
-            # 2. 색인분류 검색 모달 열기
+        Returns:
+            success, error, filename 키를 가진 딕셔너리
+        """
+        outcome = {'success': False, 'error': None, 'filename': None}
+        major = classification['major']
+        middle = classification['middle']
+        minor = classification['minor']
+        
+        try:
+            # 1. 색인분류 검색 모달 열기
             if not await self.open_classification_modal(page):
-                result['error'] = "색인분류 모달 열기 실패"
-                return result
+                outcome['error'] = "색인분류 모달 열기 실패"
+                return outcome
             
-            # 3. 분류 트리 탐색
+            # 2. 분류 트리 탐색
             if not await self.navigate_classification_tree(page, major, middle, minor):
-                result['error'] = "분류 트리 탐색 실패"
+                outcome['error'] = "분류 트리 탐색 실패"
                 await self.close_classification_modal(page)
-                return result
+                return outcome
             
-            # 4. 모달 닫기
+            # 3. 모달 닫기
             await self.close_classification_modal(page)
             
-            # 5. 검색창에 코드가 입력되었는지 확인
+            # 4. 검색창에 코드가 입력되었는지 확인
             search_input = page.locator(self.selectors['search_input'])
             input_value = await search_input.input_value()
-            logger.info(f"검색창 입력값 확인: '{input_value}'")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"검색창 입력값 확인: '{input_value}'")
             
-            # 6. 조회 버튼 클릭
+            # 5. 조회 버튼 클릭
             search_button = page.locator(self.selectors['search_button'])
             await search_button.wait_for(state='visible', timeout=10000)
             await search_button.wait_for(state='enabled', timeout=5000)
             await search_button.click()
             
-            logger.info("조회 버튼 클릭 완료")
+            logger.debug("조회 버튼 클릭 완료")
             
-            # 7. 조회 결과 로딩 대기
-            await asyncio.sleep(5)
+            # 6. 조회 결과 로딩 대기 (결과 행 또는 결과 없음 메시지)
+            result_loaded = page.locator(self.selectors['result_rows']).or_(page.locator(self.selectors['no_data_msg']))
+            await result_loaded.first.wait_for(state='visible', timeout=15000)
             
-            # 8. 엑셀 다운로드 버튼 클릭
+            # 7. 엑셀 다운로드 버튼 클릭
             excel_button = page.locator(self.selectors['excel_button'])
             
             try:
@@ -417,43 +542,66 @@ class HIRAClassificationCrawler:
                 
                 # 파일명 생성 (수가코드 포함)
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"{code}_{timestamp}_{download.suggested_filename}"
+                filename = f"{file_prefix}_{timestamp}_{download.suggested_filename}"
                 filepath = self.download_dir / filename
                 
                 # 파일 저장
                 await download.save_as(filepath)
                 
-                result['success'] = True
-                result['filename'] = filename
+                outcome['success'] = True
+                outcome['filename'] = filename
                 logger.info(f"다운로드 성공: {filename}")
                 
             except Exception as e:
-                logger.warning(f"수가코드 '{code}': 다운로드 불가 - {str(e)}")
-                result['error'] = f"다운로드 불가: {str(e)}"
+                logger.warning(f"수가코드 '{file_prefix}': 다운로드 불가 - {str(e)}")
+                outcome['error'] = f"다운로드 불가: {str(e)}"
                 
                 # 조회 결과가 없는지 확인
                 try:
-                    no_data_msg = page.locator("text=조회된 데이터가 없습니다")
+                    no_data_msg = page.locator(self.selectors['no_data_msg'])
                     if await no_data_msg.is_visible():
-                        result['error'] = "조회 결과 없음"
-                        logger.info(f"수가코드 '{code}': 조회 결과 없음")
-                except:
-                    pass
+                        outcome['error'] = "조회 결과 없음"
+                        logger.info(f"수가코드 '{file_prefix}': 조회 결과 없음")
+                except PlaywrightError as check_error:
+                    logger.debug(f"조회 결과 없음 메시지 확인 실패: {check_error}")
             
         except Exception as e:
-            logger.error(f"수가코드 '{code}' 처리 중 오류 발생: {e}")
-            result['error'] = str(e)
+            logger.error(f"수가코드 '{file_prefix}' 처리 중 오류 발생: {e}")
+            outcome['error'] = str(e)
         
-        return result
+        return outcome
+    
+    def open_results_file(self) -> Path:
+        """결과 CSV 파일을 열고 헤더를 기록한다."""
+        self.results_file = self.download_dir / f"classification_crawling_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        self._results_fh = open(self.results_file, 'w', newline='', encoding='utf-8-sig')
+        self._results_writer = csv.DictWriter(self._results_fh, fieldnames=RESULT_FIELDNAMES)
+        self._results_writer.writeheader()
+        self._results_fh.flush()
+        return self.results_file
+    
+    def write_results(self, results: List[Dict]):
+        """처리 결과를 CSV에 바로 기록하고 건수를 갱신한다."""
+        self._results_writer.writerows(results)
+        self._results_fh.flush()
+        self.processed_count += len(results)
+        self.success_count += sum(1 for result in results if result['success'])
+    
+    def close_results_file(self):
+        """결과 CSV 파일을 닫는다."""
+        if self._results_fh is not None:
+            self._results_fh.close()
+            self._results_fh = None
+            self._results_writer = None
     
     async def run(self):
         """크롤링 메인 실행 함수"""
         logger.info("HIRA 색인분류 검색 크롤링 시작")
         
         try:
-            # 1. 데이터 파일 읽기
-            codes = self.read_excel_codes()
-            self.code_classification_map = self.read_classification_mapping()
+            # 1. 데이터 파일 읽기 (이벤트 루프를 막지 않도록 스레드에서 실행)
+            codes = await asyncio.to_thread(self.read_excel_codes)
+            self.code_classification_map = await asyncio.to_thread(self.read_classification_mapping)
             
             if not codes:
                 logger.error("수가코드가 없습니다.")
@@ -463,50 +611,139 @@ class HIRAClassificationCrawler:
                 logger.error("분류 매핑 데이터가 없습니다.")
                 return
             
-            # 2. 브라우저 설정
-            browser, context, page = await self.setup_browser()
+            results_file = await asyncio.to_thread(self.open_results_file)
+            logger.info(f"결과 파일 기록 시작: {results_file}")
             
             try:
-                # 3. HIRA 팝업 페이지 접속
-                logger.info(f"웹사이트 접속: {self.popup_url}")
-                await page.goto(self.popup_url, wait_until='networkidle', timeout=30000)
-                
-                # 페이지 로딩 완료 대기
-                await asyncio.sleep(5)
-                
-                # 4. 각 수가코드별 처리
-                total_codes = len(codes)
-                success_count = 0
-                
-                for idx, code in enumerate(codes, 1):
-                    logger.info(f"진행률: {idx}/{total_codes} ({idx/total_codes*100:.1f}%)")
-                    
-                    result = await self.search_and_download_by_classification(page, code)
-                    self.results.append(result)
-                    
-                    if result['success']:
-                        success_count += 1
-                    
-                    # 다음 검색을 위한 대기
-                    await asyncio.sleep(3)
-                
-                # 5. 결과 요약
-                logger.info(f"크롤링 완료: 전체 {total_codes}개 중 {success_count}개 성공")
-                
-                # 결과를 CSV로 저장
-                results_df = pd.DataFrame(self.results)
-                results_file = self.download_dir / f"classification_crawling_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                results_df.to_csv(results_file, index=False, encoding='utf-8-sig')
-                logger.info(f"결과 파일 저장: {results_file}")
-                
+                await self._crawl(codes)
             finally:
-                # 브라우저 정리
-                await context.close()
-                await browser.close()
+                await asyncio.to_thread(self.close_results_file)
+                logger.info(f"결과 파일 저장: {results_file}")
                 
         except Exception as e:
             logger.error(f"크롤링 실행 중 오류: {e}")
             raise
+    
+    async def _consume_results(self, results_queue: asyncio.Queue, total_codes: int):
+        """
+        결과 큐를 소비하여 CSV 기록을 직렬화하는 단일 작성 태스크.
+        
+        파일 쓰기는 스레드에서 실행하여 워커들이 기다리지 않도록 한다. None을 받으면 종료한다.
+        """
+        last_logged = 0
+        while True:
+            results = await results_queue.get()
+            if results is None:
+                return
+            
+            await asyncio.to_thread(self.write_results, results)
+            
+            # 진행률은 PROGRESS_LOG_INTERVAL개 단위로만 출력
+            done = self.processed_count
+            if done - last_logged >= PROGRESS_LOG_INTERVAL or done == total_codes:
+                last_logged = done
+                logger.info(f"진행률: {done}/{total_codes} ({done/total_codes*100:.1f}%)")
+    
+    async def _crawl(self, codes: List[str]):
+        """수가코드를 분류 경로별로 묶어 워커들로 처리하고 결과를 기록한다."""
+        results_queue: asyncio.Queue = asyncio.Queue()
+        writer_task = asyncio.create_task(self._consume_results(results_queue, len(codes)))
+        
+        try:
+            await self._crawl_codes(codes, results_queue)
+        finally:
+            results_queue.put_nowait(None)
+            await writer_task
+        
+        # 결과 요약
+        logger.info(f"크롤링 완료: 전체 {len(codes)}개 중 {self.success_count}개 성공")
+    
+    async def _crawl_codes(self, codes: List[str], results_queue: asyncio.Queue):
+        """수가코드를 분류 경로별로 묶어 워커들로 처리하고 결과를 결과 큐에 넣는다."""
+        # 분류 경로가 없는 수가코드는 브라우저 작업 없이 일괄 실패 처리
+        checked_codes = [(code, self.get_classification_error(code)) for code in codes]
+        valid_codes = [code for code, error in checked_codes if error is None]
+        timestamp = datetime.now().isoformat()
+        skipped_results = [
+            {'code': code, 'success': False, 'error': error, 'filename': None, 'timestamp': timestamp}
+            for code, error in checked_codes if error is not None
+        ]
+        if skipped_results:
+            results_queue.put_nowait(skipped_results)
+        
+        if len(valid_codes) < len(codes):
+            logger.warning(f"분류 정보가 없거나 불완전한 수가코드 {len(codes) - len(valid_codes)}개를 건너뜁니다.")
+        
+        if not valid_codes:
+            logger.error("분류 경로를 탐색할 수 있는 수가코드가 없습니다.")
+            return
+        
+        # 같은 분류 경로의 수가코드를 묶어 경로당 한 번만 탐색
+        groups: Dict[Tuple[str, str, str], List[str]] = {}
+        for code in valid_codes:
+            classification = self.code_classification_map[code]
+            key = (classification['major'], classification['middle'], classification['minor'])
+            groups.setdefault(key, []).append(code)
+        
+        logger.info(f"수가코드 {len(valid_codes)}개를 분류 경로 {len(groups)}개로 묶었습니다.")
+        
+        # 2. 브라우저 및 워커별 컨텍스트 설정
+        browser = await self.setup_browser()
+        contexts: List[BrowserContext] = []
+        
+        try:
+            pages: List[Page] = []
+            for _ in range(min(self.concurrency, len(groups))):
+                context, page = await self.create_worker_page(browser)
+                contexts.append(context)
+                pages.append(page)
+            
+            # 3. 분류 경로 그룹 작업 큐 구성
+            queue: asyncio.Queue = asyncio.Queue()
+            for group_codes in groups.values():
+                queue.put_nowait(group_codes)
+            
+            async def worker(worker_id: int, page: Page):
+                """큐에서 분류 경로 그룹을 꺼내 처리하는 워커 (접속에 실패하면 남은 워커에 큐를 맡기고 종료)"""
+                try:
+                    # HIRA 팝업 페이지 접속
+                    logger.info(f"[워커 {worker_id}] 웹사이트 접속: {self.popup_url}")
+                    await page.goto(self.popup_url, wait_until='domcontentloaded', timeout=15000)
+                    
+                    # 페이지 로딩 완료 대기 (networkidle은 keep-alive 요청 때문에 타임아웃까지 걸릴 수 있음)
+                    await page.wait_for_selector(self._classification_btn_sel, state='visible', timeout=15000)
+                except Exception as e:
+                    logger.error(f"[워커 {worker_id}] 페이지 준비 실패, 이 워커는 종료합니다: {e}")
+                    return
+                
+                while True:
+                    try:
+                        group_codes = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    
+                    results_queue.put_nowait(await self.search_and_download_group(page, group_codes))
+            
+            # 4. 워커 병렬 실행 (한 워커의 예외로 나머지가 실행 중에 정리되지 않도록 모두 끝날 때까지 대기)
+            logger.info(f"{len(pages)}개 워커로 병렬 처리 시작")
+            outcomes = await asyncio.gather(*(worker(i, p) for i, p in enumerate(pages, 1)), return_exceptions=True)
+            for worker_id, outcome in enumerate(outcomes, 1):
+                if isinstance(outcome, Exception):
+                    logger.error(f"[워커 {worker_id}] 처리 중 오류로 종료: {outcome}")
+            
+            # 모든 워커가 중단되어 남은 그룹은 실패로 기록
+            timestamp = datetime.now().isoformat()
+            while not queue.empty():
+                results_queue.put_nowait([
+                    {'code': code, 'success': False, 'error': "처리할 워커 없음", 'filename': None, 'timestamp': timestamp}
+                    for code in queue.get_nowait()
+                ])
+            
+        finally:
+            # 브라우저 정리
+            for context in contexts:
+                await context.close()
+            await browser.close()
 
 async def main():
     """메인 실행 함수"""
@@ -4,205 +4,243 @@ HIRA 요양기관 업무포털 색인분류 계층 구조 추출 크롤러
 """
 
 import asyncio
+import atexit
+import contextlib
 import logging
-import csv
+import logging.handlers
+import json
+import os
+import random
 import re
-from datetime import datetime
+from queue import SimpleQueue
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Locator
+from playwright.async_api import Page, Browser, BrowserContext, Locator
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hira_classification_mapper.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from hira_base import HIRAMapperBase
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax가 없으면 evaluate 스냅샷만 사용
+    LexborHTMLParser = None
+
+# 로깅 설정 (기본 WARNING, HIRA_LOGLEVEL 환경변수로 조정)
+# 파일/콘솔 출력은 별도 스레드의 QueueListener가 담당하여 이벤트 루프를 막지 않음
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler('hira_classification_mapper.log', encoding='utf-8'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue: SimpleQueue = SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # 최종 포맷은 리스너 측 핸들러가 적용
+logging.basicConfig(level=os.getenv('HIRA_LOGLEVEL', 'WARNING').upper(), handlers=[_queue_handler])
 logger = logging.getLogger(__name__)
 
-class HIRAClassificationMapper:
-    def __init__(self, output_dir: str = "./output"):
+# 분류 항목 텍스트에서 코드를 분리하는 정규식
+CODE_PURE_RE = re.compile(r'^[A-Z][0-9]*$')          # "A00000" (콜론 앞 코드)
+CODE_PAREN_RE = re.compile(r'\(([A-Z][0-9]*)\)$')    # "...(A)" (마지막 괄호 코드)
+CODE_LETTER_RE = re.compile(r'[A-Z](?![가-힣])')      # 단순 영문 코드
+CODE_WORD_RE = re.compile(r'\b([A-Z][0-9]*)\b')      # 단어 단위 영문+숫자 코드
+
+# 정적 HTML 파싱 시 숨김으로 간주할 인라인 스타일
+HIDDEN_STYLE_MARKERS = ('display: none', 'display:none', 'visibility: hidden', 'visibility:hidden')
+
+# 대분류 행 선택자로 항목을 찾지 못했을 때 순서대로 시도할 대체 선택자
+MAJOR_FALLBACK_SELECTORS = [
+    # 1순위: 실제 modal_div.html 구조 기반 - 그리드 행
+    'div[id*="RvStdInqIdxPL"] div[id*="gridrow"]',
+    'div[id*="grdIdxDiv1_body"] div[id*="gridrow"]',
+    
+    # 2순위: 분류 항목 셀 구조
+    'div[id*="grdIdxDiv1_body"] div[id*="cell"]',
+    'div[style*="cursor: pointer"][id*="cell"]',
+    
+    # 3순위: 텍스트 컨테이너
+    'div[id*="GridCellTextContainerElement"]',
+    'div[style*="table-cell"]',
+    
+    # 4순위: 백업 선택자
+    'div[tabindex]',
+    'div[style*="cursor: pointer"]'
+]
+
+# 결과 CSV 컬럼
+CSV_FIELDNAMES = ['대분류코드', '대분류명', '중분류코드', '중분류명', '소분류코드', '소분류명', '자동입력코드']
+
+# 입력 필드에 클릭 전과 다른 값이 자동 입력되었는지 확인 (인자: [선택자, 클릭 전 값])
+AUTO_INPUT_CHANGED_JS = "([sel, prev]) => { const el = document.querySelector(sel); const v = el ? el.value.trim() : ''; return !!v && v !== prev; }"
+
+# 그리드 행을 한 번의 evaluate로 읽어오는 스크립트 (인자: [선택자, 최대 개수, 하위 텍스트 포함 여부])
+# 보이는 요소만 {i: 선택자 내 인덱스, id, cls, text[, children]} 형태로 반환한다
+GRID_SNAPSHOT_JS = """
+([sel, limit, withChildren]) => {
+    const out = [];
+    const els = document.querySelectorAll(sel);
+    for (let i = 0; i < els.length && i < limit; i++) {
+        const e = els[i];
+        if (e.offsetParent === null || e.getClientRects().length === 0) continue;
+        const record = {
+            i: i,
+            id: e.id || '',
+            cls: e.getAttribute('class') || '',
+            text: (e.textContent || '').trim()
+        };
+        if (withChildren) {
+            record.children = Array.from(e.querySelectorAll('div, span'))
+                .map(c => (c.textContent || '').trim())
+                .filter(t => t && t !== record.text);
+        }
+        out.push(record);
+    }
+    return out;
+}
+"""
+
+# 클릭 가능한 요소 중 키워드를 포함한 버튼 후보를 한 번에 찾는 스크립트
+# (인자: [선택자 목록, 키워드 목록], 선택자별 앞쪽 20개만 검사하고 최대 10개 후보 반환)
+CLICKABLE_CANDIDATES_JS = """
+([selectors, keywords]) => {
+    const out = [];
+    for (const selector of selectors) {
+        const els = document.querySelectorAll(selector);
+        for (let i = 0; i < els.length && i < 20; i++) {
+            const e = els[i];
+            if (e.offsetParent === null) continue;
+            const text = (e.textContent || '').trim();
+            if (!text || !keywords.some(k => text.includes(k))) continue;
+            out.push({selector: selector, index: i, text: text.slice(0, 50), html: e.innerHTML.slice(0, 100)});
+            if (out.length >= 10) return out;
+        }
+    }
+    return out;
+}
+"""
+
+def parse_code_name(text: str) -> Tuple[str, str]:
+    """
+    분류 항목 텍스트를 (코드, 명칭)으로 분리한다
+    
+    정규식은 꼭 필요한 경우에만 쓰고 구분자 확인은 str 메서드로 처리한다.
+    """
+    # 패턴 1: "A00000: 산정방법 및 일반원칙" 형태
+    if ':' in text:
+        potential_code, _, potential_name = text.partition(':')
+        potential_code = potential_code.strip()
+        # 코드가 영문+숫자 패턴인지 확인
+        if CODE_PURE_RE.match(potential_code):
+            return potential_code, potential_name.strip()
+        return "", text
+    
+    # 패턴 2: "요양급여비용산정기준(행위)(A)" 형태
+    if '(' in text and ')' in text:
+        # 마지막 괄호에서 코드 추출 (텍스트가 ')'로 끝날 때만 가능)
+        last_paren_match = CODE_PAREN_RE.search(text) if text.endswith(')') else None
+        if last_paren_match:
+            return last_paren_match.group(1), text[:last_paren_match.start()].strip()
+        # 괄호 안의 내용도 명칭에 포함하고 단순 영문 코드 찾기
+        simple_code_match = CODE_LETTER_RE.search(text)
+        return (simple_code_match.group(0) if simple_code_match else ""), text
+    
+    # 패턴 3: 단순 텍스트에서 영문+숫자 조합 찾기 (A, A01, A00000 등)
+    code_match = CODE_WORD_RE.search(text)
+    if not code_match:
+        return "", text
+    
+    # 코드를 제외한 나머지를 명칭으로
+    name = CODE_WORD_RE.sub('', text).strip()
+    return code_match.group(1), name or text
+
+
+def is_grid_response(response) -> bool:
+    """분류 그리드 데이터를 내려주는 HIRA 서버 XHR/fetch 응답인지 확인한다"""
+    return 'biz.hira.or.kr' in response.url and response.request.resource_type in ('xhr', 'fetch')
+
+
+class HIRAClassificationMapper(HIRAMapperBase):
+    csv_fieldnames = CSV_FIELDNAMES
+    csv_prefix = "hira_classification_map"
+    
+    def __init__(self, output_dir: str = "./output", concurrency: int = 4, headless: bool = True,
+                 resume: bool = True, rate_limit: float = 5.0):
         """
         색인분류 계층 구조 추출 크롤러 초기화
         
         Args:
             output_dir: 출력 파일 저장 디렉토리
+            concurrency: 대분류를 동시에 순회할 브라우저 컨텍스트 수
+            headless: 헤드리스 모드 여부 (HIRA_DEBUG=1 환경변수가 있으면 화면 표시)
+            resume: 체크포인트에 기록된 완료 중분류를 건너뛸지 여부
+            rate_limit: 모든 워커를 합친 초당 최대 클릭 수
         """
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
+        super().__init__(output_dir, concurrency, headless and os.environ.get('HIRA_DEBUG') != '1', rate_limit)
         
-        # HIRA 웹사이트 URL
-        self.main_url = "https://biz.hira.or.kr/index.do"
-        self.popup_url = "https://biz.hira.or.kr/popup.ndo?formname=qya_bizcom%3A%3AInfoBank.xfdl&framename=InfoBank"
-        
-        # CSS 선택자
-        self.selectors = {
+        # 계층 순회용 CSS 선택자
+        self.selectors.update({
             'classification_search_btn': 'text=색인분류검색',
-            'search_input': '#InfoBank_form_divMain_divWork1_edtSearchTxt_input',
-            'modal_close_btn': 'text=닫기'
-        }
-        
-        # 분류 데이터 저장
-        self.classification_data: List[Dict] = []
+            'modal_close_btn': 'text=닫기',
+            'major_rows': '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv1_body div[id*="gridrow"]',
+            'middle_rows': '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv2_body div[id*="gridrow"]',
+            'minor_rows': '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv3_body div[id*="gridrow"]'
+        })
         
-        # Nexacro 세션 유지용 메인 페이지 참조
-        self.main_page: Optional[Page] = None
+        # 수집 통계용 (대분류 코드, (대분류, 중분류) 키)
+        self._major_codes = set()
+        self._middle_keys = set()
         
-    async def setup_browser(self) -> tuple[Browser, BrowserContext]:
-        """브라우저 설정 및 컨텍스트 생성"""
-        playwright = await async_playwright().start()
+        # 완료된 (대분류, 중분류) 체크포인트 - 중단 후 재실행 시 이미 끝난 분기는 건너뛰고 같은 CSV에 이어 씀
+        self.checkpoint_path = self.output_dir / 'checkpoint.json'
+        self._resume_csv: Optional[Path] = None
+        self._done: set = self._load_checkpoint() if resume else set()
         
-        browser = await playwright.chromium.launch(
-            headless=False,
-            slow_mo=1000,  # 동작 간 1초 대기
-            args=['--disable-web-security', '--disable-features=VizDisplayCompositor']
-        )
+        # 처리에 실패한 중분류/대분류 수 (0이면 완주로 보고 체크포인트 삭제)
+        self._failed_branches = 0
         
-        context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080}
-        )
+    def _load_checkpoint(self) -> set:
+        """체크포인트 파일에서 완료된 (대분류, 중분류) 키와 이어 쓸 CSV를 읽는다"""
+        if not self.checkpoint_path.exists():
+            return set()
         
-        return browser, context
-        
-    async def debug_modal_elements(self, page: Page, modal_title: str = ""):
-        """모달 내부 요소들을 디버깅용으로 출력"""
         try:
-            logger.info(f"=== {modal_title} 모달 요소 분석 시작 ===")
-            
-            # 모달 내 모든 클릭 가능한 요소 찾기
-            modal_elements = await page.locator('div, span, td, li, a, button').all()
-            
-            tree_elements = []
-            for i, element in enumerate(modal_elements[:50]):  # 처음 50개만 분석
-                try:
-                    text = await element.text_content()
-                    if text and text.strip() and len(text.strip()) < 100:  # 너무 긴 텍스트 제외
-                        tag_name = await element.evaluate('el => el.tagName')
-                        classes = await element.get_attribute('class') or ''
-                        
-                        # 트리 구조나 리스트 요소로 보이는 것들 필터링
-                        tree_keywords = ['tree', 'node', 'list', 'item', 'row', 'cell']
-                        if any(keyword in classes.lower() for keyword in tree_keywords) or \
-                           tag_name.lower() in ['li', 'td', 'span']:
-                            tree_elements.append({
-                                'index': i,
-                                'tag': tag_name,
-                                'text': text.strip()[:50],
-                                'class': classes[:50]
-                            })
-                            
-                except Exception as e:
-                    continue
-            
-            logger.info(f"트리 구조 후보 요소 {len(tree_elements)}개 발견")
-            for elem in tree_elements[:20]:  # 상위 20개만 출력
-                logger.info(f"[{elem['index']}] {elem['tag']} - '{elem['text']}' (class: {elem['class']})")
-                
-            logger.info(f"=== {modal_title} 모달 요소 분석 완료 ===")
-            
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            
+            # 체크포인트가 가리키는 CSV가 없으면 완료 목록도 의미가 없으므로 처음부터 진행
+            resume_csv = self.output_dir / checkpoint['csv']
+            if not resume_csv.exists():
+                logger.warning(f"체크포인트의 CSV가 없어 처음부터 진행: {resume_csv}")
+                return set()
+            
+            done = {tuple(key) for key in checkpoint['done']}
+            self._resume_csv = resume_csv
+            logger.info(f"체크포인트 로드: 완료된 중분류 {len(done)}개는 건너뜁니다 ({self.checkpoint_path})")
+            return done
         except Exception as e:
-            logger.error(f"모달 요소 분석 실패: {e}")
+            logger.warning(f"체크포인트 로드 실패, 처음부터 진행: {e}")
+            return set()
     
-    async def open_main_page(self, context: BrowserContext) -> Page:
-        """메인 페이지를 열고 Nexacro 세션을 확보한다"""
-        try:
-            if self.main_page is None or self.main_page.is_closed():
-                logger.info(f"메인 페이지 접속: {self.main_url}")
-                self.main_page = await context.new_page()
-                await self.main_page.goto(self.main_url, wait_until='networkidle', timeout=30000)
-                
-                # Nexacro 애플리케이션 로딩 대기
-                logger.info("Nexacro 메인 애플리케이션 로딩 대기...")
-                await asyncio.sleep(10)
-                
-                logger.info("메인 페이지 로딩 완료 - 세션 확보")
-            
-            return self.main_page
-            
-        except Exception as e:
-            logger.error(f"메인 페이지 열기 실패: {e}")
-            raise
+    def _save_checkpoint(self):
+        """완료된 (대분류, 중분류) 키와 기록 중인 CSV 이름을 임시 파일에 쓴 뒤 교체하여 원자적으로 저장한다"""
+        tmp_path = self.checkpoint_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'csv': self.csv_path.name, 'done': sorted(self._done)}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
     
-    async def open_popup_page(self, context: BrowserContext) -> Page:
-        """메인 페이지에서 팝업을 열거나 직접 팝업 페이지에 접속한다"""
+    def _clear_checkpoint(self):
+        """모든 분기를 끝낸 실행의 체크포인트를 지운다 (다음 실행은 새 CSV로 처음부터 수집)"""
         try:
-            # 방법 1: 메인 페이지에서 팝업 링크 찾기
-            main_page = await self.open_main_page(context)
-            
-            # 심사기준 종합서비스 또는 InfoBank 메뉴 찾기
-            menu_selectors = [
-                "text=심사기준 종합서비스",
-                "text=InfoBank",
-                "a[href*='InfoBank']",
-                "[onclick*='InfoBank']",
-                "text=수가코드",
-                "text=요양급여"
-            ]
-            
-            popup_page = None
-            for selector in menu_selectors:
-                try:
-                    menu_link = main_page.locator(selector).first
-                    if await menu_link.is_visible():
-                        logger.info(f"메뉴 링크 발견: {selector}")
-                        
-                        # 팝업이 열릴 것을 기대
-                        async with context.expect_page() as popup_info:
-                            await menu_link.click()
-                            
-                        popup_page = await popup_info.value
-                        await popup_page.wait_for_load_state('networkidle', timeout=30000)
-                        logger.info("메뉴에서 팝업 열기 성공")
-                        break
-                        
-                except Exception as e:
-                    logger.debug(f"메뉴 선택자 {selector} 시도 실패: {e}")
-                    continue
-            
-            # 방법 2: 직접 팝업 URL 접속 (메인 페이지 referer 설정)
-            if popup_page is None:
-                logger.info("메뉴에서 팝업 열기 실패, 직접 팝업 URL로 접속")
-                popup_page = await context.new_page()
-                
-                # referer를 메인 페이지로 설정하여 팝업 URL 접속
-                await popup_page.goto(
-                    self.popup_url, 
-                    wait_until='networkidle', 
-                    timeout=30000,
-                    referer=self.main_url
-                )
-            
-            # 팝업 페이지 로딩 대기
-            logger.info("Nexacro 팝업 애플리케이션 로딩 대기...")
-            await asyncio.sleep(10)
-            
-            # 기본 검색 입력창이 나타날 때까지 대기하여 팝업 로딩 확인
-            try:
-                search_input = popup_page.locator(self.selectors['search_input'])
-                await search_input.wait_for(state='visible', timeout=20000)
-                logger.info("팝업 페이지 로딩 완료")
-            except:
-                logger.warning("기본 검색 입력창을 찾을 수 없음. 계속 진행...")
-            
-            await asyncio.sleep(3)
-            return popup_page
-            
+            self.checkpoint_path.unlink(missing_ok=True)
+            logger.info(f"전체 순회 완료로 체크포인트 삭제: {self.checkpoint_path}")
         except Exception as e:
-            logger.error(f"팝업 페이지 열기 실패: {e}")
-            raise
-    
-    async def ensure_popup_page(self, context: BrowserContext, popup_page: Optional[Page] = None) -> Page:
-        """팝업 페이지가 닫혔는지 확인하거나 새로 열기"""
-        if popup_page is not None and not popup_page.is_closed():
-            return popup_page
-            
-        if popup_page is not None and popup_page.is_closed():
-            logger.warning("팝업 페이지가 닫혔습니다. 재접속을 시도합니다.")
-            
-        return await self.open_popup_page(context)
+            logger.warning(f"체크포인트 삭제 실패: {e}")
     
     async def analyze_clickable_elements(self, page: Page):
         """페이지의 모든 클릭 가능한 요소를 분석하여 색인분류 버튼 후보를 찾는다"""
@@ -220,43 +258,15 @@ class HIRAClassificationMapper:
                 'span[onclick]'
             ]
             
-            candidates = []
-            
-            for selector in clickable_selectors:
-                try:
-                    elements = page.locator(selector)
-                    count = await elements.count()
-                    
-                    for i in range(min(count, 20)):  # 최대 20개까지만 분석
-                        try:
-                            element = elements.nth(i)
-                            
-                            if not await element.is_visible():
-                                continue
-                            
-                            # 요소의 텍스트 내용 확인
-                            text = await element.text_content()
-                            inner_html = await element.inner_html()
-                            
-                            # 색인분류 관련 키워드가 있는지 확인
-                            if text and any(keyword in text for keyword in ['색인', '분류', '검색']):
-                                candidates.append({
-                                    'selector': selector,
-                                    'index': i,
-                                    'text': text.strip()[:50] if text else '',
-                                    'html': inner_html[:100] if inner_html else ''
-                                })
-                            
-                        except Exception as e:
-                            continue
-                            
-                except Exception as e:
-                    continue
+            # 가시성/키워드 필터링과 HTML 자르기까지 브라우저에서 한 번에 처리
+            candidates = await page.evaluate(
+                CLICKABLE_CANDIDATES_JS, [clickable_selectors, ['색인', '분류', '검색']]
+            )
             
             # 후보 요소들을 로그로 출력
             if candidates:
                 logger.info(f"색인분류 버튼 후보 {len(candidates)}개 발견:")
-                for i, candidate in enumerate(candidates[:10]):  # 상위 10개만 출력
+                for i, candidate in enumerate(candidates):
                     logger.info(f"  [{i+1}] {candidate['selector']}[{candidate['index']}]: '{candidate['text']}'")
             else:
                 logger.warning("색인분류 관련 텍스트를 포함한 클릭 가능한 요소를 찾을 수 없습니다.")
@@ -292,243 +302,60 @@ class HIRAClassificationMapper:
             logger.error(f"모달 확인 중 오류: {e}")
             return False
     
-    async def open_classification_modal(self, page: Page) -> bool:
-        """색인분류검색 모달을 연다"""
-        try:
-            logger.info("색인분류검색 모달 열기 시도...")
-            
-            # 모달이 이미 열려있는지 확인 (modal_div.html에서 발견된 구조)
-            modal_check_selectors = [
-                '#InfoBank_RvStdInqIdxPL',  # 실제 modal_div.html에서 발견된 모달 ID
-                'div[id*="RvStdInqIdxPL"]',
-                'div[style*="z-index: 1000002"]'  # 모달의 z-index 값
-            ]
-            
-            for modal_sel in modal_check_selectors:
-                if await page.locator(modal_sel).count() > 0:
-                    logger.info("색인분류검색 모달이 이미 열려있습니다.")
-                    return True
-            
-            # DOM이 완전히 로드될 때까지 대기 (동적 생성 요소 대응)
-            logger.info("DOM 완전 로딩 대기 중... (3초)")
-            await asyncio.sleep(3)
-            
-            # 네트워크 유휴 상태까지 추가 대기
-            await page.wait_for_load_state('networkidle', timeout=10000)
-            
-            # 정확한 버튼 구조 기반 탐지 (사용자 제공 정보)
-            logger.info("정확한 색인분류검색 버튼 구조로 탐지 시작...")
-            
-            # 1순위: 정확한 ID로 탐지
-            exact_button_id = '#InfoBank_form_divMain_divWork1_btnIdxDiv'
-            logger.info(f"[1단계] 정확한 ID로 탐지 시도: {exact_button_id}")
-            
-            btn_element = page.locator(exact_button_id)
-            if await btn_element.count() > 0:
-                logger.info("정확한 ID로 색인분류검색 버튼 발견!")
-                if await btn_element.is_visible():
-                    await btn_element.click()
-                    logger.info("색인분류검색 버튼 클릭 성공 (ID 방식)")
-                    await asyncio.sleep(3)
-                    return await self.verify_modal_opened(page)
-                else:
-                    logger.warning("버튼이 존재하지만 비가시 상태입니다.")
-            
-            # 2순위: 텍스트 내용으로 정확히 탐지 (JavaScript evaluate 사용)
-            logger.info("[2단계] 텍스트 내용 기반 정확 탐지 시도...")
-            
-            # JavaScript를 사용해 정확한 텍스트로 요소 찾기
-            btn_by_text = await page.evaluate("""
-                () => {
-                    // 모든 div 요소를 순회하며 정확히 "색인분류검색" 텍스트를 포함한 요소 찾기
-                    const allDivs = Array.from(document.querySelectorAll('div'));
-                    for (let div of allDivs) {
-                        const text = div.textContent?.trim();
-                        if (text === '색인분류검색') {
-                            return {
-                                id: div.id,
-                                className: div.className,
-                                tagName: div.tagName,
-                                text: text,
-                                found: true
-                            };
-                        }
-                    }
-                    return { found: false };
-                }
-            """)
-            
-            if btn_by_text.get('found'):
-                logger.info(f"텍스트 기반으로 버튼 발견: ID={btn_by_text.get('id')}, Class={btn_by_text.get('className')}")
-                
-                # 발견된 요소를 클릭
-                text_selector = f"div:has-text('색인분류검색')"
-                text_element = page.locator(text_selector).first
-                
-                if await text_element.count() > 0 and await text_element.is_visible():
-                    await text_element.click()
-                    logger.info("색인분류검색 버튼 클릭 성공 (텍스트 방식)")
-                    await asyncio.sleep(3)
-                    return await self.verify_modal_opened(page)
-            
-            # 3순위: 확장된 선택자로 재시도
-            logger.info("[3단계] 확장 선택자로 재시도...")
-            extended_selectors = [
-                # ID 부분 매칭
-                '[id*="InfoBank_form_divMain_divWork1_btnIdx"]',
-                '[id*="btnIdxDiv"]',
-                '[id*="divWork1_btn"]',
-                
-                # 정확한 텍스트 매칭
-                'div >> text="색인분류검색"',
-                '*:has-text("색인분류검색")',
-                
-                # 부모-자식 관계 활용
-                '#InfoBank_form_divMain_divWork1 div:has-text("색인분류검색")',
-                '[id*="divMain"] [id*="btnIdx"]',
-                
-                # Nexacro 패턴
-                'div[id*="InfoBank_form"][id*="btn"]:has-text("색인분류")'
-            ]
-            
-            for i, selector in enumerate(extended_selectors):
-                try:
-                    logger.info(f"[{i+1}/{len(extended_selectors)}] 확장 선택자 시도: {selector}")
-                    
-                    elements = page.locator(selector)
-                    count = await elements.count()
-                    
-                    if count == 0:
-                        logger.debug(f"선택자 '{selector}': 요소 없음")
-                        continue
-                    
-                    # 여러 요소가 있다면 각각 시도
-                    for j in range(min(count, 3)):  # 최대 3개까지만 시도
-                        try:
-                            btn = elements.nth(j)
-                            
-                            if not await btn.is_visible():
-                                logger.debug(f"선택자 '{selector}' 요소 {j}: 비가시")
-                                continue
-                            
-                            await btn.wait_for(state='enabled', timeout=3000)
-                            await btn.click()
-                            
-                            logger.info(f"색인분류검색 버튼 클릭 성공: {selector}[{j}]")
-                            await asyncio.sleep(3)  # 모달 로딩 대기
-                            
-                            # 모달이 열렸는지 확인
-                            if await self.verify_modal_opened(page):
-                                return True
-                            
-                        except Exception as e:
-                            logger.debug(f"선택자 {selector}[{j}] 클릭 실패: {e}")
-                            continue
-                    
-                except Exception as e:
-                    logger.debug(f"선택자 {selector} 시도 실패: {e}")
-                    continue
-            
-            # 최종 디버깅: 모든 시도가 실패한 경우 상세 정보 로깅
-            logger.error("모든 방법으로 색인분류검색 버튼을 찾을 수 없습니다.")
-            
-            # 현재 페이지 상태 점검
-            await page.evaluate("""
-                () => {
-                    console.log('=== 페이지 상태 점검 ===');
-                    console.log('정확한 ID 요소:', document.querySelector('#InfoBank_form_divMain_divWork1_btnIdxDiv'));
-                    console.log('색인분류검색 텍스트 요소:', Array.from(document.querySelectorAll('div')).find(el => el.textContent?.trim() === '색인분류검색'));
-                    console.log('모든 버튼형 요소 수:', document.querySelectorAll('div[id*="btn"], button, input[type="button"]').length);
-                }
-            """)
-            
-            logger.error("상세 디버깅 정보가 브라우저 콘솔에 출력되었습니다.")
-            return False
-            
-        except Exception as e:
-            logger.error(f"색인분류검색 모달 열기 실패: {e}")
-            return False
-    
-    async def extract_tree_items(self, page: Page, level_name: str) -> List[Dict]:
+    async def extract_tree_items(self, page: Page, level_name: str, row_selector: str, read_only: bool = False) -> List[Dict]:
         """
         트리에서 특정 레벨의 항목들을 추출한다 (실제 HIRA 화면 구조 기반)
         
         Args:
             page: Playwright 페이지
             level_name: 레벨명 (대분류, 중분류, 소분류)
+            row_selector: 해당 레벨 그리드의 행 선택자 (grdIdxDiv1/2/3)
+            read_only: 텍스트/ID만 필요한 경우 모달 HTML을 로컬에서 파싱 (selectolax 설치 시)
             
         Returns:
-            추출된 항목 리스트 [{'text': '항목명', 'code': '코드', 'name': '명칭', 'element': Locator}]
+            추출된 항목 리스트 [{'text': '항목명', 'code': '코드', 'name': '명칭', 'id': '요소 ID', ...}]
         """
         try:
-            logger.info(f"{level_name} 항목 추출 시작...")
-            
-            # 모달이 열린 상태에서 분류 그리드 요소들을 찾기
-            tree_selectors = [
-                # 1순위: 실제 modal_div.html 구조 기반 - 그리드 행
-                '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv1_body div[id*="gridrow"]:visible',
-                'div[id*="RvStdInqIdxPL"] div[id*="gridrow"]:visible',
-                'div[id*="grdIdxDiv1_body"] div[id*="gridrow"]:visible',
-                
-                # 2순위: 분류 항목 셀 구조
-                'div[id*="grdIdxDiv1_body"] div[id*="cell"]:visible',
-                'div[style*="cursor: pointer"][id*="cell"]:visible',
-                
-                # 3순위: 텍스트 컨테이너
-                'div[id*="GridCellTextContainerElement"]:visible',
-                'div[style*="table-cell"]:visible',
-                
-                # 4순위: 백업 선택자
-                'div[tabindex]:visible',
-                'div[style*="cursor: pointer"]:visible'
-            ]
+            logger.debug(f"{level_name} 항목 추출 시작...")
+            
+            # 모달이 열린 상태에서 해당 레벨 그리드의 행을 찾기 (가시성은 스냅샷 스크립트에서 확인)
+            # 대체 후보들은 대분류 그리드 기준이므로 다른 레벨에서는 레벨 행 선택자만 사용
+            tree_selectors = [row_selector]
+            if level_name == "대분류":
+                tree_selectors += MAJOR_FALLBACK_SELECTORS
             
             items = []
             
             for selector in tree_selectors:
                 try:
-                    elements = page.locator(selector)
-                    count = await elements.count()
+                    # 앞쪽 30개 요소 중 보이는 요소를 한 번에 스냅샷
+                    records = await self._snapshot_grid(page, selector, read_only=read_only)
                     
-                    if count == 0:
+                    if not records:
                         continue
                         
-                    logger.info(f"선택자 '{selector}'로 {count}개 요소 발견")
+                    logger.debug(f"선택자 '{selector}'로 {len(records)}개 요소 발견")
                     
                     # 각 요소에서 텍스트 추출 및 분류 (실제 화면 구조 분석)
-                    for i in range(min(count, 30)):  # 더 많은 요소 확인
+                    for record in records:
                         try:
-                            element = elements.nth(i)
-                            
-                            if not await element.is_visible():
-                                continue
+                            i = record['i']
                             
                             # 요소의 속성과 구조 분석
-                            element_id = await element.get_attribute('id') or ''
-                            element_class = await element.get_attribute('class') or ''
+                            element_id = record['id']
+                            element_class = record['cls']
                             
-                            text = await element.text_content()
-                            if not text or not text.strip():
+                            text = record['text']
+                            if not text:
                                 continue
-                                
-                            text = text.strip()
                             
-                            # 그리드 셀 내부 구조 분석 시도
-                            inner_elements = await element.locator('div, span').all()
-                            if len(inner_elements) > 0:
-                                # 셀 내부에 하위 요소가 있다면 각각 분석
-                                for inner_elem in inner_elements:
-                                    try:
-                                        inner_text = await inner_elem.text_content()
-                                        if inner_text and inner_text.strip() and inner_text.strip() != text:
-                                            # 하위 요소의 텍스트가 더 구체적일 수 있음
-                                            logger.debug(f"하위 요소 텍스트 발견: '{inner_text.strip()}'")
-                                    except:
-                                        continue
+                            # 셀 내부 하위 요소의 텍스트가 더 구체적일 수 있음 (DEBUG 레벨에서만 수집됨)
+                            for inner_text in record.get('children', []):
+                                logger.debug(f"하위 요소 텍스트 발견: '{inner_text}'")
                             
                             # 모든 텍스트 요소 분석 (첫 15개만 로그 출력)
                             if i < 15:
-                                logger.info(f"요소 분석 [{i}]: '{text}' (ID: {element_id[:50]}, Class: {element_class[:50]})")
+                                logger.debug(f"요소 분석 [{i}]: '{text}' (ID: {element_id[:50]}, Class: {element_class[:50]})")
                             
                             # 매우 관대한 필터링 - 거의 모든 텍스트 허용
                             skip_patterns = ['undefined', 'null']
@@ -543,51 +370,13 @@ class HIRAClassificationMapper:
                                 continue
                                 
                             # HIRA 화면 구조에 맞는 코드와 명칭 분리
-                            code = ""
-                            name = text
-                            
-                            # 패턴 1: "A00000: 산정방법 및 일반원칙" 형태
-                            if ':' in text:
-                                parts = text.split(':', 1)
-                                if len(parts) == 2:
-                                    potential_code = parts[0].strip()
-                                    potential_name = parts[1].strip()
-                                    # 코드가 영문+숫자 패턴인지 확인
-                                    if re.match(r'^[A-Z][0-9]*$', potential_code):
-                                        code = potential_code
-                                        name = potential_name
-                            
-                            # 패턴 2: "요양급여비용산정기준(행위)(A)" 형태
-                            elif '(' in text and ')' in text:
-                                # 마지막 괄호에서 코드 추출
-                                last_paren_match = re.search(r'\(([A-Z][0-9]*)\)$', text)
-                                if last_paren_match:
-                                    code = last_paren_match.group(1)
-                                    name = text[:last_paren_match.start()].strip()
-                                else:
-                                    # 괄호 안의 내용도 명칭에 포함
-                                    name = text
-                                    # 단순 영문 코드 찾기
-                                    simple_code_match = re.search(r'[A-Z](?![가-힣])', text)
-                                    if simple_code_match:
-                                        code = simple_code_match.group(0)
-                            
-                            # 패턴 3: 단순 텍스트에서 코드 찾기
-                            else:
-                                # 영문+숫자 조합 찾기 (A, A01, A00000 등)
-                                code_match = re.search(r'\b([A-Z][0-9]*)\b', text)
-                                if code_match:
-                                    code = code_match.group(1)
-                                    # 코드를 제외한 나머지를 명칭으로
-                                    name = re.sub(r'\b[A-Z][0-9]*\b', '', text).strip()
-                                    if not name:
-                                        name = text
+                            code, name = parse_code_name(text)
                             
                             items.append({
                                 'text': text,
                                 'code': code,
                                 'name': name,
-                                'element': element,
+                                'id': element_id,
                                 'selector_used': selector,
                                 'index': i
                             })
@@ -595,20 +384,15 @@ class HIRAClassificationMapper:
                             logger.debug(f"유효한 항목 추가: '{text}' (코드: {code}, 명칭: {name})")
                             
                             # 첫 번째 항목에 대해서는 더 상세한 디버깅 정보 출력
-                            if len(items) == 0:
-                                logger.info(f"첫 번째 {level_name} 항목 상세 분석:")
-                                logger.info(f"  - 전체 텍스트: '{text}'")
-                                logger.info(f"  - 추출된 코드: '{code}'")
-                                logger.info(f"  - 추출된 명칭: '{name}'")
-                                logger.info(f"  - 요소 ID: {element_id}")
-                                logger.info(f"  - 요소 Class: {element_class}")
+                            if len(items) == 1 and logger.isEnabledFor(logging.DEBUG):
+                                logger.debug(f"첫 번째 {level_name} 항목 상세 분석: 텍스트={text!r} 코드={code!r} 명칭={name!r} ID={element_id!r} Class={element_class!r}")
                             
                         except Exception as e:
                             logger.debug(f"요소 {i} 처리 실패: {e}")
                             continue
                     
                     if items:
-                        logger.info(f"{level_name}에서 {len(items)}개 항목 추출 완료 (선택자: {selector})")
+                        logger.debug(f"{level_name}에서 {len(items)}개 항목 추출 완료 (선택자: {selector})")
                         break
                         
                 except Exception as e:
@@ -616,233 +400,328 @@ class HIRAClassificationMapper:
                     continue
             
             # 중복 제거 (텍스트 기준)
-            unique_items = []
-            seen_texts = set()
+            unique_items = list({item['text']: item for item in items}.values())
             
-            for item in items:
-                if item['text'] not in seen_texts:
-                    seen_texts.add(item['text'])
-                    unique_items.append(item)
-            
-            logger.info(f"{level_name} 최종 {len(unique_items)}개 고유 항목 추출")
+            logger.debug(f"{level_name} 최종 {len(unique_items)}개 고유 항목 추출")
             return unique_items
             
         except Exception as e:
             logger.error(f"{level_name} 항목 추출 실패: {e}")
             return []
     
-    async def get_input_field_value(self, page: Page) -> str:
-        """검색 입력 필드에서 자동 입력된 값을 가져온다"""
+    def _item_locator(self, page: Page, item: Dict) -> Locator:
+        """클릭할 항목의 Locator를 만든다 (ID 우선, 없으면 선택자 내 인덱스)"""
+        if item['id']:
+            return page.locator(f'[id="{item["id"]}"]')
+        return page.locator(item['selector_used']).nth(item['index'])
+    
+    async def _click_and_wait_grid(self, page: Page, element: Locator, label: str) -> bool:
+        """
+        항목을 클릭하고 하위 그리드를 채우는 HIRA 서버 XHR 응답을 기다린다
+        
+        Returns:
+            응답 수신 여부 (시간 초과 시 False, 이후 그리드 행 대기로 보완)
+        """
         try:
-            search_input = page.locator(self.selectors['search_input'])
-            if await search_input.is_visible():
-                value = await search_input.input_value()
-                return value.strip() if value else ""
-        except Exception as e:
-            logger.debug(f"입력 필드 값 가져오기 실패: {e}")
-        return ""
+            async with page.expect_response(is_grid_response, timeout=10000) as response_info:
+                await self._click_with_fallback(element, label)
+            response = await response_info.value
+            logger.debug(f"{label} 그리드 응답 수신: {response.url}")
+            return True
+        except PlaywrightTimeoutError:
+            logger.debug(f"{label} 그리드 응답 대기 시간 초과")
+            return False
     
-    async def traverse_classification_tree(self, context: BrowserContext, page: Page):
-        """색인분류 트리를 완전히 순회하며 모든 계층 구조를 추출한다"""
+    async def _read_auto_input_code(self, page: Page, prev_code: str) -> str:
+        """
+        소분류 클릭 후 입력 필드 값이 클릭 전 값에서 바뀌기를 기다렸다가 그 값을 가져온다
+        
+        이전 소분류의 코드가 남아 있는 동안에는 기다리므로 그 코드를 현재 행에 잘못 기록하지 않는다.
+        """
+        try:
+            await page.wait_for_function(
+                AUTO_INPUT_CHANGED_JS,
+                arg=[self.selectors['search_input'], prev_code],
+                timeout=3000
+            )
+        except PlaywrightTimeoutError:
+            logger.debug("입력 필드 자동 입력 대기 시간 초과")
+        
+        return await self.get_input_field_value(page)
+    
+    async def _snapshot_grid(self, page: Page, selector: str, limit: int = 30, read_only: bool = False) -> List[Dict]:
+        """선택자에 해당하는 보이는 요소들의 id/class/텍스트를 한 번의 왕복으로 가져온다"""
+        # 셀 하위 요소 텍스트는 디버그 로그용이므로 DEBUG 레벨일 때만 수집
+        with_children = logger.isEnabledFor(logging.DEBUG)
+        
+        if read_only and LexborHTMLParser is not None:
+            html = await page.inner_html(self.selectors['modal'])
+            return self._parse_grid_html(html, selector, limit, with_children)
+        
+        return await page.evaluate(GRID_SNAPSHOT_JS, [selector, limit, with_children])
+    
+    def _parse_grid_html(self, html: str, selector: str, limit: int, with_children: bool) -> List[Dict]:
+        """모달 HTML을 selectolax로 파싱해 GRID_SNAPSHOT_JS와 같은 형태의 레코드를 만든다"""
+        records = []
+        
+        # 레이아웃 정보가 없으므로 인라인 스타일로 숨김 여부를 판단
+        for i, node in enumerate(LexborHTMLParser(html).css(selector)[:limit]):
+            style = node.attributes.get('style') or ''
+            if any(marker in style for marker in HIDDEN_STYLE_MARKERS):
+                continue
+            
+            text = node.text(deep=True).strip()
+            record = {
+                'i': i,
+                'id': node.attributes.get('id') or '',
+                'cls': node.attributes.get('class') or '',
+                'text': text
+            }
+            if with_children:
+                child_texts = (child.text(deep=True).strip() for child in node.css('div, span'))
+                record['children'] = [t for t in child_texts if t and t != text]
+            records.append(record)
+        
+        return records
+    
+    async def open_worker_page(self, browser: Browser) -> Tuple[BrowserContext, Page]:
+        """새 컨텍스트에서 세션 확보 후 팝업을 열고 색인분류검색 모달까지 연다"""
+        context = await self.create_context(browser)
+        await self.open_main_page(context)
+        page = await self.open_popup_page(context)
+        
+        if not await self.open_classification_modal(page):
+            raise RuntimeError("워커 페이지에서 색인분류검색 모달 열기 실패")
+        
+        return context, page
+    
+    async def traverse_classification_tree(self, browser: Browser, context: BrowserContext, page: Page) -> bool:
+        """
+        색인분류 트리를 완전히 순회하며 모든 계층 구조를 추출한다 (대분류 단위로 병렬 처리)
+        
+        Returns:
+            실패한 분기 없이 끝까지 순회했는지 여부
+        """
+        worker_contexts: List[BrowserContext] = []
+        
         try:
             logger.info("색인분류 트리 순회 시작...")
             
             # 1단계: 대분류 목록 추출
-            major_items = await self.extract_tree_items(page, "대분류")
+            major_items = await self.extract_tree_items(page, "대분류", self.selectors['major_rows'])
             
             if not major_items:
                 logger.error("대분류 항목을 찾을 수 없습니다.")
-                return
+                return False
                 
             logger.info(f"총 {len(major_items)}개 대분류 발견")
             
-            # 각 대분류별로 순회
-            for major_idx, major_item in enumerate(major_items):
+            # 대분류 병렬 처리용 워커 페이지 풀 (첫 번째는 이미 열린 페이지 재사용)
+            page_pool: asyncio.Queue = asyncio.Queue()
+            page_pool.put_nowait((context, page))
+            
+            for _ in range(min(self.concurrency, len(major_items)) - 1):
                 try:
-                    major_code = major_item['code']
-                    major_name = major_item['name']
-                    
-                    logger.info(f"[{major_idx+1}/{len(major_items)}] 대분류 처리: {major_item['text']}")
-                    
-                    # 팝업 페이지 상태 확인
-                    page = await self.ensure_popup_page(context, page)
-                    
-                    # 대분류 클릭 (가려진 요소 문제 해결)
-                    try:
-                        # 1순위: 일반 클릭
-                        await major_item['element'].click()
-                    except Exception as e:
-                        logger.warning(f"일반 클릭 실패, 강제 클릭 시도: {e}")
-                        try:
-                            # 2순위: 강제 클릭 (intercepted 요소 무시)
-                            await major_item['element'].click(force=True)
-                        except Exception as e2:
-                            logger.warning(f"강제 클릭도 실패, JavaScript 클릭 시도: {e2}")
-                            # 3순위: JavaScript로 직접 클릭
-                            await major_item['element'].evaluate('element => element.click()')
-                    
-                    await asyncio.sleep(2)  # 중분류 로딩 대기
-                    
-                    # 2단계: 중분류 목록 추출
-                    middle_items = await self.extract_tree_items(page, "중분류")
-                    
-                    if not middle_items:
-                        logger.warning(f"대분류 '{major_item['text']}'에 중분류가 없습니다.")
-                        continue
-                    
-                    logger.info(f"  └ {len(middle_items)}개 중분류 발견")
-                    
-                    # 각 중분류별로 순회
-                    for middle_idx, middle_item in enumerate(middle_items):
-                        try:
-                            middle_code = middle_item['code']
-                            middle_name = middle_item['name']
-                            
-                            logger.info(f"    [{middle_idx+1}/{len(middle_items)}] 중분류 처리: {middle_item['text']}")
-                            
-                            # 팝업 페이지 상태 확인
-                            page = await self.ensure_popup_page(context, page)
-                            
-                            # 중분류 클릭 (가려진 요소 문제 해결)
-                            try:
-                                await middle_item['element'].click()
-                            except Exception as e:
-                                logger.warning(f"중분류 일반 클릭 실패, 강제 클릭 시도: {e}")
-                                try:
-                                    await middle_item['element'].click(force=True)
-                                except Exception as e2:
-                                    logger.warning(f"중분류 강제 클릭도 실패, JavaScript 클릭 시도: {e2}")
-                                    await middle_item['element'].evaluate('element => element.click()')
-                            
-                            await asyncio.sleep(2)  # 소분류 로딩 대기
-                            
-                            # 3단계: 소분류 목록 추출
-                            minor_items = await self.extract_tree_items(page, "소분류")
-                            
-                            if not minor_items:
-                                logger.warning(f"중분류 '{middle_item['text']}'에 소분류가 없습니다.")
-                                continue
-                                
-                            logger.info(f"      └ {len(minor_items)}개 소분류 발견")
-                            
-                            # 각 소분류별로 순회
-                            for minor_idx, minor_item in enumerate(minor_items):
-                                try:
-                                    minor_code = minor_item['code']
-                                    minor_name = minor_item['name']
-                                    
-                                    logger.info(f"        [{minor_idx+1}/{len(minor_items)}] 소분류 처리: {minor_item['text']}")
-                                    
-                                    # 팝업 페이지 상태 확인
-                                    page = await self.ensure_popup_page(context, page)
-                                    
-                                    # 소분류 클릭 (가려진 요소 문제 해결)
-                                    try:
-                                        await minor_item['element'].click()
-                                    except Exception as e:
-                                        logger.warning(f"소분류 일반 클릭 실패, 강제 클릭 시도: {e}")
-                                        try:
-                                            await minor_item['element'].click(force=True)
-                                        except Exception as e2:
-                                            logger.warning(f"소분류 강제 클릭도 실패, JavaScript 클릭 시도: {e2}")
-                                            await minor_item['element'].evaluate('element => element.click()')
-                                    
-                                    await asyncio.sleep(1)
-                                    
-                                    # 입력 필드에서 자동 입력된 코드 확인
-                                    auto_input_code = await self.get_input_field_value(page)
-                                    
-                                    # 데이터 저장
-                                    classification_data = {
-                                        '대분류코드': major_code,
-                                        '대분류명': major_name,
-                                        '중분류코드': middle_code,
-                                        '중분류명': middle_name,
-                                        '소분류코드': minor_code or auto_input_code,
-                                        '소분류명': minor_name,
-                                        '자동입력코드': auto_input_code
-                                    }
-                                    
-                                    self.classification_data.append(classification_data)
-                                    
-                                    logger.info(f"          └ 저장: {classification_data['소분류코드']} - {classification_data['소분류명']}")
-                                    
-                                except Exception as e:
-                                    logger.error(f"소분류 '{minor_item['text']}' 처리 실패: {e}")
-                                    continue
-                                    
-                        except Exception as e:
-                            logger.error(f"중분류 '{middle_item['text']}' 처리 실패: {e}")
-                            continue
-                            
+                    worker_context, worker_page = await self.open_worker_page(browser)
                 except Exception as e:
-                    logger.error(f"대분류 '{major_item['text']}' 처리 실패: {e}")
-                    continue
+                    logger.warning(f"추가 워커 페이지 준비 실패, 현재 워커 수로 진행: {e}")
+                    break
+                worker_contexts.append(worker_context)
+                page_pool.put_nowait((worker_context, worker_page))
+            
+            logger.info(f"{page_pool.qsize()}개 워커로 대분류 병렬 순회")
+            
+            async def process_with_pool(major_idx: int, major_item: Dict):
+                """풀에서 워커 페이지를 빌려 대분류 하나를 처리한다"""
+                worker_context, worker_page = await page_pool.get()
+                try:
+                    worker_page = await self._process_major(
+                        worker_context, worker_page, major_idx, len(major_items), major_item
+                    )
+                finally:
+                    page_pool.put_nowait((worker_context, worker_page))
+            
+            # 각 워커가 수집한 행을 바로 CSV에 기록한다
+            await asyncio.gather(
+                *(process_with_pool(idx, item) for idx, item in enumerate(major_items))
+            )
                     
-            logger.info(f"트리 순회 완료. 총 {len(self.classification_data)}개 항목 수집")
+            logger.info(f"트리 순회 완료. 총 {self.row_count}개 항목 수집")
+            return not self._failed_branches
             
         except Exception as e:
             logger.error(f"트리 순회 중 오류 발생: {e}")
+            return False
+        
+        finally:
+            for worker_context in worker_contexts:
+                self.main_pages.pop(worker_context, None)
+                try:
+                    await worker_context.close()
+                except Exception as e:
+                    logger.warning(f"워커 컨텍스트 정리 중 오류: {e}")
     
-    async def close_modal(self, page: Page):
-        """모달을 닫는다"""
+    async def _process_major(self, context: BrowserContext, page: Page, major_idx: int,
+                             total_majors: int, major_item: Dict) -> Page:
+        """
+        대분류 하나를 클릭하고 하위 중분류/소분류를 순회한다 (수집된 행은 즉시 CSV에 기록)
+        
+        Returns:
+            이후에도 사용할 팝업 페이지
+        """
         try:
-            close_selectors = [
-                'button:has-text("닫기")',
-                'button:has-text("확인")',
-                'button:has-text("취소")',
-                '[title="닫기"]',
-                '.close-btn',
-                '[class*="close"]'
-            ]
+            major_code = major_item['code']
+            major_name = major_item['name']
             
-            for selector in close_selectors:
-                try:
-                    close_btn = page.locator(selector).first
-                    if await close_btn.is_visible():
-                        await close_btn.click()
-                        logger.info("모달을 닫았습니다.")
-                        await asyncio.sleep(2)
-                        return
-                except:
-                    continue
-                    
-            logger.warning("모달 닫기 버튼을 찾을 수 없습니다.")
+            logger.info("[%d/%d] 대분류 처리: %s", major_idx + 1, total_majors, major_item['text'])
             
-        except Exception as e:
-            logger.error(f"모달 닫기 실패: {e}")
+            # 팝업 페이지 상태 확인 (닫혔거나 다른 주소로 이동해 새로 열렸으면 색인분류 모달도 다시 연다)
+            reopened = page.is_closed() or not page.url.startswith(self.popup_url_prefix)
+            page = await self.ensure_popup_page(context, page)
+            if reopened and not await self.open_classification_modal(page):
+                logger.error(f"대분류 '{major_item['text']}': 새 팝업에서 색인분류검색 모달 열기 실패")
+                self._failed_branches += 1
+                return page
             
-    def save_to_csv(self):
-        """수집된 데이터를 CSV 파일로 저장한다"""
-        try:
-            if not self.classification_data:
-                logger.warning("저장할 데이터가 없습니다.")
-                return
-                
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            csv_filename = self.output_dir / f"hira_classification_map_{timestamp}.csv"
+            # 워커 페이지마다 같은 ID(위치)의 대분류 요소를 찾는다
+            major_element = self._item_locator(page, major_item)
             
-            # CSV 파일 작성
-            with open(csv_filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                fieldnames = ['대분류코드', '대분류명', '중분류코드', '중분류명', '소분류코드', '소분류명', '자동입력코드']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for data in self.classification_data:
-                    writer.writerow(data)
+            # 대분류 클릭 후 중분류 그리드 데이터 응답 대기
+            await self._click_and_wait_grid(page, major_element, "대분류")
+            await self.wait_for_element(page, self.selectors['middle_rows'], timeout=5000)  # 중분류 로딩 대기
             
-            logger.info(f"CSV 파일 저장 완료: {csv_filename}")
-            logger.info(f"총 {len(self.classification_data)}개 항목 저장")
+            # 2단계: 중분류 목록 추출
+            middle_items = await self.extract_tree_items(page, "중분류", self.selectors['middle_rows'])
             
-            # 요약 통계
-            major_count = len(set(item['대분류코드'] for item in self.classification_data))
-            middle_count = len(set(f"{item['대분류코드']}-{item['중분류코드']}" for item in self.classification_data))
-            minor_count = len(self.classification_data)
+            if not middle_items:
+                logger.warning(f"대분류 '{major_item['text']}'에 중분류가 없습니다.")
+                return page
             
-            logger.info(f"수집 통계: 대분류 {major_count}개, 중분류 {middle_count}개, 소분류 {minor_count}개")
+            logger.info("  └ %d개 중분류 발견", len(middle_items))
             
+            # 각 중분류별로 순회
+            for middle_idx, middle_item in enumerate(middle_items):
+                try:
+                    middle_code = middle_item['code']
+                    middle_name = middle_item['name']
+                    
+                    # 이전 실행에서 끝난 중분류는 클릭하지 않고 건너뜀 (코드가 없으면 텍스트로 구분)
+                    checkpoint_key = (major_code or major_item['text'], middle_code or middle_item['text'])
+                    if checkpoint_key in self._done:
+                        logger.debug("    [%d/%d] 완료된 중분류 건너뜀: %s", middle_idx + 1, len(middle_items), middle_item['text'])
+                        continue
+                    
+                    logger.debug("    [%d/%d] 중분류 처리: %s", middle_idx + 1, len(middle_items), middle_item['text'])
+                    
+                    # 중분류 클릭 후 소분류 그리드 데이터 응답 대기
+                    middle_element = self._item_locator(page, middle_item)
+                    await self._click_and_wait_grid(page, middle_element, "중분류")
+                    await self.wait_for_element(page, self.selectors['minor_rows'], timeout=5000)  # 소분류 로딩 대기
+                    
+                    # 3단계: 소분류 목록 추출
+                    minor_items = await self.extract_tree_items(page, "소분류", self.selectors['minor_rows'], read_only=True)
+                    
+                    if not minor_items:
+                        logger.warning(f"중분류 '{middle_item['text']}'에 소분류가 없습니다.")
+                        continue
+                    
+                    logger.debug("      └ %d개 소분류 발견", len(minor_items))
+                    
+                    # 각 소분류별로 순회 (항목 수가 가장 많은 루프이므로 로그 레벨을 한 번만 확인)
+                    # 클릭 전 입력 필드 값을 기억해 두고 바뀐 값만 자동 입력 코드로 읽는다
+                    input_code = await self.get_input_field_value(page)
+                    log_minor = logger.isEnabledFor(logging.DEBUG)
+                    minor_failures = 0
+                    for minor_idx, minor_item in enumerate(minor_items):
+                        try:
+                            minor_code = minor_item['code']
+                            minor_name = minor_item['name']
+                            
+                            if log_minor:
+                                logger.debug("        [%d/%d] 소분류 처리: %s", minor_idx + 1, len(minor_items), minor_item['text'])
+                            
+                            # 소분류 클릭 (가려진 요소 문제 해결)
+                            minor_element = self._item_locator(page, minor_item)
+                            await self._click_with_fallback(minor_element, "소분류", delay=False)
+                            
+                            # 클릭 후 무작위 대기와 자동 입력 코드 대기(서버 왕복)를 겹쳐서 진행
+                            _, auto_input_code = await asyncio.gather(
+                                asyncio.sleep(random.uniform(*self.request_delay)),
+                                self._read_auto_input_code(page, input_code)
+                            )
+                            input_code = auto_input_code
+                            
+                            # 데이터 저장
+                            classification_data = {
+                                '대분류코드': major_code,
+                                '대분류명': major_name,
+                                '중분류코드': middle_code,
+                                '중분류명': middle_name,
+                                '소분류코드': minor_code or auto_input_code,
+                                '소분류명': minor_name,
+                                '자동입력코드': auto_input_code
+                            }
+                            
+                            await self.write_row(classification_data)
+                            
+                            if log_minor:
+                                logger.debug("          └ 저장: %s - %s", classification_data['소분류코드'], classification_data['소분류명'])
+                        
+                        except Exception as e:
+                            # 팝업이 닫힌 경우는 중분류 단위에서 복구
+                            if page.is_closed():
+                                raise
+                            logger.error(f"소분류 '{minor_item['text']}' 처리 실패: {e}")
+                            minor_failures += 1
+                            continue
+                    
+                    # 소분류가 하나라도 실패한 중분류는 다음 실행에서 다시 수집하도록 체크포인트에 넣지 않음
+                    if minor_failures:
+                        logger.warning(f"중분류 '{middle_item['text']}'의 소분류 {minor_failures}개 실패 - 체크포인트에서 제외")
+                        self._failed_branches += 1
+                        continue
+                    
+                    # 중분류 하나를 끝낼 때마다 체크포인트 갱신
+                    self._done.add(checkpoint_key)
+                    self._save_checkpoint()
+                
+                except Exception as e:
+                    logger.error(f"중분류 '{middle_item['text']}' 처리 실패: {e}")
+                    self._failed_branches += 1
+                    # 팝업 페이지가 닫혔을 때만 다시 열고 대분류 선택 상태를 복구
+                    if page.is_closed():
+                        page = await self._recover_popup_page(context, page, major_item)
+                    continue
+        
         except Exception as e:
-            logger.error(f"CSV 저장 실패: {e}")
+            logger.error(f"대분류 '{major_item['text']}' 처리 실패: {e}")
+            self._failed_branches += 1
+        
+        return page
+    
+    async def _recover_popup_page(self, context: BrowserContext, page: Page, major_item: Dict) -> Page:
+        """닫힌 팝업 페이지를 다시 열고 색인분류 모달과 대분류 선택 상태를 복구한다"""
+        logger.warning(f"팝업 페이지 복구 후 대분류 '{major_item['text']}' 순회를 이어갑니다.")
+        page = await self.ensure_popup_page(context, page)
+        
+        if await self.open_classification_modal(page):
+            await self._click_and_wait_grid(page, self._item_locator(page, major_item), "대분류")
+            await self.wait_for_element(page, self.selectors['middle_rows'], timeout=5000)
+        
+        return page
+    
+    async def write_row(self, row: Dict):
+        """분류 행 하나를 CSV에 기록하고 수집 통계를 갱신한다"""
+        await super().write_row(row)
+        self._major_codes.add(row['대분류코드'])
+        self._middle_keys.add(f"{row['대분류코드']}-{row['중분류코드']}")
+    
+    def close_csv(self) -> str:
+        """결과 CSV 파일을 닫고 수집 통계를 출력한다"""
+        saved_file = super().close_csv()
+        if saved_file:
+            logger.info(f"수집 통계: 대분류 {len(self._major_codes)}개, 중분류 {len(self._middle_keys)}개, 소분류 {self.row_count}개")
+        return saved_file
     
     async def run(self):
         """크롤링 메인 실행 함수"""
@@ -852,6 +731,9 @@ class HIRAClassificationMapper:
             # 브라우저 설정
             browser, context = await self.setup_browser()
             
+            # 결과 CSV 열기 (수집하면서 바로 기록, 체크포인트가 있으면 그 CSV에 이어 씀)
+            self.open_csv(self._resume_csv)
+            
             try:
                 # 1. 메인 페이지 열고 Nexacro 세션 확보
                 await self.open_main_page(context)
@@ -864,16 +746,16 @@ class HIRAClassificationMapper:
                     logger.error("색인분류검색 모달 열기 실패")
                     return
                 
-                # 분류 트리 순회 및 데이터 추출
-                await self.traverse_classification_tree(context, page)
+                # 분류 트리 순회 및 데이터 추출 (끝까지 마치면 다음 실행이 건너뛰지 않도록 체크포인트 삭제)
+                if await self.traverse_classification_tree(browser, context, page):
+                    self._clear_checkpoint()
                 
                 # 모달 닫기
                 await self.close_modal(page)
                 
-                # 결과를 CSV로 저장
-                self.save_to_csv()
-                
             finally:
+                self.close_csv()
+                
                 try:
                     await context.close()
                     await browser.close()
@@ -890,7 +772,8 @@ async def main():
     output_directory = "./output"
     
     mapper = HIRAClassificationMapper(output_directory)
-    await mapper.run()
+    async with contextlib.aclosing(mapper):
+        await mapper.run()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -4,189 +4,122 @@ HIRA 요양기관 업무포털 상세 색인분류 추출 크롤러
 """
 
 import asyncio
+import atexit
 import logging
-import csv
+import logging.handlers
 import re
-from datetime import datetime
-from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Locator
+from queue import SimpleQueue
+from typing import List, Dict, Optional
+from playwright.async_api import Page, BrowserContext, Locator
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from hira_base import HIRAMapperBase
 
 # 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hira_classification_detailed.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 파일/콘솔 출력은 별도 스레드의 QueueListener가 담당하여 이벤트 루프를 막지 않음
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler('hira_classification_detailed.log', encoding='utf-8'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue: SimpleQueue = SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # 최종 포맷은 리스너 측 핸들러가 적용
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger(__name__)
 
-class HIRADetailedClassificationMapper:
-    def __init__(self, output_dir: str = "./output"):
-        """상세 색인분류 추출 크롤러 초기화"""
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
-        
-        # HIRA 웹사이트 URL
-        self.main_url = "https://biz.hira.or.kr/index.do"
-        
-        # 분류 데이터 저장
-        self.classification_data: List[Dict] = []
-        
-        # Nexacro 세션 유지용 메인 페이지 참조
-        self.main_page: Optional[Page] = None
-        
-    async def setup_browser(self) -> tuple[Browser, BrowserContext]:
-        """브라우저 설정 및 컨텍스트 생성"""
-        playwright = await async_playwright().start()
-        
-        browser = await playwright.chromium.launch(
-            headless=False,
-            slow_mo=1000,  # 동작 간 1초 대기
-            args=['--disable-web-security', '--disable-features=VizDisplayCompositor']
-        )
-        
-        context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080}
-        )
-        
-        return browser, context
-        
-    async def setup_main_page(self, context: BrowserContext) -> Page:
-        """메인 페이지 설정 및 세션 확보"""
-        try:
-            logger.info(f"메인 페이지 접속: {self.main_url}")
-            
-            page = await context.new_page()
-            await page.goto(self.main_url, wait_until='networkidle', timeout=30000)
-            
-            # Nexacro 애플리케이션 로딩 대기
-            logger.info("Nexacro 메인 애플리케이션 로딩 대기...")
-            await asyncio.sleep(10)
-            
-            # 심사기준 종합서비스 메뉴 찾기
-            menu_link = page.locator('text=심사기준 종합서비스')
-            if await menu_link.count() > 0:
-                logger.info("메뉴 링크 발견: text=심사기준 종합서비스")
-                
-                # 새 페이지 열기 대기
-                async with context.expect_page() as new_page_info:
-                    await menu_link.click()
-                
-                popup_page = await new_page_info.value
-                await popup_page.wait_for_load_state('networkidle', timeout=30000)
-                
-                logger.info("Nexacro 팝업 애플리케이션 로딩 대기...")
-                await asyncio.sleep(10)
-                logger.info("팝업 페이지 로딩 완료")
-                
-                self.main_page = page  # 세션 유지를 위해 메인 페이지 보관
-                return popup_page
-            else:
-                logger.error("심사기준 종합서비스 메뉴를 찾을 수 없습니다.")
-                return None
-                
-        except Exception as e:
-            logger.error(f"메인 페이지 설정 실패: {e}")
-            return None
-    
-    async def open_classification_modal(self, page: Page) -> bool:
-        """색인분류검색 모달을 연다"""
-        try:
-            logger.info("색인분류검색 모달 열기 시도...")
-            
-            # DOM 완전 로딩 대기
-            await asyncio.sleep(3)
-            await page.wait_for_load_state('networkidle', timeout=10000)
-            
-            # 정확한 버튼 ID로 클릭
-            exact_button_id = '#InfoBank_form_divMain_divWork1_btnIdxDiv'
-            btn_element = page.locator(exact_button_id)
-            
-            if await btn_element.count() > 0:
-                logger.info("색인분류검색 버튼 발견!")
-                await btn_element.click()
-                await asyncio.sleep(3)
-                
-                # 모달 열림 확인
-                modal_check = '#InfoBank_RvStdInqIdxPL'
-                if await page.locator(modal_check).count() > 0:
-                    logger.info("색인분류검색 모달이 성공적으로 열렸습니다")
-                    return True
-            
-            logger.error("색인분류검색 버튼을 찾을 수 없습니다")
-            return False
-            
-        except Exception as e:
-            logger.error(f"색인분류검색 모달 열기 실패: {e}")
-            return False
+# 분류 항목 텍스트에서 코드를 분리하는 정규식
+CODE_PAREN_RE = re.compile(r'\(([A-Z][0-9]*)\)$')   # "...(A)" (마지막 괄호 코드)
+CODE_BARE_RE = re.compile(r'[A-Z][0-9]*')            # 단순 영문 코드
+CODE_STRIP_RE = re.compile(r'\([A-Z][0-9]*\)')       # 명칭에서 제거할 괄호 코드
+
+# 검색 입력 필드 값이 클릭 전과 달라졌는지 확인 (인자: [선택자, 클릭 전 값])
+INPUT_CHANGED_JS = "([sel, prev]) => { const el = document.querySelector(sel); return !!el && el.value.trim() !== prev; }"
+
+# 결과 CSV 컬럼
+CSV_FIELDNAMES = ['분류레벨', '분류텍스트', '기본코드', '상세코드', '분류명', '클릭전코드', '클릭후코드']
+
+
+class HIRADetailedClassificationMapper(HIRAMapperBase):
+    csv_fieldnames = CSV_FIELDNAMES
+    csv_prefix = "hira_detailed_classification"
     
-    async def get_input_field_code(self, page: Page) -> str:
-        """검색 입력 필드에서 자동 입력된 코드를 가져온다"""
-        try:
-            input_selector = '#InfoBank_form_divMain_divWork1_edtSearchTxt_input'
-            search_input = page.locator(input_selector)
-            
-            if await search_input.is_visible():
-                value = await search_input.input_value()
-                return value.strip() if value else ""
-        except Exception as e:
-            logger.debug(f"입력 필드 코드 가져오기 실패: {e}")
-        return ""
+    def __init__(self, output_dir: str = "./output", concurrency: int = 4, rate_limit: float = 5.0,
+                 headless: bool = True, debug: bool = False):
+        """
+        상세 색인분류 추출 크롤러 초기화
+        
+        Args:
+            output_dir: 출력 파일 저장 디렉토리
+            concurrency: 분류 항목을 동시에 처리할 팝업 페이지 수
+            rate_limit: 모든 워커를 합친 초당 최대 클릭 수
+            headless: 헤드리스 모드 여부
+            debug: 디버깅용 실행 (화면 표시 + 동작 간 1초 대기, headless 설정보다 우선)
+        """
+        super().__init__(output_dir, concurrency, headless and not debug, rate_limit,
+                         slow_mo=1000 if debug else 0)
     
-    async def extract_detailed_classification_item(self, page: Page, element: Locator, level: str) -> Optional[Dict]:
-        """개별 분류 항목을 클릭하여 상세 정보를 추출한다"""
+    async def extract_detailed_classification_item(self, page: Page, element: Locator, level: str, text: str) -> Optional[Dict]:
+        """
+        개별 분류 항목을 클릭하여 상세 정보를 추출한다
+        
+        Args:
+            page: 팝업 페이지
+            element: 클릭할 행 Locator
+            level: 분류 레벨명
+            text: 행 스냅샷에서 읽어 둔 항목 텍스트
+        """
         try:
-            # 항목 텍스트 가져오기
-            text = await element.text_content()
             if not text:
                 return None
             
-            text = text.strip()
-            logger.info(f"{level} 항목 상세 분석 시작: '{text}'")
+            logger.info("%s 항목 상세 분석 시작: '%s'", level, text)
             
             # 항목 클릭 전 입력 필드 상태 확인
-            before_click_code = await self.get_input_field_code(page)
+            before_click_code = await self.get_input_field_value(page)
             
-            # 항목 클릭 (여러 방법 시도)
-            try:
-                await element.click()
-            except Exception as e:
-                logger.warning(f"일반 클릭 실패, 강제 클릭 시도: {e}")
-                try:
-                    await element.click(force=True)
-                except Exception as e2:
-                    logger.warning(f"강제 클릭도 실패, JavaScript 클릭 시도: {e2}")
-                    await element.evaluate('element => element.click()')
+            # 항목 클릭 (강제 클릭 우선, 워커 전체 클릭 속도 제한)
+            await self._click_with_fallback(element, level)
             
-            await asyncio.sleep(2)  # 화면 업데이트 대기
+            # 입력 필드에 코드가 자동 입력될 때까지 대기 (화면 업데이트)
+            try:
+                await page.wait_for_function(
+                    INPUT_CHANGED_JS, arg=[self.selectors['search_input'], before_click_code], timeout=3000
+                )
+            except PlaywrightTimeoutError:
+                logger.debug("입력 필드 변경 대기 시간 초과")
             
             # 클릭 후 입력 필드에서 자동 입력된 코드 확인
-            after_click_code = await self.get_input_field_code(page)
+            after_click_code = await self.get_input_field_value(page)
             
             # 코드와 명칭 분리
             code = ""
             name = text
             
             # 패턴 1: 텍스트에서 괄호 안의 코드 추출 (예: "요양급여비용산정기준(행위)(A)")
-            paren_match = re.search(r'\\(([A-Z][0-9]*)\\)$', text)
+            paren_match = CODE_PAREN_RE.search(text)
             if paren_match:
                 code = paren_match.group(1)
                 name = text[:paren_match.start()].strip()
             else:
                 # 패턴 2: 단순 영문 코드 찾기
-                code_match = re.search(r'[A-Z][0-9]*', text)
+                code_match = CODE_BARE_RE.search(text)
                 if code_match:
                     code = code_match.group(0)
                     # 코드를 제외한 부분을 명칭으로
-                    name = re.sub(r'\\([A-Z][0-9]*\\)', '', text).strip()
+                    name = CODE_STRIP_RE.sub('', text).strip()
             
             # 자동 입력된 코드가 더 상세하다면 사용
             if after_click_code and after_click_code != before_click_code:
                 detailed_code = after_click_code
-                logger.info(f"자동 입력된 상세 코드 발견: {detailed_code}")
+                logger.info("자동 입력된 상세 코드 발견: %s", detailed_code)
             else:
                 detailed_code = code
             
@@ -200,147 +133,138 @@ class HIRADetailedClassificationMapper:
                 'after_click_code': after_click_code
             }
             
-            logger.info(f"추출 완료 - 코드: {code}, 상세코드: {detailed_code}, 명칭: {name}")
+            logger.info("추출 완료 - 코드: %s, 상세코드: %s, 명칭: %s", code, detailed_code, name)
             return result
             
         except Exception as e:
             logger.error(f"{level} 항목 상세 분석 실패: {e}")
             return None
     
-    async def traverse_classification_tree_detailed(self, page: Page):
-        """색인분류 트리를 순회하며 상세 정보를 추출한다"""
+    async def open_worker_popup(self, context: BrowserContext) -> Optional[Page]:
+        """같은 컨텍스트에서 추가 팝업 페이지를 열고 색인분류검색 모달까지 준비한다"""
+        try:
+            popup_page = await self.open_popup_page(context)
+        except Exception:
+            return None
+        
+        if not await self.open_classification_modal(popup_page):
+            await popup_page.close()
+            return None
+        
+        return popup_page
+    
+    async def traverse_classification_tree_detailed(self, context: BrowserContext, page: Page):
+        """색인분류 트리를 순회하며 상세 정보를 추출한다 (여러 팝업 페이지에서 병렬 처리)"""
+        worker_pages: List[Page] = []
+        
         try:
             logger.info("상세 색인분류 트리 순회 시작...")
             
-            # 1단계: 대분류 목록 추출
-            tree_selector = '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv1_body div[id*="gridrow"]:visible'
-            elements = page.locator(tree_selector)
-            count = await elements.count()
+            # 1단계: 대분류 목록 추출 (보이는 행을 텍스트 기준 중복 제거까지 한 번에 스냅샷)
+            tree_selector = '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv1_body div[id*="gridrow"]'
+            unique_items = await self._snapshot_rows(page, tree_selector)
             
-            if count == 0:
+            if not unique_items:
                 logger.error("분류 항목을 찾을 수 없습니다.")
                 return
             
-            logger.info(f"총 {count}개 분류 항목 발견")
-            
-            # 고유한 텍스트만 추출 (중복 제거)
-            unique_items = []
-            seen_texts = set()
-            
-            for i in range(min(count, 30)):  # 최대 30개까지
-                try:
-                    element = elements.nth(i)
-                    if not await element.is_visible():
-                        continue
-                    
-                    text = await element.text_content()
-                    if not text or text.strip() in seen_texts:
-                        continue
-                    
-                    text = text.strip()
-                    seen_texts.add(text)
-                    unique_items.append((text, element))
-                    
-                except Exception as e:
-                    continue
-            
             logger.info(f"고유한 분류 항목 {len(unique_items)}개 추출")
             
-            # 각 항목에 대해 상세 분석
-            for idx, (text, element) in enumerate(unique_items):
-                try:
-                    logger.info(f"[{idx+1}/{len(unique_items)}] 분류 항목 분석: {text}")
+            # 작업 큐에 항목을 모두 넣고 워커들이 나눠서 처리
+            work_queue: asyncio.Queue = asyncio.Queue()
+            for idx, item in enumerate(unique_items):
+                work_queue.put_nowait((idx, item))
+            
+            async def worker(worker_page: Optional[Page]):
+                """팝업 페이지 하나를 재사용하며 큐의 항목을 처리한다"""
+                if worker_page is None:
+                    worker_page = await self.open_worker_popup(context)
+                    if worker_page is None:
+                        logger.warning("추가 워커 팝업 준비 실패, 남은 워커로 진행")
+                        return
+                    worker_pages.append(worker_page)
+                
+                while True:
+                    try:
+                        idx, row = work_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
                     
-                    # 상세 정보 추출
-                    detail_info = await self.extract_detailed_classification_item(page, element, "분류")
+                    text = row['text']
                     
-                    if detail_info:
-                        # 데이터 저장
-                        classification_data = {
-                            '분류레벨': detail_info['level'],
-                            '분류텍스트': detail_info['text'],
-                            '기본코드': detail_info['code'],
-                            '상세코드': detail_info['detailed_code'],
-                            '분류명': detail_info['name'],
-                            '클릭전코드': detail_info['before_click_code'],
-                            '클릭후코드': detail_info['after_click_code']
-                        }
+                    try:
+                        logger.info("[%d/%d] 분류 항목 분석: %s", idx + 1, len(unique_items), text)
                         
-                        self.classification_data.append(classification_data)
-                        logger.info(f"저장: {detail_info['detailed_code']} - {detail_info['name']}")
-                
-                except Exception as e:
-                    logger.error(f"분류 항목 '{text}' 처리 실패: {e}")
-                    continue
-            
-            logger.info(f"상세 분류 정보 수집 완료. 총 {len(self.classification_data)}개 항목")
-            
-        except Exception as e:
-            logger.error(f"상세 트리 순회 중 오류: {e}")
-    
-    async def save_to_csv(self) -> str:
-        """수집된 데이터를 CSV 파일로 저장한다"""
-        try:
-            if not self.classification_data:
-                logger.warning("저장할 데이터가 없습니다.")
-                return ""
-            
-            # 현재 시간을 파일명에 포함
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"hira_detailed_classification_{timestamp}.csv"
-            filepath = self.output_dir / filename
-            
-            # CSV 파일 작성
-            with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                fieldnames = ['분류레벨', '분류텍스트', '기본코드', '상세코드', '분류명', '클릭전코드', '클릭후코드']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for data in self.classification_data:
-                    writer.writerow(data)
+                        # 상세 정보 추출
+                        element = self._row_locator(worker_page, tree_selector, row)
+                        detail_info = await self.extract_detailed_classification_item(worker_page, element, "분류", text)
+                        
+                        if detail_info:
+                            # 데이터 저장 (즉시 CSV에 기록)
+                            await self.write_row({
+                                '분류레벨': detail_info['level'],
+                                '분류텍스트': detail_info['text'],
+                                '기본코드': detail_info['code'],
+                                '상세코드': detail_info['detailed_code'],
+                                '분류명': detail_info['name'],
+                                '클릭전코드': detail_info['before_click_code'],
+                                '클릭후코드': detail_info['after_click_code']
+                            })
+                            logger.info("저장: %s - %s", detail_info['detailed_code'], detail_info['name'])
+                    
+                    except Exception as e:
+                        logger.error(f"분류 항목 '{text}' 처리 실패: {e}")
+                        continue
             
-            logger.info(f"CSV 파일 저장 완료: {filepath}")
-            logger.info(f"총 {len(self.classification_data)}개 항목 저장")
+            # 첫 번째 워커는 이미 열린 팝업 페이지를 재사용
+            worker_count = min(self.concurrency, len(unique_items))
+            logger.info(f"{worker_count}개 워커로 분류 항목 병렬 처리")
+            await asyncio.gather(worker(page), *(worker(None) for _ in range(worker_count - 1)))
             
-            return str(filepath)
+            logger.info(f"상세 분류 정보 수집 완료. 총 {self.row_count}개 항목")
             
         except Exception as e:
-            logger.error(f"CSV 저장 실패: {e}")
-            return ""
+            logger.error(f"상세 트리 순회 중 오류: {e}")
+        
+        finally:
+            for worker_page in worker_pages:
+                try:
+                    await worker_page.close()
+                except Exception as e:
+                    logger.warning(f"워커 팝업 정리 중 오류: {e}")
     
     async def run(self):
         """메인 실행 함수"""
-        browser = None
         try:
             logger.info("HIRA 상세 색인분류 추출 시작")
             
             # 브라우저 설정
-            browser, context = await self.setup_browser()
+            _, context = await self.setup_browser()
             
-            # 메인 페이지 설정 및 팝업 페이지 열기
-            popup_page = await self.setup_main_page(context)
-            if not popup_page:
-                return
+            # 결과 CSV 열기 (수집하면서 바로 기록)
+            self.open_csv()
+            
+            # 메인 페이지에서 Nexacro 세션 확보 후 팝업 페이지 열기
+            popup_page = await self.open_popup_page(context)
             
             # 색인분류검색 모달 열기
             if not await self.open_classification_modal(popup_page):
                 return
             
             # 상세 분류 정보 추출
-            await self.traverse_classification_tree_detailed(popup_page)
-            
-            # CSV 파일 저장
-            saved_file = await self.save_to_csv()
-            if saved_file:
-                logger.info(f"상세 분류 정보 저장 완료: {saved_file}")
+            await self.traverse_classification_tree_detailed(context, popup_page)
             
         except Exception as e:
             logger.error(f"실행 중 오류 발생: {e}")
         
         finally:
-            if browser:
-                logger.info("브라우저 정리 완료")
-                await browser.close()
+            # CSV 파일 닫기
+            saved_file = self.close_csv()
+            if saved_file:
+                logger.info(f"상세 분류 정보 저장 완료: {saved_file}")
+            
+            await self.aclose()
+            logger.info("브라우저 정리 완료")
 
 async def main():
     """메인 함수"""
@@ -4,38 +4,285 @@ Playwright MCP 기반으로 구현된 자동화 스크립트
 """
 
 import asyncio
+import atexit
+import csv
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import shutil
 import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
-import pandas as pd
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
-
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hira_crawler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from queue import SimpleQueue
+from typing import ClassVar, List, Dict, Optional, Set, Tuple
+from aiolimiter import AsyncLimiter
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Download, Locator
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# 로깅 설정 (파일/콘솔 출력은 별도 스레드의 QueueListener가 담당하여 이벤트 루프를 막지 않음)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler('hira_crawler.log', encoding='utf-8'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue: SimpleQueue = SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # 최종 포맷은 리스너 측 핸들러가 적용
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger(__name__)
 
+# 진행률 로그 출력 간격 (처리한 수가코드 수 기준)
+PROGRESS_LOG_INTERVAL = 10
+
+# HIRA가 요청 과다로 응답할 때의 상태 코드와 조회 속도 하한 (초당)
+THROTTLE_STATUSES = {429, 503}
+MIN_RATE_LIMIT = 0.25
+
+# 엑셀 다운로드가 안 될 때 조회 결과 없음 메시지와 엑셀 버튼 상태를 한 번에 확인하는 스크립트
+# (인자: [엑셀 버튼 선택자, 결과 없음 메시지])
+SEARCH_STATE_JS = """
+([btnSel, noDataText]) => {
+    const noData = document.body.innerText.includes(noDataText);
+    const btn = document.querySelector(btnSel);
+    const enabled = !!btn && !btn.disabled && btn.offsetParent !== null;
+    return {noData: noData, enabled: enabled};
+}
+"""
+NO_DATA_TEXT = '조회된 데이터가 없습니다'
+
+# 일시적인 오류(타임아웃/연결 끊김)로 검색이 실패했을 때의 최대 시도 횟수
+SEARCH_RETRY_ATTEMPTS = 3
+TRANSIENT_ERRORS = (PlaywrightTimeoutError, ConnectionError)
+
+# 다운로드 파일 저장을 맡는 작성 태스크 수 (검색 워커와 분리하여 디스크 I/O를 겹쳐 처리)
+DOWNLOAD_WRITER_COUNT = 2
+
+# 결과 CSV 컬럼
+RESULT_FIELDNAMES = ['code', 'success', 'error', 'filename', 'timestamp']
+
+# 크롤링 처리량을 위한 Chromium 실행 옵션 (GPU/확장/백그라운드 작업 비활성화)
+CHROMIUM_ARGS = [
+    '--disable-gpu',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-renderer-backgrounding'
+]
+
+# 검색/다운로드에 필요 없는 리소스 (차단하여 페이지 로딩 단축)
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media', 'stylesheet'}
+
+# 메인 페이지에서 팝업을 여는 메뉴 후보 (or_로 합쳐 한 번에 찾음)
+MENU_SELECTORS = [
+    "text=심사기준 종합서비스",
+    "text=색인분류 검색",
+    "text=InfoBank",
+    "[onclick*='InfoBank']",
+    "a[href*='InfoBank']"
+]
+
+# 실행 간 Nexacro 세션(쿠키/스토리지)을 이어 쓰기 위한 저장 파일
+STORAGE_STATE_PATH = "hira_state.json"
+
+
+def cell_to_str(value) -> str:
+    """엑셀 셀 값을 문자열로 바꾼다 (정수로 떨어지는 실수는 pandas처럼 정수 표기)"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def read_first_column(file_path: str) -> List[str]:
+    """
+    엑셀 첫 번째 시트의 첫 번째 컬럼 값을 헤더 행을 빼고 문자열 리스트로 읽는다.
+    
+    DataFrame 없이 python-calamine(Rust 파서)으로 바로 읽고, 설치되어 있지 않으면 openpyxl로 대체한다.
+    """
+    try:
+        from python_calamine import CalamineWorkbook
+    except ImportError:
+        logger.warning("python-calamine이 설치되어 있지 않아 openpyxl로 읽습니다.")
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(min_row=2, max_col=1, values_only=True)
+            return [cell_to_str(row[0]) for row in rows if row and row[0] not in (None, '')]
+        finally:
+            workbook.close()
+    
+    rows = CalamineWorkbook.from_path(file_path).get_sheet_by_index(0).to_python()
+    return [cell_to_str(row[0]) for row in rows[1:] if row and row[0] not in (None, '')]
+
+
+def is_search_response(response) -> bool:
+    """조회 결과를 내려주는 HIRA 서버 XHR/fetch 응답인지 확인한다"""
+    return 'biz.hira.or.kr' in response.url and response.request.resource_type in ('xhr', 'fetch')
+
+
+class BrowserPool:
+    """
+    실행(run) 사이에 Chromium 브라우저를 띄워 둔 채 재사용하는 풀
+    
+    acquire로 브라우저와 저장된 세션 상태를 불러온 새 컨텍스트를 받고,
+    release로 컨텍스트만 닫고 브라우저는 다음 실행을 위해 반납한다.
+    """
+    def __init__(self, size: int = 1, headless: bool = True, storage_state_path: str = STORAGE_STATE_PATH,
+                 downloads_path: Optional[Path] = None):
+        """
+        Args:
+            size: 동시에 띄워 둘 브라우저 최대 개수
+            headless: 헤드리스 모드 여부
+            storage_state_path: 세션 상태 저장 파일 경로
+            downloads_path: 브라우저가 다운로드 파일을 임시로 받을 디렉토리 (최종 저장 위치와 같은 파일시스템 권장)
+        """
+        self.size = max(1, size)
+        self.headless = headless
+        self.storage_state_path = Path(storage_state_path)
+        self.downloads_path = downloads_path
+        
+        self._pw = None
+        self._browsers: List[Browser] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._launch_lock = asyncio.Lock()
+        
+    async def _launch(self) -> Browser:
+        """Playwright 드라이버를 (한 번만) 시작하고 브라우저를 띄운다"""
+        if self._pw is None:
+            self._pw = await async_playwright().start()
+        
+        # 브라우저 실행 옵션 (기본 헤드리스, 디버깅 시 headless=False로 풀 생성)
+        return await self._pw.chromium.launch(
+            headless=self.headless,
+            args=CHROMIUM_ARGS,
+            chromium_sandbox=False,
+            downloads_path=self.downloads_path
+        )
+    
+    async def acquire(self) -> Tuple[Browser, BrowserContext]:
+        """
+        놀고 있는 브라우저(없으면 새로 띄움)에서 컨텍스트를 만들어 돌려준다
+        
+        Returns:
+            browser, context 튜플
+        """
+        async with self._launch_lock:
+            if self._idle.empty() and len(self._browsers) < self.size:
+                browser = await self._launch()
+                self._browsers.append(browser)
+                self._idle.put_nowait(browser)
+        
+        browser = await self._idle.get()
+        
+        # 브라우저가 죽어 있으면 새로 띄워 교체
+        if not browser.is_connected():
+            logger.warning("풀의 브라우저 연결이 끊어져 새로 실행합니다.")
+            self._browsers.remove(browser)
+            browser = await self._launch()
+            self._browsers.append(browser)
+        
+        # 브라우저 컨텍스트 생성 (다운로드 설정 포함, 저장된 세션 상태가 있으면 불러옴)
+        context = await browser.new_context(
+            accept_downloads=True,
+            viewport={'width': 1920, 'height': 1080},
+            storage_state=self.storage_state_path if self.storage_state_path.exists() else None,
+            service_workers='block',
+            bypass_csp=True
+        )
+        
+        # 이미지/폰트/미디어/스타일시트 요청 차단
+        await context.route('**/*', self._block_unneeded_resources)
+        
+        await context.set_extra_http_headers({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        })
+        
+        return browser, context
+    
+    async def _block_unneeded_resources(self, route):
+        """검색/다운로드에 필요 없는 리소스 요청을 차단한다"""
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def save_state(self, context: BrowserContext):
+        """다음 실행에서 재사용하도록 컨텍스트의 세션 상태를 저장한다"""
+        try:
+            await context.storage_state(path=self.storage_state_path)
+        except Exception as e:
+            logger.warning(f"세션 상태 저장 실패: {e}")
+    
+    async def release(self, browser: Browser, context: BrowserContext):
+        """컨텍스트를 닫고 브라우저를 풀에 반납한다"""
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"컨텍스트 정리 중 오류: {e}")
+        self._idle.put_nowait(browser)
+    
+    async def close(self):
+        """풀의 모든 브라우저를 닫고 Playwright 드라이버를 종료한다"""
+        for browser in self._browsers:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"브라우저 정리 중 오류: {e}")
+        self._browsers.clear()
+        self._idle = asyncio.Queue()
+        
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+
+
 class HIRACrawler:
-    def __init__(self, excel_file_path: str, download_dir: str = "./downloads"):
+    # 이미 만든 다운로드 디렉토리 (크롤러를 여러 개 만들어도 mkdir은 디렉토리당 한 번만 호출)
+    _dirs_created: ClassVar[Set[Path]] = set()
+    
+    def __init__(self, excel_file_path: str, download_dir: str = "./downloads", concurrency: int = 8,
+                 rate_limit: float = 10.0, pool: Optional[BrowserPool] = None, resume: bool = False):
         """
         HIRA 크롤러 초기화
         
         Args:
             excel_file_path: 수가코드가 포함된 엑셀 파일 경로
             download_dir: 다운로드 디렉토리 경로
+            concurrency: 수가코드를 동시에 처리할 팝업 페이지(워커) 수
+            rate_limit: 모든 워커를 합친 초당 최대 수가코드 조회 수 (요청 과다 응답을 받으면 절반씩 줄임)
+            pool: 여러 실행이 공유할 브라우저 풀 (없으면 이 크롤러 전용 풀을 만들고 실행 후 닫는다)
+            resume: 이전 실행에서 다운로드에 성공한 수가코드(seen.csv)를 건너뛸지 여부 (기본은 매번 전부 새로 받음)
         """
         self.excel_file_path = excel_file_path
         self.download_dir = Path(download_dir)
-        self.download_dir.mkdir(exist_ok=True)
+        if self.download_dir not in self._dirs_created:
+            self.download_dir.mkdir(parents=True, exist_ok=True)
+            self._dirs_created.add(self.download_dir)
+        self.concurrency = max(1, concurrency)
+        
+        # 브라우저 풀 (전달받은 풀은 닫지 않고 반납만 함)
+        self._owns_pool = pool is None
+        # (전용 풀은 임시 다운로드를 다운로드 디렉토리 아래에 받아 저장 시 복사 없이 이동)
+        self.pool = pool or BrowserPool(downloads_path=self.download_dir / '.downloading')
+        
+        # 고정 대기 대신 워커 전체가 공유하는 조회 속도 제한 (토큰 버킷)
+        self.limiter = AsyncLimiter(max_rate=rate_limit, time_period=1.0)
+        self._rate = rate_limit
+        
+        # 요청 과다 응답 횟수와 지수 백오프가 끝나는 시각 (time.monotonic 기준)
+        self._throttle_count = 0
+        self._backoff_until = 0.0
         
         # HIRA 웹사이트 URL 및 CSS 선택자
         self.main_url = "https://biz.hira.or.kr/index.do"
@@ -46,11 +293,28 @@ class HIRACrawler:
             'excel_button': '#InfoBank_form_divMain_divWork1_btnE0001TextBoxElement'
         }
         
-        # 다운로드 결과 추적
-        self.results: List[Dict] = []
+        # 팝업 페이지별로 한 번만 만드는 Locator (수가코드마다 다시 만들지 않음)
+        self._page_locators: Dict[Page, Dict[str, Locator]] = {}
+        
+        # 다운로드 결과는 메모리에 모으지 않고 CSV로 바로 기록 (건수만 추적)
+        self.results_name = "crawling_results"  # 결과 파일명 접두어 (샤드 실행 시 샤드 번호 포함)
+        self.results_file: Optional[Path] = None
+        self._results_fh = None
+        self._results_writer: Optional[csv.DictWriter] = None
+        self.processed_count = 0
+        self.success_count = 0
         
-        # 세션 유지용 메인 페이지 참조
+        # 다운로드에 성공한 수가코드 기록 (실행 간 누적, resume=True로 실행할 때만 건너뜀)
+        self.resume = resume
+        self.seen_path = self.download_dir / 'seen.csv'
+        self._seen_fh = None
+        self._seen_writer = None
+        
+        # 세션 유지용 메인 페이지 참조 (워커들이 공유하므로 팝업 열기는 한 번에 하나씩)
         self.main_page: Optional[Page] = None
+        self._popup_lock = asyncio.Lock()
+        # 메인 페이지에서 열린 팝업이 하나라도 있으면 메인 페이지를 닫지 않음 (팝업 세션이 끊기지 않도록)
+        self._main_page_has_popups = False
         
     def read_excel_codes(self) -> List[str]:
         """
@@ -61,65 +325,20 @@ class HIRACrawler:
         """
         try:
             # 엑셀 파일 읽기 (첫 번째 시트의 첫 번째 컬럼)
-            df = pd.read_excel(self.excel_file_path)
-            
-            # 첫 번째 컬럼의 값들을 문자열로 변환하여 반환
-            codes = df.iloc[:, 0].astype(str).tolist()
+            codes = read_first_column(self.excel_file_path)
             
-            # NaN 값이나 빈 값 제거
-            codes = [code.strip() for code in codes if pd.notna(code) and str(code).strip()]
+            # 빈 값과 중복 수가코드를 제거하고 정렬 (같은 코드를 여러 번 조회하지 않음)
+            codes = [code for code in codes if code]
+            before = len(codes)
+            codes = sorted(dict.fromkeys(codes))
             
-            logger.info(f"엑셀 파일에서 {len(codes)}개의 수가코드를 읽었습니다.")
+            logger.info(f"엑셀 파일에서 {len(codes)}개의 수가코드를 읽었습니다. (중복 제거: {before} -> {len(codes)})")
             return codes
             
         except Exception as e:
             logger.error(f"엑셀 파일 읽기 실패: {e}")
             raise
     
-    async def setup_browser(self) -> tuple[Browser, BrowserContext]:
-        """
-        브라우저 설정 및 컨텍스트 생성
-        
-        Returns:
-            browser, context 튜플
-        """
-        playwright = await async_playwright().start()
-        
-        # 브라우저 실행 옵션
-        browser = await playwright.chromium.launch(
-            headless=False,  # 디버깅을 위해 GUI 모드로 실행
-            slow_mo=1000     # 동작 간 1초 대기
-        )
-        
-        # 브라우저 컨텍스트 생성 (다운로드 설정 포함)
-        context = await browser.new_context(
-            accept_downloads=True,
-            viewport={'width': 1920, 'height': 1080}
-        )
-        
-        # 다운로드 경로 설정
-        await context.set_extra_http_headers({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        
-        return browser, context
-    
-    async def _handle_download(self, download):
-        """
-        다운로드 이벤트 핸들러
-        
-        Args:
-            download: 다운로드 객체
-        """
-        try:
-            # 다운로드 완료 대기
-            await download.save_as(
-                self.download_dir / f"temp_{int(time.time())}_{download.suggested_filename}"
-            )
-            logger.info(f"파일 다운로드 완료: {download.suggested_filename}")
-        except Exception as e:
-            logger.error(f"다운로드 처리 실패: {e}")
-    
     async def ensure_popup_page(self, context: BrowserContext, popup_page: Optional[Page] = None) -> Page:
         """
         팝업 페이지가 닫혔는지 확인하고 필요시 재접속
@@ -151,63 +370,16 @@ class HIRACrawler:
             팝업 페이지 객체
         """
         try:
-            # 방법 1: 메인 페이지에서 팝업 열기 시도
-            if self.main_page is None or self.main_page.is_closed():
-                self.main_page = await context.new_page()
-            main_page = self.main_page
-            logger.info(f"메인 페이지 접속: {self.main_url}")
-            await main_page.goto(self.main_url, wait_until='networkidle', timeout=30000)
-            await asyncio.sleep(3)
-            
-            # 심사기준 종합서비스 또는 색인분류 검색 메뉴 찾기
-            menu_selectors = [
-                "text=심사기준 종합서비스",
-                "text=색인분류 검색",
-                "text=InfoBank",
-                "[onclick*='InfoBank']",
-                "a[href*='InfoBank']"
-            ]
-            
-            popup_page = None
-            for selector in menu_selectors:
-                try:
-                    menu_link = main_page.locator(selector)
-                    if await menu_link.is_visible():
-                        logger.info(f"메뉴 링크 발견: {selector}")
-                        
-                        # 팝업 페이지가 열릴 것을 기대
-                        async with context.expect_page() as popup_info:
-                            await menu_link.click()
-                            
-                        popup_page = await popup_info.value
-                        await popup_page.wait_for_load_state('networkidle', timeout=30000)
-                        
-                        # 팝업 페이지가 완전히 로딩될 때까지 추가 대기
-                        await asyncio.sleep(3)
-                        
-                        # 검색 입력창이 나타날 때까지 대기하여 팝업이 정상 작동하는지 확인
-                        try:
-                            search_input = popup_page.locator(self.selectors['search_input'])
-                            await search_input.wait_for(state='visible', timeout=10000)
-                            logger.info("팝업 페이지가 성공적으로 열렸습니다.")
-                            break
-                        except:
-                            # 검색창이 나타나지 않으면 이 팝업은 실패한 것으로 간주
-                            await popup_page.close()
-                            popup_page = None
-                            continue
-                        
-                except Exception as e:
-                    logger.debug(f"메뉴 선택자 {selector} 시도 실패: {e}")
-                    continue
+            # 이전 실행의 세션 상태를 불러왔다면 메인 페이지 메뉴 탐색 없이 팝업 주소로 바로 접속
+            if self.pool.storage_state_path.exists():
+                popup_page = await self._open_popup_with_saved_state(context)
+                if popup_page is not None:
+                    return self._prepare_popup_page(popup_page)
             
-            # Nexacro 기반 웹사이트는 팝업이 메인 세션에 의존하므로 메인 페이지를 닫지 않음
-            # 팝업이 열리지 않았을 때만 메인 페이지 정리
-            if popup_page is None:
-                await main_page.close()
-                logger.info("팝업 열기 실패로 메인 페이지를 닫았습니다.")
-            else:
-                logger.info("Nexacro 세션 유지를 위해 메인 페이지를 열린 상태로 유지합니다.")
+            # 메인 페이지 메뉴 클릭은 같은 세션에서 동시에 하지 않도록 이 구간만 직렬화
+            # (저장된 세션 상태나 직접 URL 접속 경로는 잠금 없이 병렬로 진행)
+            async with self._popup_lock:
+                popup_page = await self._open_popup_from_menu(context)
             
             # 방법 1이 실패했다면 방법 2: 직접 팝업 URL 접속
             if popup_page is None:
@@ -216,179 +388,612 @@ class HIRACrawler:
                 
                 # referer 설정하여 팝업 URL 접속
                 await popup_page.goto(self.popup_url, 
-                                    wait_until='networkidle', 
-                                    timeout=30000,
+                                    wait_until='domcontentloaded', 
+                                    timeout=15000,
                                     referer=self.main_url)
+                try:
+                    await popup_page.wait_for_selector(self.selectors['search_input'], timeout=15000)
+                except PlaywrightTimeoutError:
+                    logger.warning("검색 입력창 표시 대기 시간 초과. 계속 진행...")
             
-            # 다운로드 이벤트 리스너 추가
-            popup_page.on('download', self._handle_download)
-            
-            return popup_page
+            return self._prepare_popup_page(popup_page)
             
         except Exception as e:
             logger.error(f"팝업 페이지 열기 실패: {e}")
             raise
+
+    async def _open_popup_from_menu(self, context: BrowserContext) -> Optional[Page]:
+        """
+        메인 페이지의 메뉴를 클릭해 팝업 페이지 열기
+        
+        Args:
+            context: 브라우저 컨텍스트
+            
+        Returns:
+            팝업 페이지 객체 (실패 시 None)
+        """
+        # 방법 1: 메인 페이지에서 팝업 열기 시도
+        # 메인 페이지는 처음 한 번만 접속 (다시 이동하면 다른 워커 팝업의 Nexacro 세션이 끊긴다)
+        if self.main_page is None or self.main_page.is_closed():
+            self.main_page = await context.new_page()
+            self._main_page_has_popups = False
+            logger.info(f"메인 페이지 접속: {self.main_url}")
+            await self.main_page.goto(self.main_url, wait_until='domcontentloaded', timeout=15000)
+        main_page = self.main_page
+        
+        # 심사기준 종합서비스 또는 색인분류 검색 메뉴 후보를 하나의 로케이터로 합쳐 보이는 첫 메뉴를 한 번에 찾음
+        menu_link = None
+        for selector in MENU_SELECTORS:
+            candidate = main_page.locator(f"{selector} >> visible=true")
+            menu_link = candidate if menu_link is None else menu_link.or_(candidate)
+        menu_link = menu_link.first
+        
+        popup_page = None
+        try:
+            # 고정 대기 대신 Nexacro가 메뉴를 그릴 때까지 대기
+            await menu_link.wait_for(state='visible', timeout=15000)
+            
+            # 팝업 페이지가 열릴 것을 기대
+            async with context.expect_page() as popup_info:
+                await menu_link.click()
+                
+            popup_page = await popup_info.value
+            await popup_page.wait_for_load_state('domcontentloaded', timeout=15000)
+            
+            # 검색 입력창이 나타날 때까지 대기하여 팝업이 정상 작동하는지 확인 (고정 대기 대신)
+            try:
+                search_input = popup_page.locator(self.selectors['search_input'])
+                await search_input.wait_for(state='visible', timeout=10000)
+                logger.info("팝업 페이지가 성공적으로 열렸습니다.")
+            except:
+                # 검색창이 나타나지 않으면 이 팝업은 실패한 것으로 간주
+                await popup_page.close()
+                popup_page = None
+                
+        except Exception as e:
+            logger.debug(f"메뉴 클릭으로 팝업 열기 실패: {e}")
+            popup_page = None
+        
+        # Nexacro 기반 웹사이트는 팝업이 메인 세션에 의존하므로 메인 페이지를 닫지 않음
+        # 이 메인 페이지에서 아직 아무 팝업도 열리지 않았을 때만 정리 (다른 워커 팝업이 있으면 유지)
+        if popup_page is not None:
+            self._main_page_has_popups = True
+            logger.info("Nexacro 세션 유지를 위해 메인 페이지를 열린 상태로 유지합니다.")
+        elif not self._main_page_has_popups:
+            await main_page.close()
+            logger.info("팝업 열기 실패로 메인 페이지를 닫았습니다.")
+        else:
+            logger.info("다른 워커 팝업의 세션을 위해 메인 페이지를 열린 상태로 유지합니다.")
+        
+        return popup_page
     
-    async def search_and_download(self, context: BrowserContext, page: Page, code: str) -> Dict:
+    async def _open_popup_with_saved_state(self, context: BrowserContext) -> Optional[Page]:
         """
-        특정 수가코드로 검색하고 엑셀 파일을 다운로드한다.
+        저장된 세션 상태로 팝업 주소에 바로 접속한다
+        
+        Returns:
+            검색 입력창까지 뜬 팝업 페이지 (세션이 만료되어 실패하면 None)
+        """
+        popup_page = await context.new_page()
+        try:
+            await popup_page.goto(self.popup_url, wait_until='domcontentloaded', timeout=15000, referer=self.main_url)
+            await popup_page.locator(self.selectors['search_input']).wait_for(state='visible', timeout=5000)
+            logger.info("저장된 세션으로 팝업 페이지에 바로 접속했습니다.")
+            return popup_page
+        except Exception as e:
+            logger.info(f"저장된 세션으로 팝업 접속 실패, 메인 페이지 메뉴로 진행: {e}")
+            await popup_page.close()
+            return None
+    
+    def _prepare_popup_page(self, popup_page: Page) -> Page:
+        """열린 팝업 페이지에 응답 리스너, 기본 대기 시간, 반복 사용할 Locator를 준비한다"""
+        # 다운로드는 expect_download로만 받아 save_download에서 한 번만 저장한다
+        
+        # 요청 과다 응답을 감시하여 조회 속도 조절
+        popup_page.on('response', self._on_response)
+        
+        # 검색/다운로드 동작의 기본 대기 시간과 반복 사용할 Locator 준비
+        popup_page.set_default_timeout(10000)
+        self._page_locators[popup_page] = {
+            name: popup_page.locator(selector) for name, selector in self.selectors.items()
+        }
+        popup_page.on('close', lambda closed_page: self._page_locators.pop(closed_page, None))
+        
+        return popup_page
+    
+    def _on_response(self, response):
+        """
+        HIRA가 요청 과다(429/503)로 응답하면 조회 속도를 절반으로 줄이고 지수 백오프를 건다
+        
+        같은 백오프 구간 안에 몰려 온 응답은 한 번으로 보고, 리미터는 새로 만들지 않고 그대로 둔 채 속도만 낮춘다.
+        """
+        if response.status not in THROTTLE_STATUSES or 'biz.hira.or.kr' not in response.url:
+            return
+        if time.monotonic() < self._backoff_until:
+            return
+        
+        self._throttle_count += 1
+        new_rate = max(MIN_RATE_LIMIT, self._rate * 0.5)
+        self._set_rate(new_rate)
+        
+        backoff = 2 ** min(self._throttle_count, 6)
+        self._backoff_until = max(self._backoff_until, time.monotonic() + backoff)
+        logger.warning(f"요청 과다 응답({response.status}) - 조회 속도를 초당 {new_rate:.2f}회로 줄이고 {backoff}초 대기합니다.")
+    
+    def _set_rate(self, rate: float):
+        """
+        공유 리미터의 초당 허용 횟수를 바꾼다 (버킷에 쌓인 사용량은 유지)
+        
+        순간 허용량(max_rate)은 그대로 두고 기간을 늘려 속도를 낮추므로 초당 1회 미만으로도 줄일 수 있다.
+        aiolimiter는 누수 속도를 생성 시 계산해 두므로 함께 갱신한다.
+        """
+        self._rate = rate
+        self.limiter.time_period = self.limiter.max_rate / rate
+        self.limiter._rate_per_sec = rate
+    
+    async def _wait_for_backoff(self):
+        """요청 과다 응답 이후의 백오프 시간이 남아 있으면 기다린다"""
+        delay = self._backoff_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    async def search_and_download(self, context: BrowserContext, page: Page, code: str) -> Tuple[Dict, Optional[Download]]:
+        """
+        특정 수가코드로 검색하고 엑셀 다운로드를 시작한다.
+        
+        파일 저장은 save_download가 따로 처리하므로 다운로드가 시작되면 바로 돌아온다.
         
         Args:
             page: Playwright 페이지 객체
             code: 수가코드
             
         Returns:
-            처리 결과 딕셔너리
+            (처리 결과 딕셔너리, 저장할 다운로드 객체 또는 None) 튜플
         """
         result = {
             'code': code,
             'success': False,
             'error': None,
             'filename': None,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': time.time()  # epoch 초, CSV 기록 시 ISO 문자열로 변환
         }
+        download = None
         
         try:
-            logger.info(f"수가코드 '{code}' 처리 시작")
+            logger.debug("수가코드 '%s' 처리 시작", code)
             
-            # 팝업 페이지 상태 확인 및 재접속
-            try:
-                page = await self.ensure_popup_page(context, page)
-            except Exception as e:
-                logger.error(f"팝업 페이지 확인/재접속 실패: {e}")
-                result['error'] = f"팝업 페이지 접근 실패: {str(e)}"
-                return result
-            
-            # 1. 검색 입력창에 수가코드 입력
-            search_input = page.locator(self.selectors['search_input'])
-            await search_input.wait_for(state='visible', timeout=10000)
-            
-            # 기존 텍스트 지우고 새 코드 입력
-            await search_input.clear()
-            await search_input.fill(code)
-            await asyncio.sleep(0.5)
-            
-            logger.info(f"검색어 입력 완료: {code}")
+            # 타임아웃/연결 끊김 같은 일시적 오류는 지수 백오프로 재시도
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(SEARCH_RETRY_ATTEMPTS),
+                wait=wait_exponential(multiplier=1, max=10),
+                retry=retry_if_exception_type(TRANSIENT_ERRORS),
+                before_sleep=self._log_retry,
+                reraise=True
+            ):
+                with attempt:
+                    # 팝업 페이지 상태 확인 및 재접속 (재시도 전 닫힌 팝업도 다시 연다)
+                    try:
+                        page = await self.ensure_popup_page(context, page)
+                    except Exception as e:
+                        logger.error(f"팝업 페이지 확인/재접속 실패: {e}")
+                        result['error'] = f"팝업 페이지 접근 실패: {str(e)}"
+                        return result, None
+                    
+                    # 재시도도 한 번의 조회이므로 시도마다 백오프를 확인하고 리미터 토큰을 받는다
+                    await self._wait_for_backoff()
+                    async with self.limiter:
+                        download = await self._search_and_download_once(page, code, result)
             
-            # 2. 조회 버튼 클릭
-            search_button = page.locator(self.selectors['search_button'])
-            await search_button.wait_for(state='visible', timeout=10000)
+        except Exception as e:
+            logger.error(f"수가코드 '{code}' 처리 중 오류 발생: {e}")
+            result['error'] = str(e)
+        
+        return result, download
+    
+    def _log_retry(self, retry_state):
+        """검색 재시도 전 실패 원인을 남긴다"""
+        logger.warning(f"일시적 오류로 검색 재시도 ({retry_state.attempt_number}/{SEARCH_RETRY_ATTEMPTS}): {retry_state.outcome.exception()}")
+    
+    async def _search_and_download_once(self, page: Page, code: str, result: Dict) -> Optional[Download]:
+        """
+        수가코드 검색과 엑셀 다운로드 시작을 한 번 시도한다
+        
+        검색 단계의 일시적 오류는 그대로 올려 재시도하게 하고,
+        엑셀 버튼/조회 결과 없음 같은 결과는 result['error']에 기록한다.
+        
+        Returns:
+            시작된 다운로드 객체 (다운로드할 수 없으면 None)
+        """
+        download = None
+        locators = self._page_locators[page]
+        
+        # 1. 검색 입력창에 수가코드 입력 (대기 시간은 페이지 기본값 10초)
+        search_input = locators['search_input']
+        await search_input.wait_for(state='visible')
+        
+        # 기존 텍스트를 지우고 새 코드 입력 (fill이 기존 값을 대체하고, 다음 동작은 Playwright가 자동 대기)
+        await search_input.fill(code)
+        
+        logger.debug("검색어 입력 완료: %s", code)
+        
+        # 2. 조회 버튼 클릭
+        search_button = locators['search_button']
+        
+        # 3. 조회 결과 응답이 올 때까지 대기 (click은 버튼 표시/활성화를 자동 대기)
+        try:
+            async with page.expect_response(is_search_response, timeout=15000):
+                await search_button.click()
+        except PlaywrightTimeoutError:
+            logger.debug("수가코드 '%s': 조회 응답 대기 시간 초과", code)
+        
+        logger.debug("조회 버튼 클릭 완료")
+        
+        # 4. 엑셀 저장 버튼 확인 및 클릭
+        excel_button = locators['excel_button']
+        
+        try:
+            # 엑셀 버튼이 나타날 때까지 대기 (활성화는 click이 자동 대기)
+            await excel_button.wait_for(state='visible')
             
-            # 버튼이 활성화될 때까지 대기
-            await search_button.wait_for(state='enabled', timeout=5000)
-            await search_button.click()
+            # 다운로드 시작
+            async with page.expect_download(timeout=30000) as download_info:
+                await excel_button.click()
+                
+            download = await download_info.value
             
-            logger.info("조회 버튼 클릭 완료")
+        except Exception as e:
+            # 엑셀 버튼이 비활성화되어 있거나 조회 결과가 없는 경우
+            logger.debug("수가코드 '%s': 다운로드 불가 - %s", code, e)
+            result['error'] = f"다운로드 불가: {str(e)}"
             
-            # 3. 로딩 대기 (조회 결과가 나타날 때까지)
-            await asyncio.sleep(3)
+            # 조회 결과 없음 메시지와 엑셀 버튼 상태를 한 번의 evaluate로 확인
+            try:
+                state = await page.evaluate(SEARCH_STATE_JS, [self.selectors['excel_button'], NO_DATA_TEXT])
+                if state['noData']:
+                    result['error'] = "조회 결과 없음"
+                    logger.debug("수가코드 '%s': 조회 결과 없음", code)
+                elif not state['enabled']:
+                    result['error'] = "다운로드 불가: 엑셀 버튼 비활성화"
+            except Exception as e:
+                logger.debug("조회 결과 상태 확인 실패: %s", e)
+        
+        return download
+    
+    async def save_download(self, result: Dict, download: Download) -> Dict:
+        """
+        시작된 엑셀 다운로드를 수가코드가 포함된 파일명으로 저장하고 결과를 갱신한다.
+        
+        Args:
+            result: search_and_download가 만든 처리 결과 딕셔너리
+            download: 다운로드 객체
             
-            # 4. 엑셀 저장 버튼 확인 및 클릭
-            excel_button = page.locator(self.selectors['excel_button'])
+        Returns:
+            갱신된 처리 결과 딕셔너리
+        """
+        try:
+            # 파일명 생성 (수가코드 포함)
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            filename = f"{result['code']}_{timestamp}_{download.suggested_filename}"
+            filepath = self.download_dir / filename
             
+            # 파일 저장 (같은 파일시스템이면 브라우저 임시 파일을 복사 없이 이동, 아니면 복사)
+            src = await download.path()
             try:
-                # 엑셀 버튼이 나타나고 활성화될 때까지 대기
-                await excel_button.wait_for(state='visible', timeout=10000)
-                await excel_button.wait_for(state='enabled', timeout=5000)
-                
-                # 다운로드 시작 전 기존 다운로드 수 확인
-                downloads_before = len(list(self.download_dir.glob("*")))
-                
-                # 다운로드 시작
-                async with page.expect_download(timeout=30000) as download_info:
-                    await excel_button.click()
-                    
-                download = await download_info.value
-                
-                # 파일명 생성 (수가코드 포함)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"{code}_{timestamp}_{download.suggested_filename}"
-                filepath = self.download_dir / filename
-                
-                # 파일 저장
+                os.replace(src, filepath)
+            except OSError:
                 await download.save_as(filepath)
-                
-                result['success'] = True
-                result['filename'] = filename
-                logger.info(f"다운로드 성공: {filename}")
-                
-            except Exception as e:
-                # 엑셀 버튼이 비활성화되어 있거나 조회 결과가 없는 경우
-                logger.warning(f"수가코드 '{code}': 다운로드 불가 - {str(e)}")
-                result['error'] = f"다운로드 불가: {str(e)}"
-                
-                # 조회 결과가 없는지 확인
-                try:
-                    # Nexacro 기반 웹사이트에서 "조회된 데이터가 없습니다" 메시지 확인
-                    no_data_msg = page.locator("text=조회된 데이터가 없습니다")
-                    if await no_data_msg.is_visible():
-                        result['error'] = "조회 결과 없음"
-                        logger.info(f"수가코드 '{code}': 조회 결과 없음")
-                except:
-                    pass
+            
+            result['success'] = True
+            result['filename'] = filename
+            logger.debug("다운로드 성공: %s", filename)
             
         except Exception as e:
-            logger.error(f"수가코드 '{code}' 처리 중 오류 발생: {e}")
-            result['error'] = str(e)
+            logger.warning("수가코드 '%s': 파일 저장 실패 - %s", result['code'], e)
+            result['error'] = f"파일 저장 실패: {str(e)}"
         
         return result
     
-    async def run(self):
+    def load_seen_codes(self) -> set:
+        """이전 실행에서 다운로드에 성공한 수가코드를 읽는다."""
+        if not self.seen_path.exists():
+            return set()
+        
+        try:
+            with open(self.seen_path, newline='', encoding='utf-8-sig') as f:
+                return {row['code'] for row in csv.DictReader(f)}
+        except Exception as e:
+            logger.warning(f"완료 기록 읽기 실패, 처음부터 진행: {e}")
+            return set()
+    
+    def open_results_file(self) -> Path:
+        """결과 CSV 파일을 열고 헤더를 기록한다."""
+        self.results_file = self.download_dir / f"{self.results_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        self._results_fh = open(self.results_file, 'w', newline='', encoding='utf-8-sig')
+        self._results_writer = csv.DictWriter(self._results_fh, fieldnames=RESULT_FIELDNAMES)
+        self._results_writer.writeheader()
+        self._results_fh.flush()
+        
+        # 완료 기록은 이어서 추가 (처음 만들 때만 헤더 기록)
+        is_new = not self.seen_path.exists()
+        self._seen_fh = open(self.seen_path, 'a', newline='', encoding='utf-8-sig')
+        self._seen_writer = csv.writer(self._seen_fh)
+        if is_new:
+            self._seen_writer.writerow(['code'])
+        
+        return self.results_file
+    
+    def write_result(self, result: Dict):
+        """처리 결과 한 건을 CSV에 바로 기록하고 건수를 갱신한다 (중단되어도 처리분 보존)."""
+        self._results_writer.writerow({**result, 'timestamp': datetime.fromtimestamp(result['timestamp']).isoformat()})
+        self._results_fh.flush()
+        self.processed_count += 1
+        if result['success']:
+            self.success_count += 1
+            self._seen_writer.writerow([result['code']])
+            self._seen_fh.flush()
+    
+    def close_results_file(self):
+        """결과 CSV 파일을 닫는다."""
+        if self._results_fh is not None:
+            self._results_fh.close()
+            self._results_fh = None
+            self._results_writer = None
+        
+        if self._seen_fh is not None:
+            self._seen_fh.close()
+            self._seen_fh = None
+            self._seen_writer = None
+    
+    async def run(self, codes: Optional[List[str]] = None):
         """
         크롤링 메인 실행 함수
+        
+        Args:
+            codes: 처리할 수가코드 목록 (None이면 엑셀 파일에서 읽음, 샤드 실행 시 나눠 받은 목록)
         """
         logger.info("HIRA 수가코드 크롤링 시작")
         
         try:
             # 1. 엑셀 파일에서 수가코드 읽기
-            codes = self.read_excel_codes()
+            if codes is None:
+                codes = self.read_excel_codes()
             
             if not codes:
                 logger.error("수가코드가 없습니다.")
                 return
             
-            # 2. 브라우저 설정
-            browser, context = await self.setup_browser()
+            # 이어받기를 켠 경우에만 이전 실행에서 이미 다운로드한 수가코드를 건너뜀
+            if self.resume:
+                seen_codes = self.load_seen_codes()
+                remaining = [code for code in codes if code not in seen_codes]
+                if len(remaining) < len(codes):
+                    logger.info(f"이미 다운로드한 수가코드 {len(codes) - len(remaining)}개를 건너뜁니다. ({self.seen_path})")
+                codes = remaining
+                
+                if not codes:
+                    logger.info("모든 수가코드가 이미 다운로드되었습니다.")
+                    return
+            
+            # 2. 풀에서 브라우저와 컨텍스트 받기 (이전 실행의 세션 상태 재사용)
+            browser, context = await self.pool.acquire()
+            
+            results_file = self.open_results_file()
+            logger.info(f"결과 파일 기록 시작: {results_file}")
             
             try:
-                # 3. 팝업 페이지 열기
-                page = await self.open_popup_page(context)
-                
-                # 4. 각 수가코드별 처리
                 total_codes = len(codes)
-                success_count = 0
+                worker_count = min(self.concurrency, total_codes)
                 
-                for idx, code in enumerate(codes, 1):
-                    logger.info(f"진행률: {idx}/{total_codes} ({idx/total_codes*100:.1f}%)")
-                    
-                    result = await self.search_and_download(context, page, code)
-                    self.results.append(result)
-                    
-                    
-                    if result['success']:
-                        success_count += 1
-                    
-                    # 다음 검색을 위한 대기
-                    await asyncio.sleep(2)
+                # 3. 워커 수만큼 팝업 페이지를 병렬로 미리 열기 (하나도 열리지 않으면 크롤링 중단)
+                opened = await asyncio.gather(
+                    *(self.open_popup_page(context) for _ in range(worker_count)),
+                    return_exceptions=True
+                )
+                pages = [p for p in opened if not isinstance(p, BaseException)]
+                if not pages:
+                    raise opened[0]
+                if len(pages) < worker_count:
+                    logger.warning(f"워커 팝업 {worker_count - len(pages)}개 준비 실패, 남은 {len(pages)}개 워커로 진행")
+                await self.pool.save_state(context)
+                
+                # 4. 수가코드 작업 큐를 여러 팝업 페이지(워커)가 나눠서 처리
+                queue: asyncio.Queue = asyncio.Queue()
+                for code in codes:
+                    queue.put_nowait(code)
+                
+                # 검색 워커가 넘긴 (결과, 다운로드)를 저장하고 기록하는 작성 큐
+                write_q: asyncio.Queue = asyncio.Queue()
+                
+                async def writer():
+                    """다운로드 파일을 저장하고 결과를 기록하는 작성 태스크 (None을 받으면 종료)"""
+                    while True:
+                        item = await write_q.get()
+                        if item is None:
+                            return
+                        
+                        result, download = item
+                        if download is not None:
+                            await self.save_download(result, download)
+                        
+                        # 결과 기록 (await 없이 한 번에 처리되므로 태스크 간 쓰기가 섞이지 않음)
+                        self.write_result(result)
+                        
+                        # 진행률은 PROGRESS_LOG_INTERVAL개 단위로만 출력
+                        done = self.processed_count
+                        if done % PROGRESS_LOG_INTERVAL == 0 or done == total_codes:
+                            logger.info("진행률: %d/%d (%.1f%%)", done, total_codes, done / total_codes * 100)
+                
+                async def worker(worker_page: Page):
+                    """팝업 페이지 하나를 재사용하며 큐의 수가코드를 검색하는 워커 (저장은 작성 태스크에 넘김)"""
+                    while True:
+                        try:
+                            code = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+                        
+                        # 팝업이 닫혔다면 다시 열어서 이후 수가코드에도 계속 사용
+                        try:
+                            worker_page = await self.ensure_popup_page(context, worker_page)
+                        except Exception as e:
+                            logger.debug("워커 팝업 재접속 실패: %s", e)
+                        
+                        # 조회 속도 제한과 요청 과다 백오프는 search_and_download가 시도마다 적용
+                        write_q.put_nowait(await self.search_and_download(context, worker_page, code))
+                
+                # 미리 열어 둔 팝업 페이지를 워커마다 하나씩 배정
+                logger.info(f"{len(pages)}개 워커로 병렬 처리 시작")
+                writers = [asyncio.create_task(writer()) for _ in range(DOWNLOAD_WRITER_COUNT)]
+                try:
+                    await asyncio.gather(*(worker(p) for p in pages))
+                finally:
+                    # 검색이 끝나면 남은 저장 작업을 마치고 작성 태스크 종료
+                    for _ in writers:
+                        write_q.put_nowait(None)
+                    await asyncio.gather(*writers)
                 
                 # 5. 결과 요약
-                logger.info(f"크롤링 완료: 전체 {total_codes}개 중 {success_count}개 성공")
+                logger.info(f"크롤링 완료: 전체 {total_codes}개 중 {self.success_count}개 성공")
                 
-                # 결과를 CSV로 저장
-                results_df = pd.DataFrame(self.results)
-                results_file = self.download_dir / f"crawling_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                results_df.to_csv(results_file, index=False, encoding='utf-8-sig')
+            finally:
+                self.close_results_file()
                 logger.info(f"결과 파일 저장: {results_file}")
                 
-            finally:
-                # 브라우저 정리
-                await context.close()
-                await browser.close()
+                # 브라우저는 닫지 않고 풀에 반납 (전용 풀이면 함께 정리)
+                await self.pool.release(browser, context)
+                if self._owns_pool:
+                    await self.pool.close()
                 
         except Exception as e:
             logger.error(f"크롤링 실행 중 오류: {e}")
             raise
 
+def shard_state_path(shard_id: int) -> str:
+    """샤드 프로세스가 단독으로 쓰는 세션 상태 파일 경로"""
+    stem, ext = os.path.splitext(STORAGE_STATE_PATH)
+    return f"{stem}_shard{shard_id}{ext}"
+
+
+def shard_seen_path(download_dir: str, shard_id: int) -> Path:
+    """샤드 프로세스가 단독으로 쓰는 완료 기록 파일 경로"""
+    return Path(download_dir) / f"seen_shard{shard_id}.csv"
+
+
+async def run_shard(excel_file_path: str, download_dir: str, shard_id: int, codes: List[str], rate_limit: float) -> str:
+    """
+    나눠 받은 수가코드만 처리하는 샤드 크롤러를 실행한다
+    
+    세션 상태, 완료 기록, 임시 다운로드 디렉토리는 샤드마다 따로 쓰고
+    공용 파일(seen.csv, hira_state.json)은 부모 프로세스가 합친다.
+    
+    Returns:
+        샤드 결과 CSV 파일 경로 (결과가 없으면 빈 문자열)
+    """
+    pool = BrowserPool(storage_state_path=shard_state_path(shard_id),
+                       downloads_path=Path(download_dir) / '.downloading' / f"shard{shard_id}")
+    crawler = HIRACrawler(excel_file_path, download_dir, rate_limit=rate_limit, pool=pool)
+    crawler.results_name = f"crawling_results_shard{shard_id}"
+    crawler.seen_path = shard_seen_path(download_dir, shard_id)
+    try:
+        await crawler.run(codes)
+    finally:
+        await pool.close()
+    return str(crawler.results_file) if crawler.results_file else ""
+
+
+def _run_shard_sync(args: Tuple) -> str:
+    """프로세스 풀 작업 함수 (샤드마다 독립된 이벤트 루프와 Chromium 사용)"""
+    return asyncio.run(run_shard(*args))
+
+
+def _merge_shard_seen(download_dir: str, shard_count: int):
+    """샤드별 완료 기록을 공용 seen.csv에 이어 붙이고 샤드 파일은 지운다"""
+    seen_path = Path(download_dir) / 'seen.csv'
+    is_new = not seen_path.exists()
+    with open(seen_path, 'a', newline='', encoding='utf-8-sig') as out:
+        writer = csv.writer(out)
+        if is_new:
+            writer.writerow(['code'])
+        for shard_id in range(shard_count):
+            shard_file = shard_seen_path(download_dir, shard_id)
+            if not shard_file.exists():
+                continue
+            with open(shard_file, newline='', encoding='utf-8-sig') as f:
+                writer.writerows([row['code']] for row in csv.DictReader(f))
+            shard_file.unlink()
+
+
+def _merge_shard_state(shard_count: int):
+    """샤드 세션 상태 중 하나를 공용 상태 파일로 옮기고 나머지는 지운다"""
+    promoted = False
+    for shard_id in range(shard_count):
+        state_path = shard_state_path(shard_id)
+        if not os.path.exists(state_path):
+            continue
+        if promoted:
+            os.remove(state_path)
+        else:
+            os.replace(state_path, STORAGE_STATE_PATH)
+            promoted = True
+
+
+def crawl_sharded(excel_file_path: str, download_dir: str = "./downloads", shards: int = 2,
+                  rate_limit: float = 10.0, resume: bool = False) -> Optional[Path]:
+    """
+    수가코드를 shards개로 나눠 프로세스별 HIRACrawler로 처리하고 결과 CSV를 하나로 합친다
+    
+    한 인터프리터가 구동할 수 있는 페이지 수의 한계를 넘기 위한 실행 방식이며,
+    전체 조회 속도는 rate_limit를 샤드 수로 나눠 유지한다.
+    
+    Returns:
+        합친 결과 CSV 파일 경로 (처리한 수가코드가 없으면 None)
+    """
+    crawler = HIRACrawler(excel_file_path, download_dir)
+    codes = crawler.read_excel_codes()
+    
+    # seen.csv는 부모 프로세스만 읽고 쓰므로 이어받기 필터링도 여기서 처리
+    if resume:
+        seen_codes = crawler.load_seen_codes()
+        codes = [code for code in codes if code not in seen_codes]
+    
+    chunks = [chunk for chunk in (codes[i::shards] for i in range(shards)) if chunk]
+    if not chunks:
+        logger.error("수가코드가 없습니다.")
+        return None
+    
+    logger.info(f"수가코드 {len(codes)}개를 {len(chunks)}개 프로세스로 나눠 처리합니다.")
+    shard_args = [(excel_file_path, download_dir, shard_id, chunk, rate_limit / len(chunks))
+                  for shard_id, chunk in enumerate(chunks)]
+    
+    # 각 샤드는 공용 세션 상태의 복사본에서 시작
+    if os.path.exists(STORAGE_STATE_PATH):
+        for shard_id in range(len(chunks)):
+            shutil.copyfile(STORAGE_STATE_PATH, shard_state_path(shard_id))
+    
+    # 이벤트 루프/스레드 상태를 물려받지 않도록 spawn 방식으로 프로세스 생성
+    try:
+        with ProcessPoolExecutor(max_workers=len(chunks), mp_context=multiprocessing.get_context('spawn')) as executor:
+            shard_files = [Path(f) for f in executor.map(_run_shard_sync, shard_args) if f]
+    finally:
+        _merge_shard_seen(download_dir, len(chunks))
+        _merge_shard_state(len(chunks))
+    
+    if not shard_files:
+        return None
+    
+    # 샤드별 결과 CSV를 헤더 하나로 합치기
+    merged_file = Path(download_dir) / f"crawling_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(merged_file, 'w', newline='', encoding='utf-8-sig') as out:
+        writer = csv.writer(out)
+        writer.writerow(RESULT_FIELDNAMES)
+        for shard_file in shard_files:
+            with open(shard_file, newline='', encoding='utf-8-sig') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                writer.writerows(reader)
+    
+    logger.info(f"샤드 결과 {len(shard_files)}개를 합쳤습니다: {merged_file}")
+    return merged_file
+
 async def main():
     """
     메인 실행 함수
@@ -396,9 +1001,15 @@ async def main():
     # 설정
     excel_file = "수가코드목록_1.xlsx"  # 엑셀 파일 경로
     download_directory = "./downloads"   # 다운로드 디렉토리
+    shards = 1                           # 2 이상이면 수가코드를 나눠 여러 프로세스에서 실행
+    resume = False                       # True면 이전 실행에서 다운로드한 수가코드(seen.csv)를 건너뜀
     
     # 크롤러 실행
-    crawler = HIRACrawler(excel_file, download_directory)
+    if shards > 1:
+        await asyncio.to_thread(crawl_sharded, excel_file, download_directory, shards, resume=resume)
+        return
+    
+    crawler = HIRACrawler(excel_file, download_directory, resume=resume)
     await crawler.run()
 
 if __name__ == "__main__":
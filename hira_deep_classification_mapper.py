@@ -6,53 +6,271 @@ HIRA 요양기관 업무포털 깊은 계층 색인분류 추출 크롤러
 import asyncio
 import logging
 import csv
+import json
+import os
 import re
+import sys
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Locator
+from hira_base import ALLOWED_STYLESHEET_HOST, BLOCKED_RESOURCE_TYPES, INPUT_VALUE_JS
+
+# 로깅 설정 (터미널에서 실행할 때만 화면 출력, 비대화형 실행에서는 TTY 쓰기로 막히지 않도록 파일에만 기록)
+_log_handlers: List[logging.Handler] = [logging.FileHandler('hira_deep_classification.log', encoding='utf-8')]
+if sys.stderr.isatty():
+    _log_handlers.append(logging.StreamHandler())
 
-# 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hira_deep_classification.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+    handlers=_log_handlers
 )
 logger = logging.getLogger(__name__)
 
+# 분류 텍스트에서 코드를 분리하는 정규식 (모듈 로드 시 한 번만 컴파일)
+CODE_PAREN_RE = re.compile(r'\(([A-Z][0-9]*)\)$')      # "요양급여비용산정기준(행위)(A)" 마지막 괄호 코드
+CODE_WORD_RE = re.compile(r'\b([A-Z][0-9]*)\b')        # 단어 단위 영문+숫자 코드
+CODE_PAREN_ANY_RE = re.compile(r'\([A-Z][0-9]*\)')     # 명칭에서 지울 괄호 코드
+
+# 분류 항목이 아닌 그리드 텍스트 (헤더/공백)
+SKIP_TEXTS = frozenset(['분류명(분류코드)', '', ' ', '　'])
+
+# 결과 CSV 컬럼
+CSV_FIELDNAMES = ('대분류코드', '대분류명', '중분류코드', '중분류명', '소분류코드', '소분류명', '자동입력코드', '전체텍스트')
+
+
+# CSV를 디스크에 반영하는 행 간격
+CSV_FLUSH_INTERVAL = 50
+
+# 분류 클릭 시 코드가 자동 입력되는 검색 입력 필드
+SEARCH_INPUT_SELECTOR = '#InfoBank_form_divMain_divWork1_edtSearchTxt_input'
+
+# 소분류 클릭 후 자동 입력 코드가 이전 값과 달라질 때까지 브라우저 안에서 50ms 간격으로 확인하고 값을 반환
+# (인자: [입력 필드 선택자, 클릭 전 값, 제한 시간(ms)], 시간 초과 시 현재 값)
+AUTO_CODE_AFTER_CLICK_JS = """
+async ([sel, prev, timeout]) => {
+    const deadline = Date.now() + timeout;
+    while (Date.now() < deadline) {
+        const inp = document.querySelector(sel);
+        if (inp && inp.value && inp.value.trim() !== prev) return inp.value.trim();
+        await new Promise(r => setTimeout(r, 50));
+    }
+    const inp = document.querySelector(sel);
+    return inp && inp.value ? inp.value.trim() : '';
+}
+"""
+
+# 레벨별 색인분류 그리드 행 (모달 안의 트리 그리드, 대분류 클릭은 grdIdxDiv2를, 중분류 클릭은 grdIdxDiv3을 채운다)
+LEVEL_ROW_SELECTORS = {
+    '대분류': '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv1_body div[id*="gridrow"]',
+    '중분류': '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv2_body div[id*="gridrow"]',
+    '소분류': '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv3_body div[id*="gridrow"]',
+}
+
+# 팝업의 색인분류검색 버튼과 모달 (Nexacro가 화면을 다 그렸는지 확인하는 신호)
+INDEX_BUTTON_SELECTOR = '#InfoBank_form_divMain_divWork1_btnIdxDiv'
+INDEX_MODAL_SELECTOR = '#InfoBank_RvStdInqIdxPL'
+
+# 클릭으로 채워지는 하위 그리드의 행 ID/텍스트 서명 (클릭 전 서명과 달라질 때까지 대기)
+# (GRID_SIGNATURE_JS 인자: 행 선택자, GRID_CHANGED_JS 인자: [행 선택자, 클릭 전 서명])
+GRID_SIGNATURE_BODY = """
+    let s = '';
+    document.querySelectorAll(sel).forEach(r => s += r.id + ':' + (r.textContent || '').slice(0, 20) + '|');
+"""
+GRID_SIGNATURE_JS = f"sel => {{{GRID_SIGNATURE_BODY} return s; }}"
+GRID_CHANGED_JS = f"([sel, sig]) => {{{GRID_SIGNATURE_BODY} return s !== sig; }}"
+
+# 행 ID로 찾은 그리드 행에 마우스 클릭 이벤트를 전달 (행이 없으면 false)
+DISPATCH_ROW_CLICK_JS = """
+(id) => {
+    const el = document.getElementById(id);
+    if (!el) return false;
+    for (const type of ['mousedown', 'mouseup', 'click']) {
+        el.dispatchEvent(new MouseEvent(type, {bubbles: true, cancelable: true}));
+    }
+    return true;
+}
+"""
+
+# 보이는 그리드 행의 ID/텍스트/위치를 한 번의 evaluate로 가져온다 (인자: [행 선택자, 최대 행 수])
+GRID_ROWS_JS = """
+([sel, limit]) => {
+    const out = [];
+    let i = 0;
+    for (const n of document.querySelectorAll(sel)) {
+        if (n.offsetParent === null) continue;
+        if (i >= limit) break;
+        const t = (n.textContent || '').trim();
+        if (t) out.push({id: n.id, text: t, i: i});
+        i++;
+    }
+    return out;
+}
+"""
+
+@dataclass(slots=True)
+class ClassificationRow:
+    """CSV 한 행 (행마다 딕셔너리를 만들지 않고 필드 순서대로 튜플로 기록)"""
+    major_code: str = ''
+    major_name: str = ''
+    mid_code: str = ''
+    mid_name: str = ''
+    minor_code: str = ''
+    minor_name: str = ''
+    auto_code: str = ''
+    full_text: str = ''
+    
+    def as_tuple(self) -> Tuple[str, ...]:
+        """CSV_FIELDNAMES 순서의 값 튜플"""
+        return (self.major_code, self.major_name, self.mid_code, self.mid_name,
+                self.minor_code, self.minor_name, self.auto_code, self.full_text)
+
 class HIRADeepClassificationMapper:
-    def __init__(self, output_dir: str = "./output"):
-        """깊은 계층 색인분류 추출 크롤러 초기화"""
+    def __init__(self, output_dir: str = "./output", concurrency: int = 5, resume: bool = True):
+        """
+        깊은 계층 색인분류 추출 크롤러 초기화
+        
+        Args:
+            output_dir: CSV 저장 디렉토리
+            concurrency: 대분류를 동시에 처리할 워커(브라우저 컨텍스트) 수
+            resume: 체크포인트에 기록된 완료 대분류를 건너뛸지 여부
+        """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.concurrency = max(1, concurrency)
         
         # HIRA 웹사이트 URL
         self.main_url = "https://biz.hira.or.kr/index.do"
         
-        # 분류 데이터 저장
-        self.classification_data: List[Dict] = []
+        # 분류 데이터는 수집하는 즉시 CSV에 기록 (메모리에 쌓지 않고 중단되어도 수집분 보존)
+        self.csv_path: Optional[Path] = None
+        self._csv_fh = None
+        self._writer = None
+        self.row_count = 0
+        self._level_counts: Counter = Counter()
+        
+        # Nexacro 세션 유지용 메인 페이지 참조 (컨텍스트별)
+        self.main_pages: Dict[BrowserContext, Page] = {}
+        
+        # 첫 팝업의 주소와 세션 상태 (추가 워커는 메뉴 클릭 없이 이 주소로 바로 접속)
+        self._popup_url: Optional[str] = None
+        self._storage_state: Optional[Dict] = None
+        
+        # 완료된 대분류 체크포인트 - 중단 후 재실행 시 이미 끝난 대분류는 건너뛰고 같은 CSV에 이어 씀
+        self.checkpoint_path = self.output_dir / 'hira_deep_ckpt.json'
+        self._resume_csv: Optional[Path] = None
+        self._done_majors: set = self._load_checkpoint() if resume else set()
         
-        # Nexacro 세션 유지용 메인 페이지 참조
-        self.main_page: Optional[Page] = None
+        # 자동 입력 코드 캐시 - (대분류, 중분류, 소분류)별 코드
+        # 체크포인트로 이어 쓰는 경우 그 CSV에서 자동 입력 코드를 미리 읽어 이미 본 소분류는 클릭하지 않는다
+        self._auto_code_cache: Dict[Tuple[str, str, str], str] = self._load_auto_codes() if self._resume_csv else {}
         
+        # (페이지, 레벨)별 보이는 그리드 행 Locator (행 ID가 없을 때 위치로 찾는 기준, 한 번만 생성)
+        self._row_locators: Dict[Tuple[Page, str], Locator] = {}
+        
+    def _load_checkpoint(self) -> set:
+        """체크포인트 파일에서 완료된 대분류 키와 이어 쓸 CSV를 읽는다"""
+        if not self.checkpoint_path.exists():
+            return set()
+        
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            
+            # 체크포인트가 가리키는 CSV가 없으면 완료 목록도 의미가 없으므로 처음부터 진행
+            resume_csv = self.output_dir / checkpoint['csv']
+            if not resume_csv.exists():
+                logger.warning(f"체크포인트의 CSV가 없어 처음부터 진행: {resume_csv}")
+                return set()
+            
+            done = set(checkpoint['done'])
+            self._resume_csv = resume_csv
+            logger.info(f"체크포인트 로드: 완료된 대분류 {len(done)}개는 건너뜁니다 ({self.checkpoint_path})")
+            return done
+        except Exception as e:
+            logger.warning(f"체크포인트 로드 실패, 처음부터 진행: {e}")
+            return set()
+    
+    def _save_checkpoint(self):
+        """완료된 대분류 키와 기록 중인 CSV 이름을 임시 파일에 쓴 뒤 교체하여 원자적으로 저장한다"""
+        tmp_path = self.checkpoint_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'csv': self.csv_path.name, 'done': sorted(self._done_majors)}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    def _clear_checkpoint(self):
+        """모든 대분류를 끝낸 실행의 체크포인트를 지운다 (다음 실행은 새 CSV로 처음부터 수집)"""
+        try:
+            self.checkpoint_path.unlink(missing_ok=True)
+            logger.info(f"전체 대분류 완료로 체크포인트 삭제: {self.checkpoint_path}")
+        except Exception as e:
+            logger.warning(f"체크포인트 삭제 실패: {e}")
+    
+    def _load_auto_codes(self) -> Dict[Tuple[str, str, str], str]:
+        """이어 쓸 CSV에서 (대분류, 중분류, 소분류) 코드별 자동 입력 코드를 읽는다 (코드가 모두 있는 행만)"""
+        auto_codes: Dict[Tuple[str, str, str], str] = {}
+        if self._resume_csv is None:
+            return auto_codes
+        
+        try:
+            with open(self._resume_csv, newline='', encoding='utf-8-sig') as f:
+                for row in csv.DictReader(f):
+                    key = (row['대분류코드'], row['중분류코드'], row['소분류코드'])
+                    if all(key) and row['자동입력코드']:
+                        auto_codes[key] = row['자동입력코드']
+        except Exception as e:
+            logger.warning(f"이어 쓸 CSV 읽기 실패 ({self._resume_csv}): {e}")
+        
+        if auto_codes:
+            logger.info(f"이전 실행에서 확인한 소분류 자동 입력 코드 {len(auto_codes)}개를 재사용합니다.")
+        return auto_codes
+    
+    @staticmethod
+    def _major_key(major_item: Dict) -> str:
+        """체크포인트 키 (코드가 없으면 텍스트로 구분)"""
+        return major_item['code'] or major_item['text']
+    
     async def setup_browser(self) -> tuple[Browser, BrowserContext]:
         """브라우저 설정 및 컨텍스트 생성"""
         playwright = await async_playwright().start()
         
+        # 동작 간 인위적 대기 없이 헤드리스로 실행 (단계별 디버깅이 필요하면 HIRA_SLOWMO(ms) 지정)
         browser = await playwright.chromium.launch(
-            headless=False,
-            slow_mo=1500,  # 더 느린 속도로 안정성 확보
-            args=['--disable-web-security', '--disable-features=VizDisplayCompositor']
+            headless=True,
+            slow_mo=int(os.getenv('HIRA_SLOWMO', '0')),
+            args=['--disable-gpu', '--disable-dev-shm-usage', '--no-sandbox']
         )
         
+        context = await self.create_context(browser)
+        
+        return browser, context
+    
+    async def create_context(self, browser: Browser, storage_state: Optional[Dict] = None) -> BrowserContext:
+        """공유 브라우저에서 독립된 컨텍스트(세션)를 생성한다 (세션 상태가 있으면 쿠키/스토리지를 이어받음)"""
         context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080}
+            viewport={'width': 1920, 'height': 1080},
+            storage_state=storage_state
         )
         
-        return browser, context
+        # 이미지/폰트/미디어 등 불필요한 리소스 차단
+        await context.route('**/*', self._block_unneeded_resources)
+        
+        return context
+    
+    async def _block_unneeded_resources(self, route):
+        """분류 추출에 필요 없는 리소스 요청을 차단한다 (HIRA 자체 스타일시트는 클릭 위치 계산을 위해 허용)"""
+        request = route.request
+        resource_type = request.resource_type
+        
+        if resource_type in BLOCKED_RESOURCE_TYPES and not (
+            resource_type == 'stylesheet' and ALLOWED_STYLESHEET_HOST in request.url
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
         
     async def setup_main_page(self, context: BrowserContext) -> Page:
         """메인 페이지 설정 및 세션 확보"""
@@ -62,12 +280,15 @@ class HIRADeepClassificationMapper:
             page = await context.new_page()
             await page.goto(self.main_url, wait_until='networkidle', timeout=30000)
             
-            # Nexacro 애플리케이션 로딩 대기
+            # 고정 대기 대신 Nexacro가 메뉴를 그릴 때까지 대기
             logger.info("Nexacro 메인 애플리케이션 로딩 대기...")
-            await asyncio.sleep(10)
+            menu_link = page.locator('text=심사기준 종합서비스')
+            try:
+                await menu_link.first.wait_for(state='visible', timeout=30000)
+            except Exception as e:
+                logger.warning(f"메인 메뉴 표시 대기 시간 초과: {e}")
             
             # 심사기준 종합서비스 메뉴 찾기
-            menu_link = page.locator('text=심사기준 종합서비스')
             if await menu_link.count() > 0:
                 logger.info("메뉴 링크 발견: text=심사기준 종합서비스")
                 
@@ -76,13 +297,17 @@ class HIRADeepClassificationMapper:
                     await menu_link.click()
                 
                 popup_page = await new_page_info.value
-                await popup_page.wait_for_load_state('networkidle', timeout=30000)
+                await popup_page.wait_for_load_state('domcontentloaded', timeout=30000)
                 
+                # 색인분류검색 버튼이 그려지면 팝업 애플리케이션 준비 완료
                 logger.info("Nexacro 팝업 애플리케이션 로딩 대기...")
-                await asyncio.sleep(10)
+                await popup_page.wait_for_selector(INDEX_BUTTON_SELECTOR, timeout=30000)
                 logger.info("팝업 페이지 로딩 완료")
                 
-                self.main_page = page  # 세션 유지를 위해 메인 페이지 보관
+                if self._popup_url is None:
+                    self._popup_url = popup_page.url
+                
+                self.main_pages[context] = page  # 세션 유지를 위해 메인 페이지 보관
                 return popup_page
             else:
                 logger.error("심사기준 종합서비스 메뉴를 찾을 수 없습니다.")
@@ -97,24 +322,18 @@ class HIRADeepClassificationMapper:
         try:
             logger.info("색인분류검색 모달 열기 시도...")
             
-            # DOM 완전 로딩 대기
-            await asyncio.sleep(3)
-            await page.wait_for_load_state('networkidle', timeout=10000)
-            
-            # 정확한 버튼 ID로 클릭
-            exact_button_id = '#InfoBank_form_divMain_divWork1_btnIdxDiv'
-            btn_element = page.locator(exact_button_id)
+            # 고정 대기 대신 정확한 버튼 ID가 그려질 때까지 대기 후 클릭
+            btn_element = page.locator(INDEX_BUTTON_SELECTOR)
+            await btn_element.wait_for(state='visible', timeout=10000)
             
             if await btn_element.count() > 0:
                 logger.info("색인분류검색 버튼 발견!")
                 await btn_element.click()
-                await asyncio.sleep(3)
                 
-                # 모달 열림 확인
-                modal_check = '#InfoBank_RvStdInqIdxPL'
-                if await page.locator(modal_check).count() > 0:
-                    logger.info("색인분류검색 모달이 성공적으로 열렸습니다")
-                    return True
+                # 모달이 화면에 나타날 때까지 대기
+                await page.wait_for_selector(INDEX_MODAL_SELECTOR, state='visible', timeout=10000)
+                logger.info("색인분류검색 모달이 성공적으로 열렸습니다")
+                return True
             
             logger.error("색인분류검색 버튼을 찾을 수 없습니다")
             return False
@@ -124,132 +343,136 @@ class HIRADeepClassificationMapper:
             return False
     
     async def get_input_field_code(self, page: Page) -> str:
-        """검색 입력 필드에서 자동 입력된 코드를 가져온다"""
+        """검색 입력 필드에서 자동 입력된 코드를 가져온다 (보이는지 확인과 값 읽기를 한 번의 evaluate로)"""
         try:
-            input_selector = '#InfoBank_form_divMain_divWork1_edtSearchTxt_input'
-            search_input = page.locator(input_selector)
-            
-            if await search_input.is_visible():
-                value = await search_input.input_value()
-                return value.strip() if value else ""
+            return await page.evaluate(INPUT_VALUE_JS, SEARCH_INPUT_SELECTOR)
         except Exception as e:
             logger.debug(f"입력 필드 코드 가져오기 실패: {e}")
         return ""
     
     async def extract_current_level_items(self, page: Page, level_name: str) -> List[Dict]:
-        """현재 레벨의 고유한 분류 항목들을 추출한다"""
+        """level_name('대분류'/'중분류'/'소분류') 그리드에서 고유한 분류 항목들을 추출한다"""
         try:
-            logger.info(f"{level_name} 항목 추출 시작...")
+            logger.debug("%s 항목 추출 시작...", level_name)
             
-            # 그리드 요소들 찾기
-            tree_selector = '#InfoBank_RvStdInqIdxPL_form_grdIdxDiv1_body div[id*="gridrow"]:visible'
-            elements = page.locator(tree_selector)
-            count = await elements.count()
+            # 해당 레벨 그리드의 보이는 행을 한 번에 가져오기 (행마다 Locator로 묻지 않음, 최대 50개까지 확인)
+            rows = await page.evaluate(GRID_ROWS_JS, [LEVEL_ROW_SELECTORS[level_name], 50])
             
-            if count == 0:
+            if not rows:
                 logger.warning(f"{level_name} 항목을 찾을 수 없습니다.")
                 return []
             
-            logger.info(f"총 {count}개 요소 발견")
+            logger.debug("총 %d개 요소 발견", len(rows))
             
             # 고유한 텍스트만 추출 (중복 제거)
             unique_items = []
-            seen_texts = set()
+            seen_hashes: set = set()  # 긴 텍스트 대신 해시값만 보관 (충돌로 항목이 빠질 확률은 무시할 수준)
             
-            for i in range(min(count, 50)):  # 최대 50개까지 확인
+            for row in rows:
                 try:
-                    element = elements.nth(i)
-                    if not await element.is_visible():
-                        continue
-                    
-                    text = await element.text_content()
-                    if not text or not text.strip():
-                        continue
-                    
-                    text = text.strip()
+                    i = row['i']
+                    text = row['text']
                     
                     # 의미없는 텍스트 필터링
-                    skip_patterns = ['분류명(분류코드)', '', ' ', '　']
-                    if text in skip_patterns:
+                    if text in SKIP_TEXTS:
                         continue
                     
                     # 이미 본 텍스트는 건너뛰기
-                    if text in seen_texts:
+                    text_hash = hash(text)
+                    if text_hash in seen_hashes:
                         continue
                     
-                    seen_texts.add(text)
+                    seen_hashes.add(text_hash)
                     
                     # 코드와 명칭 분리
                     code = ""
                     name = text
                     
                     # 괄호 안의 코드 추출 (예: "요양급여비용산정기준(행위)(A)")
-                    paren_match = re.search(r'\\(([A-Z][0-9]*)\\)$', text)
+                    paren_match = CODE_PAREN_RE.search(text)
                     if paren_match:
                         code = paren_match.group(1)
                         name = text[:paren_match.start()].strip()
                     else:
                         # 다른 패턴으로 코드 찾기
-                        code_match = re.search(r'\\b([A-Z][0-9]*)\\b', text)
+                        code_match = CODE_WORD_RE.search(text)
                         if code_match:
                             code = code_match.group(1)
-                            name = re.sub(r'\\([A-Z][0-9]*\\)', '', text).strip()
+                            name = CODE_PAREN_ANY_RE.sub('', text).strip()
                     
                     unique_items.append({
                         'text': text,
                         'code': code,
                         'name': name,
-                        'element': element,
-                        'index': i
+                        'id': row['id'],
+                        'index': i,
+                        'level': level_name
                     })
                     
-                    logger.debug(f"{level_name} 항목 추가: '{text}' (코드: {code})")
+                    logger.debug("%s 항목 추가: '%s' (코드: %s)", level_name, text, code)
                     
                 except Exception as e:
-                    logger.debug(f"요소 {i} 처리 실패: {e}")
+                    logger.debug("요소 %s 처리 실패: %s", i, e)
                     continue
             
-            logger.info(f"{level_name} 고유 항목 {len(unique_items)}개 추출 완료")
+            logger.info("%s 고유 항목 %d개 추출 완료", level_name, len(unique_items))
             return unique_items
             
         except Exception as e:
             logger.error(f"{level_name} 항목 추출 실패: {e}")
             return []
     
-    async def click_item_safely(self, element: Locator, item_name: str) -> bool:
-        """안전하게 항목을 클릭한다"""
+    async def click_item_safely(self, page: Page, item: Dict, item_name: str) -> bool:
+        """
+        안전하게 항목을 클릭한다
+        
+        Nexacro 그리드 행은 JavaScript 이벤트 전달이 거의 항상 통하므로 행 ID로 먼저 전달하고,
+        행을 찾지 못했을 때만 짧은 시간 제한의 강제 클릭으로 대체한다.
+        """
+        try:
+            if item['id'] and await page.evaluate(DISPATCH_ROW_CLICK_JS, item['id']):
+                return True
+        except Exception as e:
+            logger.debug(f"{item_name} JavaScript 클릭 실패, 강제 클릭 시도: {e}")
+        
         try:
-            # 1차: 일반 클릭
-            await element.click(timeout=5000)
+            await self._item_locator(page, item).click(force=True, timeout=1500)
             return True
         except Exception as e:
-            logger.warning(f"{item_name} 일반 클릭 실패, 강제 클릭 시도")
-            try:
-                # 2차: 강제 클릭
-                await element.click(force=True, timeout=5000)
-                return True
-            except Exception as e2:
-                logger.warning(f"{item_name} 강제 클릭도 실패, JavaScript 클릭 시도")
-                try:
-                    # 3차: JavaScript 클릭
-                    await element.evaluate('element => element.click()')
-                    return True
-                except Exception as e3:
-                    logger.error(f"{item_name} 모든 클릭 방법 실패: {e3}")
-                    return False
+            logger.error(f"{item_name} 클릭 실패: {e}")
+            return False
+    
+    async def wait_for_auto_code(self, page: Page, prev_code: str, timeout_ms: int = 3000) -> str:
+        """소분류 클릭 후 컨텐츠 업데이트 대기와 자동 입력 코드 읽기를 한 번의 evaluate로 처리한다"""
+        try:
+            return await page.evaluate(AUTO_CODE_AFTER_CLICK_JS, [SEARCH_INPUT_SELECTOR, prev_code, timeout_ms])
+        except Exception as e:
+            logger.debug(f"자동 입력 코드 대기 실패: {e}")
+            return ""
     
-    async def wait_for_content_update(self, page: Page, timeout_ms: int = 5000):
-        """컨텐츠 업데이트를 기다린다"""
+    async def grid_signature(self, page: Page, level_name: str) -> str:
+        """클릭 전 level_name 그리드의 행 ID/텍스트 서명 (컨텐츠 업데이트 감지용)"""
+        return await page.evaluate(GRID_SIGNATURE_JS, LEVEL_ROW_SELECTORS[level_name])
+    
+    async def wait_for_content_update(self, page: Page, level_name: str, prev_signature: str, timeout_ms: int = 4000):
+        """
+        클릭으로 채워지는 level_name 그리드의 업데이트를 기다린다
+        
+        하트비트 요청이 계속되는 Nexacro 페이지에서는 networkidle이 쓸데없이 시간 초과되므로
+        하위 그리드 행이 다시 채워졌는지(서명이 바뀌었는지)를 직접 확인한다.
+        """
         try:
-            # 네트워크 요청 완료 대기
-            await page.wait_for_load_state('networkidle', timeout=timeout_ms)
-            await asyncio.sleep(2)  # 추가 대기
+            await page.wait_for_function(
+                GRID_CHANGED_JS, arg=[LEVEL_ROW_SELECTORS[level_name], prev_signature], timeout=timeout_ms
+            )
         except Exception as e:
             logger.debug(f"컨텐츠 업데이트 대기 중 타임아웃: {e}")
-            await asyncio.sleep(3)  # 기본 대기
+            await asyncio.sleep(0.5)  # 그리드가 그대로인 경우 짧게만 대기
     
-    async def traverse_deep_classification_tree(self, page: Page):
-        """깊은 계층 구조를 완전히 탐색한다"""
+    async def traverse_deep_classification_tree(self, browser: Browser, page: Page):
+        """깊은 계층 구조를 완전히 탐색한다 (대분류 작업 큐를 여러 워커가 나눠서 처리)"""
+        worker_contexts: List[BrowserContext] = []
+        
         try:
             logger.info("깊은 계층 색인분류 트리 순회 시작...")
             
@@ -262,164 +485,306 @@ class HIRADeepClassificationMapper:
             
             logger.info(f"총 {len(major_items)}개 대분류 발견")
             
-            # 각 대분류별로 순회
+            # 로케이터는 페이지에 묶여 있으므로 큐에는 텍스트/코드/명칭/위치만 넣는다
+            queue: asyncio.Queue = asyncio.Queue()
             for major_idx, major_item in enumerate(major_items):
+                # 이전 실행에서 끝난 대분류는 클릭하지 않고 건너뜀
+                if self._major_key(major_item) in self._done_majors:
+                    logger.info(f"완료된 대분류 건너뜀: {major_item['text']}")
+                    continue
+                snapshot = {key: major_item[key] for key in ('text', 'code', 'name', 'id', 'index', 'level')}
+                queue.put_nowait((major_idx, snapshot))
+            
+            if queue.empty():
+                logger.info("모든 대분류가 이미 완료되었습니다.")
+                self._clear_checkpoint()
+                return
+            
+            # 첫 번째 워커는 이미 열린 팝업 페이지를 재사용하고 나머지는 같은 세션 상태의 새 컨텍스트에서 팝업을 연다
+            worker_count = min(self.concurrency, queue.qsize())
+            if worker_count > 1:
+                self._storage_state = await page.context.storage_state()
+            logger.info(f"{worker_count}개 워커로 대분류 병렬 순회")
+            await asyncio.gather(
+                self._worker(browser, page, queue, len(major_items), worker_contexts),
+                *(self._worker(browser, None, queue, len(major_items), worker_contexts)
+                  for _ in range(worker_count - 1))
+            )
+            
+            logger.info(f"\\n깊은 계층 순회 완료. 총 {self.row_count}개 항목 수집")
+            
+            # 모든 대분류를 끝냈으면 다음 실행이 전부 건너뛰지 않도록 체크포인트 삭제
+            if all(self._major_key(major_item) in self._done_majors for major_item in major_items):
+                self._clear_checkpoint()
+            
+        except Exception as e:
+            logger.error(f"깊은 계층 순회 중 오류: {e}")
+        
+        finally:
+            for worker_context in worker_contexts:
+                self.main_pages.pop(worker_context, None)
                 try:
-                    major_code = major_item['code']
-                    major_name = major_item['name']
-                    major_text = major_item['text']
+                    await worker_context.close()
+                except Exception as e:
+                    logger.warning(f"워커 컨텍스트 정리 중 오류: {e}")
+    
+    async def open_worker_page(self, browser: Browser, worker_contexts: List[BrowserContext]) -> Optional[Page]:
+        """
+        같은 브라우저의 새 컨텍스트에서 팝업과 색인분류검색 모달을 연다
+        
+        첫 컨텍스트의 세션 상태를 이어받아 기억해 둔 팝업 주소로 바로 접속하고,
+        실패하면 메인 페이지 메뉴 클릭으로 세션을 새로 확보한다.
+        """
+        context = await self.create_context(browser, self._storage_state)
+        worker_contexts.append(context)
+        
+        page = None
+        if self._popup_url:
+            try:
+                page = await context.new_page()
+                await page.goto(self._popup_url, wait_until='domcontentloaded', timeout=30000)
+                await page.wait_for_selector(INDEX_BUTTON_SELECTOR, timeout=30000)
+            except Exception as e:
+                logger.warning(f"팝업 주소 직접 접속 실패, 메인 페이지 메뉴로 다시 시도: {e}")
+                if page is not None:
+                    await page.close()
+                page = None
+        
+        if page is None:
+            page = await self.setup_main_page(context)
+        
+        if not page or not await self.open_classification_modal(page):
+            return None
+        return page
+    
+    async def _worker(self, browser: Browser, page: Optional[Page], queue: asyncio.Queue,
+                      total_majors: int, worker_contexts: List[BrowserContext]):
+        """팝업 페이지 하나를 재사용하며 큐의 대분류를 꺼내 처리하는 워커"""
+        if page is None:
+            try:
+                page = await self.open_worker_page(browser, worker_contexts)
+            except Exception as e:
+                logger.warning(f"추가 워커 페이지 준비 실패: {e}")
+                page = None
+            if page is None:
+                logger.warning("추가 워커 페이지를 열지 못해 남은 워커로 진행합니다.")
+                return
+        
+        while True:
+            try:
+                major_idx, major_item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            
+            # 하위 중분류/소분류 순회를 끝낸 대분류만 체크포인트에 기록
+            if await self._process_major(page, major_idx, total_majors, major_item):
+                self._done_majors.add(self._major_key(major_item))
+                self._save_checkpoint()
+    
+    def _item_locator(self, page: Page, item: Dict) -> Locator:
+        """클릭할 때 항목 요소를 찾는다 (그리드 행 ID 우선, 없으면 항목 레벨 그리드의 보이는 행 중 위치)"""
+        if item['id']:
+            return page.locator(f'[id="{item["id"]}"]')
+        key = (page, item['level'])
+        rows = self._row_locators.get(key)
+        if rows is None:
+            rows = self._row_locators[key] = page.locator(f"{LEVEL_ROW_SELECTORS[item['level']]}:visible")
+        return rows.nth(item['index'])
+    
+    async def _process_major(self, page: Page, major_idx: int, total_majors: int, major_item: Dict) -> bool:
+        """
+        대분류 하나를 클릭하고 하위 중분류/소분류를 순회한다
+        
+        수집 행은 await 없이 한 번에 추가하므로 워커 간 잠금이 필요 없다.
+        
+        Returns:
+            대분류 순회를 끝까지 마쳤는지 여부 (체크포인트 기록용)
+        """
+        try:
+            major_code = major_item['code']
+            major_name = major_item['name']
+            major_text = major_item['text']
+            
+            logger.info(f"\\n=== [{major_idx+1}/{total_majors}] 대분류 처리: {major_text} ===")
+            
+            # 대분류 클릭 (중분류 그리드가 바뀔 때까지 대기)
+            prev_signature = await self.grid_signature(page, "중분류")
+            if not await self.click_item_safely(page, major_item, f"대분류 {major_text}"):
+                return False
+            
+            await self.wait_for_content_update(page, "중분류", prev_signature)
+            
+            # 2단계: 중분류 목록 추출
+            middle_items = await self.extract_current_level_items(page, "중분류")
+            
+            if not middle_items:
+                logger.warning(f"대분류 '{major_text}'에 중분류가 없습니다.")
+                # 대분류만 있는 경우도 저장
+                auto_code = await self.get_input_field_code(page)
+                self.write_row(ClassificationRow(
+                    major_code=major_code,
+                    major_name=major_name,
+                    auto_code=auto_code,
+                    full_text=major_text
+                ))
+                return True
+            
+            logger.info(f"  └ {len(middle_items)}개 중분류 발견")
+            
+            # 각 중분류별로 순회
+            for middle_idx, middle_item in enumerate(middle_items):
+                try:
+                    middle_code = middle_item['code']
+                    middle_name = middle_item['name']
+                    middle_text = middle_item['text']
                     
-                    logger.info(f"\\n=== [{major_idx+1}/{len(major_items)}] 대분류 처리: {major_text} ===")
+                    logger.info("    [%d/%d] 중분류 처리: %s", middle_idx + 1, len(middle_items), middle_text)
                     
-                    # 대분류 클릭
-                    if not await self.click_item_safely(major_item['element'], f"대분류 {major_text}"):
+                    # 중분류 클릭 (소분류 그리드가 바뀔 때까지 대기)
+                    prev_signature = await self.grid_signature(page, "소분류")
+                    if not await self.click_item_safely(page, middle_item, f"중분류 {middle_text}"):
                         continue
                     
-                    await self.wait_for_content_update(page)
+                    await self.wait_for_content_update(page, "소분류", prev_signature)
                     
-                    # 2단계: 중분류 목록 추출
-                    middle_items = await self.extract_current_level_items(page, "중분류")
+                    # 3단계: 소분류 목록 추출
+                    minor_items = await self.extract_current_level_items(page, "소분류")
                     
-                    if not middle_items:
-                        logger.warning(f"대분류 '{major_text}'에 중분류가 없습니다.")
-                        # 대분류만 있는 경우도 저장
+                    if not minor_items:
+                        logger.warning(f"중분류 '{middle_text}'에 소분류가 없습니다.")
+                        # 중분류까지만 있는 경우도 저장
                         auto_code = await self.get_input_field_code(page)
-                        self.classification_data.append({
-                            '대분류코드': major_code,
-                            '대분류명': major_name,
-                            '중분류코드': '',
-                            '중분류명': '',
-                            '소분류코드': '',
-                            '소분류명': '',
-                            '자동입력코드': auto_code,
-                            '전체텍스트': major_text
-                        })
+                        self.write_row(ClassificationRow(
+                            major_code=major_code,
+                            major_name=major_name,
+                            mid_code=middle_code,
+                            mid_name=middle_name,
+                            auto_code=auto_code,
+                            full_text=f"{major_text} > {middle_text}"
+                        ))
                         continue
                     
-                    logger.info(f"  └ {len(middle_items)}개 중분류 발견")
+                    logger.info("      └ %d개 소분류 발견", len(minor_items))
                     
-                    # 각 중분류별로 순회
-                    for middle_idx, middle_item in enumerate(middle_items):
+                    # 각 소분류별로 순회 (클릭 전 입력 필드 값과 비교해 바뀐 코드를 읽음)
+                    input_code = await self.get_input_field_code(page)
+                    log_minor = logger.isEnabledFor(logging.DEBUG)  # 항목 수가 가장 많은 루프이므로 로그 레벨을 한 번만 확인
+                    for minor_idx, minor_item in enumerate(minor_items):
                         try:
-                            middle_code = middle_item['code']
-                            middle_name = middle_item['name']
-                            middle_text = middle_item['text']
+                            minor_code = minor_item['code']
+                            minor_name = minor_item['name']
+                            minor_text = minor_item['text']
                             
-                            logger.info(f"    [{middle_idx+1}/{len(middle_items)}] 중분류 처리: {middle_text}")
+                            if log_minor:
+                                logger.debug("        [%d/%d] 소분류 처리: %s", minor_idx + 1, len(minor_items), minor_text)
                             
-                            # 중분류 클릭
-                            if not await self.click_item_safely(middle_item['element'], f"중분류 {middle_text}"):
-                                continue
+                            # 이미 확인한 소분류는 클릭 없이 기억해 둔 자동 입력 코드 사용
+                            cache_key = (major_code, middle_code, minor_code)
+                            auto_code = self._auto_code_cache.get(cache_key) if all(cache_key) else None
                             
-                            await self.wait_for_content_update(page)
-                            
-                            # 3단계: 소분류 목록 추출
-                            minor_items = await self.extract_current_level_items(page, "소분류")
+                            if auto_code is None:
+                                # 소분류 클릭
+                                if not await self.click_item_safely(page, minor_item, f"소분류 {minor_text}"):
+                                    continue
+                                
+                                # 자동 입력된 코드가 바뀔 때까지 대기하며 확인 (짧은 대기)
+                                auto_code = input_code = await self.wait_for_auto_code(page, input_code)
+                                if all(cache_key) and auto_code:
+                                    self._auto_code_cache[cache_key] = auto_code
                             
-                            if not minor_items:
-                                logger.warning(f"중분류 '{middle_text}'에 소분류가 없습니다.")
-                                # 중분류까지만 있는 경우도 저장
-                                auto_code = await self.get_input_field_code(page)
-                                self.classification_data.append({
-                                    '대분류코드': major_code,
-                                    '대분류명': major_name,
-                                    '중분류코드': middle_code,
-                                    '중분류명': middle_name,
-                                    '소분류코드': '',
-                                    '소분류명': '',
-                                    '자동입력코드': auto_code,
-                                    '전체텍스트': f"{major_text} > {middle_text}"
-                                })
-                                continue
+                            # 완전한 분류 데이터 저장
+                            self.write_row(ClassificationRow(
+                                major_code=major_code,
+                                major_name=major_name,
+                                mid_code=middle_code,
+                                mid_name=middle_name,
+                                minor_code=minor_code,
+                                minor_name=minor_name,
+                                auto_code=auto_code,
+                                full_text=f"{major_text} > {middle_text} > {minor_text}"
+                            ))
                             
-                            logger.info(f"      └ {len(minor_items)}개 소분류 발견")
+                            if log_minor:
+                                logger.debug("          └ 저장: %s - %s", auto_code or minor_code, minor_name)
                             
-                            # 각 소분류별로 순회
-                            for minor_idx, minor_item in enumerate(minor_items):
-                                try:
-                                    minor_code = minor_item['code']
-                                    minor_name = minor_item['name']
-                                    minor_text = minor_item['text']
-                                    
-                                    logger.info(f"        [{minor_idx+1}/{len(minor_items)}] 소분류 처리: {minor_text}")
-                                    
-                                    # 소분류 클릭
-                                    if not await self.click_item_safely(minor_item['element'], f"소분류 {minor_text}"):
-                                        continue
-                                    
-                                    await self.wait_for_content_update(page, 3000)  # 짧은 대기
-                                    
-                                    # 자동 입력된 코드 확인
-                                    auto_code = await self.get_input_field_code(page)
-                                    
-                                    # 완전한 분류 데이터 저장
-                                    classification_data = {
-                                        '대분류코드': major_code,
-                                        '대분류명': major_name,
-                                        '중분류코드': middle_code,
-                                        '중분류명': middle_name,
-                                        '소분류코드': minor_code,
-                                        '소분류명': minor_name,
-                                        '자동입력코드': auto_code,
-                                        '전체텍스트': f"{major_text} > {middle_text} > {minor_text}"
-                                    }
-                                    
-                                    self.classification_data.append(classification_data)
-                                    
-                                    logger.info(f"          └ 저장: {auto_code or minor_code} - {minor_name}")
-                                    
-                                except Exception as e:
-                                    logger.error(f"소분류 '{minor_text}' 처리 실패: {e}")
-                                    continue
-                                    
                         except Exception as e:
-                            logger.error(f"중분류 '{middle_text}' 처리 실패: {e}")
+                            logger.error(f"소분류 '{minor_text}' 처리 실패: {e}")
                             continue
                             
                 except Exception as e:
-                    logger.error(f"대분류 '{major_text}' 처리 실패: {e}")
+                    logger.error(f"중분류 '{middle_text}' 처리 실패: {e}")
                     continue
             
-            logger.info(f"\\n깊은 계층 순회 완료. 총 {len(self.classification_data)}개 항목 수집")
-            
+            return True
+                    
         except Exception as e:
-            logger.error(f"깊은 계층 순회 중 오류: {e}")
+            logger.error(f"대분류 '{major_text}' 처리 실패: {e}")
+            return False
+    
+    def open_csv(self):
+        """결과 CSV 파일을 열고 헤더를 기록한다 (체크포인트가 가리키는 CSV가 있으면 헤더 없이 이어 씀)"""
+        if self._resume_csv is not None and self._resume_csv.exists():
+            self.csv_path = self._resume_csv
+            self._csv_fh = open(self.csv_path, 'a', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._csv_fh)
+            logger.info(f"이전 실행 CSV에 이어서 기록: {self.csv_path}")
+            return
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.csv_path = self.output_dir / f"hira_deep_classification_{timestamp}.csv"
+        
+        self._csv_fh = open(self.csv_path, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.writer(self._csv_fh)
+        self._writer.writerow(CSV_FIELDNAMES)
+        
+        logger.info(f"CSV 파일 생성: {self.csv_path}")
+    
+    def write_row(self, row: ClassificationRow):
+        """
+        분류 행 하나를 CSV에 기록하고 수집 통계를 갱신한다
+        
+        await 없이 한 번에 처리되므로 워커 간 쓰기가 섞이지 않는다.
+        """
+        self._writer.writerow(row.as_tuple())
+        self.row_count += 1
+        
+        if not row.mid_code:
+            self._level_counts['대분류만'] += 1
+        elif not row.minor_code:
+            self._level_counts['중분류까지'] += 1
+        else:
+            self._level_counts['소분류까지'] += 1
+        
+        if self.row_count % CSV_FLUSH_INTERVAL == 0:
+            self._csv_fh.flush()
     
-    async def save_to_csv(self) -> str:
-        """수집된 데이터를 CSV 파일로 저장한다"""
+    def close_csv(self) -> str:
+        """
+        결과 CSV 파일을 닫고 수집 통계를 출력한다
+        
+        Returns:
+            저장된 파일 경로 (저장된 행이 없으면 빈 문자열)
+        """
+        if self._csv_fh is None:
+            return ""
+        
         try:
-            if not self.classification_data:
+            self._csv_fh.close()
+            self._csv_fh = None
+            self._writer = None
+            
+            if not self.row_count:
                 logger.warning("저장할 데이터가 없습니다.")
                 return ""
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"hira_deep_classification_{timestamp}.csv"
-            filepath = self.output_dir / filename
-            
-            with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                fieldnames = ['대분류코드', '대분류명', '중분류코드', '중분류명', '소분류코드', '소분류명', '자동입력코드', '전체텍스트']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for data in self.classification_data:
-                    writer.writerow(data)
-            
-            logger.info(f"CSV 파일 저장 완료: {filepath}")
-            logger.info(f"총 {len(self.classification_data)}개 항목 저장")
+            logger.info(f"CSV 파일 저장 완료: {self.csv_path}")
+            logger.info(f"총 {self.row_count}개 항목 저장")
             
             # 통계 출력
-            levels = {'대분류만': 0, '중분류까지': 0, '소분류까지': 0}
-            for item in self.classification_data:
-                if not item['중분류코드']:
-                    levels['대분류만'] += 1
-                elif not item['소분류코드']:
-                    levels['중분류까지'] += 1
-                else:
-                    levels['소분류까지'] += 1
-            
+            levels = {level: self._level_counts[level] for level in ('대분류만', '중분류까지', '소분류까지')}
             logger.info(f"수집 통계: {levels}")
             
-            return str(filepath)
+            return str(self.csv_path)
             
         except Exception as e:
             logger.error(f"CSV 저장 실패: {e}")
@@ -434,6 +799,9 @@ class HIRADeepClassificationMapper:
             # 브라우저 설정
             browser, context = await self.setup_browser()
             
+            # 결과 CSV 열기 (수집하면서 바로 기록)
+            self.open_csv()
+            
             # 메인 페이지 설정 및 팝업 페이지 열기
             popup_page = await self.setup_main_page(context)
             if not popup_page:
@@ -444,17 +812,17 @@ class HIRADeepClassificationMapper:
                 return
             
             # 깊은 계층 구조 탐색
-            await self.traverse_deep_classification_tree(popup_page)
-            
-            # CSV 파일 저장
-            saved_file = await self.save_to_csv()
-            if saved_file:
-                logger.info(f"깊은 계층 분류 정보 저장 완료: {saved_file}")
+            await self.traverse_deep_classification_tree(browser, popup_page)
             
         except Exception as e:
             logger.error(f"실행 중 오류 발생: {e}")
         
         finally:
+            # CSV 파일 닫기
+            saved_file = self.close_csv()
+            if saved_file:
+                logger.info(f"깊은 계층 분류 정보 저장 완료: {saved_file}")
+            
             if browser:
                 logger.info("브라우저 정리 완료")
                 await browser.close()
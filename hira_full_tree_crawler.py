@@ -4,15 +4,19 @@ HIRA 요양기관 업무포털 색인분류 트리 전체 탐색 크롤러
 """
 
 import asyncio
+import csv
+import itertools
 import logging
 import os
-import time
+import re
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Set
-import pandas as pd
+from typing import IO, Deque, List, Dict, Optional, Set, Tuple
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Locator
 
+from hira_base import ALLOWED_STYLESHEET_HOST, BLOCKED_RESOURCE_TYPES
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -24,16 +28,204 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 클릭으로 생긴 DOM 변화가 잠잠해질 때까지 대기 (인자: [조용한 시간(ms), 최대 대기(ms)])
+# 클릭 전에 감시를 시작해야 하므로 클릭과 동시에 실행하고, 변화가 없으면 최대 대기 후 false
+DOM_SETTLE_JS = """
+([quiet, timeout]) => new Promise(resolve => {
+    let timer = null;
+    const done = (changed) => { obs.disconnect(); clearTimeout(timer); clearTimeout(limit); resolve(changed); };
+    const obs = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(() => done(true), quiet);
+    });
+    obs.observe(document.body, {childList: true, subtree: true, characterData: true});
+    const limit = setTimeout(() => done(false), timeout);
+})
+"""
+
+# 페이지 기본 대기 시간 (ms)
+DEFAULT_TIMEOUT_MS = 10000
+NAVIGATION_TIMEOUT_MS = 30000
+
+# 엑셀 다운로드 시작 또는 조회 결과 없음 메시지를 기다리는 최대 시간 (ms)
+DOWNLOAD_WAIT_TIMEOUT_MS = 30000
+NO_DATA_SELECTOR = "text=조회된 데이터가 없습니다"
+
+# Chromium 실행 인자 (컨테이너 환경 호환 + 자동화 표시 제거)
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-features=VizDisplayCompositor'
+]
+
+# 결과 CSV 컬럼 (process_final_classification 결과 딕셔너리 키)
+RESULT_FIELDNAMES = ['path', 'success', 'error', 'filename', 'timestamp']
+
+# 디버깅 시 색인분류 버튼 후보로 볼 키워드
+SEARCH_TERMS_RE = re.compile(r'색인|분류|classification|index|검색|search', re.IGNORECASE)
+
+# 디버깅 시 살펴볼 클릭 가능 요소
+DEBUG_CLICKABLE_SELECTOR = 'button, input[type="button"], input[type="submit"], *[onclick]'
+
+# 클릭 가능 요소의 속성을 한 번에 가져온다 (요소별 IPC 대신)
+DEBUG_ELEMENT_INFO_JS = """
+els => ({
+    total: els.length,
+    items: els.slice(0, 20).map(e => ({
+        tag: e.tagName,
+        text: e.textContent || '',
+        cls: e.getAttribute('class') || '',
+        title: e.getAttribute('title') || '',
+        value: (typeof e.value === 'string' ? e.value : '') || e.getAttribute('value') || '',
+        onclick: e.getAttribute('onclick') || ''
+    }))
+})
+"""
+
+# 색인분류 검색 버튼 후보 (CSS 선택자, 포함해야 할 텍스트). 앞에서부터 시도
+# Playwright 전용 text=/:has-text() 선택자는 브라우저에서 한 번에 판별하도록 CSS + 텍스트 조건으로 옮겼다
+CLASSIFICATION_BUTTON_CANDIDATES = [
+    ('*', '색인분류 검색'),
+    ('*', '색인분류'),
+    ('button', '색인분류'),
+    ('button', '색인'),
+    ('input[value*="색인분류"]', None),
+    ('input[value*="색인"]', None),
+    ('[title*="색인분류"]', None),
+    ('[title*="색인"]', None),
+    ('[onclick*="classification"]', None),
+    ('[onclick*="색인"]', None),
+    ('[onclick*="index"]', None),
+    ('*[class*="btn"]', '색인'),
+    ('span', '색인분류'),
+    ('div', '색인분류'),
+    ('td', '색인분류'),
+    # Nexacro 특수 선택자
+    ('[nexacroid*="btn"][title*="색인"]', None),
+    ('[id*="btn"]', '색인'),
+    # 이미지 버튼일 경우
+    ('img[alt*="색인"]', None),
+    ('img[title*="색인"]', None)
+]
+
+# 후보를 순서대로 확인해 처음 보이는 요소에 표시 속성을 달고 후보 번호를 돌려준다 (없으면 -1)
+# 텍스트 조건은 그 텍스트를 포함한 요소 중 가장 안쪽 요소만 인정한다 (바깥 컨테이너 클릭 방지)
+PROBE_CLASSIFICATION_BUTTON_JS = """
+candidates => {
+    document.querySelectorAll('[data-hira-probe]').forEach(e => e.removeAttribute('data-hira-probe'));
+    const visible = e => e.offsetParent !== null;
+    for (let i = 0; i < candidates.length; i++) {
+        const [css, text] = candidates[i];
+        let hits = Array.from(document.querySelectorAll(css)).filter(visible);
+        if (text) {
+            hits = hits.filter(e => (e.textContent || '').includes(text));
+            hits = hits.filter(e => !hits.some(o => o !== e && e.contains(o)));
+        }
+        if (hits.length) {
+            hits[0].setAttribute('data-hira-probe', '1');
+            return i;
+        }
+    }
+    return -1;
+}
+"""
+
+# 트리 요소 후보 선택자 (앞에서부터 시도)
+TREE_SELECTORS = [
+    'div[class*="tree"] span',
+    'div[class*="node"] span',
+    'td[class*="tree"]',
+    'span[onclick]',
+    'div[onclick]',
+    'a[href*="#"]',
+    '[class*="folder"]',
+    '[class*="leaf"]'
+]
+
+# 선택자에 걸린 요소 중 보이고 텍스트가 있는 것의 위치/텍스트를 한 번에 가져온다
+VISIBLE_TEXT_NODES_JS = """
+els => els
+    .map((e, i) => ({i: i, text: (e.textContent || '').trim(), visible: e.offsetParent !== null}))
+    .filter(r => r.visible && r.text)
+"""
+
+class BrowserPool:
+    """
+    여러 번의 실행(run) 사이에 Playwright 드라이버와 Chromium 브라우저를 띄워 둔 채 재사용하는 풀
+    
+    get_browser로 (처음 한 번만 실행된) 브라우저를 받고, 실행이 끝나면 release_context로 컨텍스트만 닫는다.
+    브라우저는 헤드리스 모드별로 따로 띄우므로 모드가 다른 크롤러가 서로의 브라우저를 닫지 않는다.
+    """
+    def __init__(self):
+        self._pw = None
+        self._browsers: Dict[bool, Browser] = {}
+        self._launch_lock = asyncio.Lock()
+        
+    async def get_browser(self, headless: bool = True) -> Browser:
+        """
+        헤드리스 모드에 맞는 브라우저를 돌려준다 (없거나 연결이 끊어졌으면 새로 실행)
+        
+        Args:
+            headless: 헤드리스 모드 여부
+        """
+        async with self._launch_lock:
+            browser = self._browsers.get(headless)
+            if browser is None or not browser.is_connected():
+                if self._pw is None:
+                    self._pw = await async_playwright().start()
+                
+                browser = await self._pw.chromium.launch(
+                    headless=headless,
+                    args=CHROMIUM_ARGS
+                )
+                self._browsers[headless] = browser
+            return browser
+    
+    async def release_context(self, context: BrowserContext):
+        """컨텍스트만 닫고 브라우저는 다음 실행을 위해 남겨 둔다"""
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"컨텍스트 정리 중 오류: {e}")
+    
+    async def close(self):
+        """모든 브라우저를 닫고 Playwright 드라이버를 종료한다"""
+        for browser in self._browsers.values():
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"브라우저 정리 중 오류: {e}")
+        self._browsers.clear()
+        
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+
+
+# 같은 프로세스의 크롤러들이 함께 쓰는 기본 브라우저 풀
+BROWSER_POOL = BrowserPool()
+
+
 class HIRAFullTreeCrawler:
-    def __init__(self, download_dir: str = "./downloads"):
+    def __init__(self, download_dir: str = "./downloads", debug: bool = False, concurrency: int = 4,
+                 pool: Optional[BrowserPool] = None, headless: bool = True):
         """
         HIRA 색인분류 트리 전체 탐색 크롤러 초기화
         
         Args:
             download_dir: 다운로드 디렉토리 경로
+            debug: 모달을 처음 열 때 페이지 버튼 요소를 분석해 출력할지 여부
+            concurrency: 대분류를 나눠 탐색할 동시 컨텍스트 수
+            pool: 브라우저 풀 (없으면 모듈 기본 풀을 사용하며, 실행 후에도 브라우저는 닫지 않음)
+            headless: 헤드리스 모드 여부 (환경 변수 HIRA_HEADED=1이면 화면에 띄움)
         """
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(exist_ok=True)
+        self._download_dir_str = str(self.download_dir)
+        
+        # 다운로드 파일명 일련번호 (시각 대신 실행 시작 시각 + 번호로 파일명 생성)
+        self._download_seq = itertools.count(1)
         
         # HIRA 웹사이트 URL 및 CSS 선택자
         self.popup_url = "https://biz.hira.or.kr/popup.ndo?formname=qya_bizcom%3A%3AInfoBank.xfdl&framename=InfoBank"
@@ -42,76 +234,150 @@ class HIRAFullTreeCrawler:
             'search_button': '#InfoBank_form_divMain_divWork1_btnS0001',
             'excel_button': '#InfoBank_form_divMain_divWork1_btnE0001TextBoxElement',
             'search_input': '#InfoBank_form_divMain_divWork1_edtSearchTxt_input',
+            'modal': '#InfoBank_RvStdInqIdxPL',
             'modal_close_btn': 'text=닫기'
         }
         
         # 수집된 분류 경로 및 결과 추적
-        self.collected_paths: Set[str] = set()  # 중복 방지용
-        self.results: List[Dict] = []
+        self.collected_paths: Set[Tuple[str, ...]] = set()  # 중복 방지용 (소분류까지의 경로)
+        self.visited_prefixes: Set[Tuple[str, ...]] = set()  # 하위 탐색을 마친 대/중분류 경로
         self.total_downloads = 0
         
+        # 결과는 메모리에 모으지 않고 발견/처리 즉시 파일에 기록 (건수만 유지)
+        self.result_count = 0
+        self.success_count = 0
+        self._run_ts: Optional[str] = None
+        self._results_file: Optional[IO] = None
+        self._results_writer: Optional[csv.DictWriter] = None
+        self._paths_file: Optional[IO] = None
+        
+        # 여러 컨텍스트가 대분류를 나눠 탐색하므로 공유 결과는 락으로 보호
+        self.concurrency = max(1, concurrency)
+        self._results_lock = asyncio.Lock()
+        
+        # 트리 요소를 찾은 선택자 (세션 동안 같은 선택자가 통하므로 다음 탐색부터 먼저 시도)
+        self._winning_tree_selector: Optional[str] = None
+        
+        # 페이지 디버깅은 한 번만 수행 (모달을 다시 열 때마다 반복하지 않음)
+        self.debug = debug
+        self._debug_done = False
+        
+        self.pool = pool or BROWSER_POOL
+        self.headless = headless and os.environ.get('HIRA_HEADED') != '1'
+        
     async def setup_browser(self) -> tuple[Browser, BrowserContext, Page]:
-        """브라우저 설정 및 페이지 생성"""
-        playwright = await async_playwright().start()
+        """브라우저 설정 및 페이지 생성 (브라우저는 풀에서 재사용)"""
+        browser = await self.pool.get_browser(self.headless)
         
-        browser = await playwright.chromium.launch(
-            headless=False,
-            slow_mo=1000,  # 클릭 동작을 명확히 보기 위해 1초 대기
-            args=['--disable-web-security', '--disable-features=VizDisplayCompositor']  # Nexacro 호환성
-        )
+        context, page = await self.new_context_page(browser)
         
+        return browser, context, page
+    
+    async def new_context_page(self, browser: Browser) -> tuple[BrowserContext, Page]:
+        """공유 브라우저에서 독립된 컨텍스트와 페이지를 만든다."""
         context = await browser.new_context(
             accept_downloads=True,
             viewport={'width': 1920, 'height': 1080}
         )
         
+        # 이미지/폰트/미디어/외부 스타일시트 요청 차단
+        await context.route('**/*', self._block_unneeded_resources)
+        
         page = await context.new_page()
         page.on('download', self._handle_download)
         
-        return browser, context, page
+        # 기본 대기 시간은 페이지 단위로 한 번만 설정 (호출마다 timeout을 넘기지 않음)
+        page.set_default_timeout(DEFAULT_TIMEOUT_MS)
+        page.set_default_navigation_timeout(NAVIGATION_TIMEOUT_MS)
+        
+        return context, page
+    
+    async def _block_unneeded_resources(self, route):
+        """트리 탐색/다운로드에 필요 없는 리소스 요청을 차단한다 (HIRA 자체 스타일시트는 가시성 판단/클릭 위치 계산을 위해 허용)"""
+        request = route.request
+        resource_type = request.resource_type
+        
+        if resource_type in BLOCKED_RESOURCE_TYPES and not (
+            resource_type == 'stylesheet' and ALLOWED_STYLESHEET_HOST in request.url
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def open_popup_page(self, page: Page) -> bool:
+        """HIRA 팝업 페이지에 접속하고 색인분류 모달까지 연다."""
+        logger.info(f"웹사이트 접속: {self.popup_url}")
+        await page.goto(self.popup_url, wait_until='domcontentloaded')
+        
+        # Nexacro 애플리케이션 로딩 대기 (고정 대기 대신 검색 입력창 표시로 확인)
+        logger.info("Nexacro 애플리케이션 로딩 대기...")
+        try:
+            # 기본 검색 입력창이 나타날 때까지 대기
+            search_input = page.locator(self.selectors['search_input'])
+            await search_input.wait_for(state='visible', timeout=15000)
+            logger.info("기본 페이지 로딩 완료")
+        except:
+            logger.warning("기본 검색 입력창을 찾을 수 없음. 계속 진행...")
+        
+        # 색인분류 모달 열기
+        if not await self.open_classification_modal(page):
+            logger.error("색인분류 모달 열기 실패")
+            return False
+        return True
     
     async def _handle_download(self, download):
         """다운로드 이벤트 핸들러"""
         try:
             self.total_downloads += 1
-            filename = f"classification_{self.total_downloads:04d}_{int(time.time())}_{download.suggested_filename}"
-            await download.save_as(self.download_dir / filename)
+            filename = f"classification_{self._run_ts}_{next(self._download_seq):05d}_{download.suggested_filename}"
+            await download.save_as(os.path.join(self._download_dir_str, filename))
             logger.info(f"파일 다운로드 완료: {filename}")
         except Exception as e:
             logger.error(f"다운로드 처리 실패: {e}")
     
+    async def click_and_settle(self, page: Page, element: Locator, timeout_ms: int = 5000, js_click: bool = False) -> bool:
+        """
+        요소를 클릭하고 그로 인한 DOM 변화가 끝날 때까지 기다린다 (고정 대기 대신)
+        
+        Args:
+            js_click: True면 Playwright 동작 가능성 검사 없이 브라우저에서 바로 click()을 호출 (이미 보이는 트리 노드용)
+        
+        Returns:
+            시간 안에 DOM 변화가 있었는지 여부
+        """
+        settle = asyncio.ensure_future(page.evaluate(DOM_SETTLE_JS, [200, timeout_ms]))
+        try:
+            if js_click:
+                await element.evaluate('el => el.click()')
+            else:
+                await element.click()
+        except Exception:
+            settle.cancel()
+            raise
+        try:
+            return await settle
+        except Exception as e:
+            logger.debug(f"DOM 변화 대기 실패: {e}")
+            return False
+    
     async def debug_page_elements(self, page: Page):
         """페이지의 모든 버튼 요소를 디버깅용으로 출력한다."""
         try:
             logger.info("=== 페이지 디버깅 시작 ===")
             
-            # 모든 버튼 요소 찾기
-            buttons = await page.locator('button, input[type="button"], input[type="submit"], *[onclick]').all()
-            logger.info(f"총 {len(buttons)}개의 클릭 가능 요소 발견")
+            # 모든 버튼 요소의 속성을 한 번에 가져오기
+            found = await page.eval_on_selector_all(DEBUG_CLICKABLE_SELECTOR, DEBUG_ELEMENT_INFO_JS)
+            logger.info(f"총 {found['total']}개의 클릭 가능 요소 발견")
             
-            for i, btn in enumerate(buttons[:20]):  # 처음 20개만 출력
-                try:
-                    text = await btn.text_content()
-                    tag_name = await btn.evaluate('el => el.tagName')
-                    classes = await btn.get_attribute('class') or ''
-                    onclick = await btn.get_attribute('onclick') or ''
-                    title = await btn.get_attribute('title') or ''
-                    value = await btn.get_attribute('value') or ''
-                    
-                    logger.info(f"[{i+1}] {tag_name} - Text: '{text}' | Class: '{classes}' | Title: '{title}' | Value: '{value}' | OnClick: '{onclick[:50]}...'")
-                    
-                    # 색인분류 관련 키워드 찾기
-                    search_terms = ['색인', '분류', 'classification', 'index', '검색', 'search']
-                    full_text = f"{text} {classes} {title} {value} {onclick}".lower()
-                    
-                    for term in search_terms:
-                        if term in full_text:
-                            logger.info(f"*** 색인분류 후보 발견: [{i+1}] '{term}' 포함 ***")
-                            break
-                            
-                except Exception as e:
-                    logger.debug(f"요소 [{i+1}] 분석 실패: {e}")
-                    
+            for i, info in enumerate(found['items']):  # 처음 20개만 출력
+                text, classes, title, value, onclick = info['text'], info['cls'], info['title'], info['value'], info['onclick']
+                logger.info(f"[{i+1}] {info['tag']} - Text: '{text}' | Class: '{classes}' | Title: '{title}' | Value: '{value}' | OnClick: '{onclick[:50]}...'")
+                
+                # 색인분류 관련 키워드 찾기
+                match = SEARCH_TERMS_RE.search(f"{text} {classes} {title} {value} {onclick}")
+                if match:
+                    logger.info(f"*** 색인분류 후보 발견: [{i+1}] '{match.group(0)}' 포함 ***")
+                
             logger.info("=== 페이지 디버깅 종료 ===")
             
         except Exception as e:
@@ -122,229 +388,221 @@ class HIRAFullTreeCrawler:
         try:
             logger.info("색인분류 검색 모달 열기 시도...")
             
-            # 디버깅: 페이지 요소 분석
-            await self.debug_page_elements(page)
-            
-            # 확장된 색인분류 검색 버튼 선택자
-            classification_selectors = [
-                'text=색인분류 검색',
-                'text=색인분류',
-                'button:has-text("색인분류")',
-                'button:has-text("색인")',
-                'input[value*="색인분류"]',
-                'input[value*="색인"]',
-                '[title*="색인분류"]',
-                '[title*="색인"]',
-                '[onclick*="classification"]',
-                '[onclick*="색인"]',
-                '[onclick*="index"]',
-                '*[class*="btn"]:has-text("색인")',
-                'span:has-text("색인분류")',
-                'div:has-text("색인분류")',
-                'td:has-text("색인분류")',
-                # Nexacro 특수 선택자
-                '[nexacroid*="btn"][title*="색인"]',
-                '[id*="btn"]:has-text("색인")',
-                # 이미지 버튼일 경우
-                'img[alt*="색인"]',
-                'img[title*="색인"]'
-            ]
+            # 디버깅: 페이지 요소 분석 (디버그 모드에서 처음 한 번만)
+            if (self.debug or logger.isEnabledFor(logging.DEBUG)) and not self._debug_done:
+                self._debug_done = True
+                await self.debug_page_elements(page)
             
-            for i, selector in enumerate(classification_selectors):
+            # 후보 선택자를 브라우저에서 한 번에 확인 (후보마다 count/is_visible IPC를 보내지 않음)
+            found = await page.evaluate(PROBE_CLASSIFICATION_BUTTON_JS, CLASSIFICATION_BUTTON_CANDIDATES)
+            if found >= 0:
+                css, text = CLASSIFICATION_BUTTON_CANDIDATES[found]
+                candidate = f"{css} (텍스트: {text})" if text else css
                 try:
-                    logger.info(f"[선택자 {i+1}/{len(classification_selectors)}] 시도: {selector}")
-                    
-                    btn = page.locator(selector).first
-                    
-                    # 요소 존재 확인
-                    if await btn.count() == 0:
-                        logger.debug(f"선택자 '{selector}': 요소 없음")
-                        continue
+                    # Nexacro 컨트롤은 Playwright의 활성화 판단이 맞지 않으므로 가시성만 확인된 요소를 바로 클릭
+                    await page.locator('[data-hira-probe]').first.click(timeout=1500, force=True)
+                    logger.info(f"색인분류 검색 버튼 클릭 성공: {candidate}")
                     
-                    # 요소 가시성 확인
-                    if not await btn.is_visible():
-                        logger.debug(f"선택자 '{selector}': 요소 비가시")
-                        continue
-                    
-                    # 요소 활성화 대기
+                    # 고정 대기 대신 모달이 화면에 나타날 때까지 대기
                     try:
-                        await btn.wait_for(state='enabled', timeout=3000)
-                    except:
-                        logger.debug(f"선택자 '{selector}': 요소 비활성")
-                        continue
-                    
-                    # 클릭 시도
-                    await btn.click()
-                    logger.info(f"색인분류 검색 버튼 클릭 성공: {selector}")
-                    await asyncio.sleep(5)  # 모달 로딩 대기
+                        await page.locator(self.selectors['modal']).wait_for(state='visible')
+                    except Exception as e:
+                        logger.warning(f"색인분류 모달 표시 대기 시간 초과. 계속 진행...: {e}")
                     return True
                     
                 except Exception as e:
-                    logger.debug(f"선택자 {selector} 시도 실패: {e}")
-                    continue
+                    logger.debug(f"선택자 {candidate} 클릭 실패: {e}")
             
-            # 모든 선택자 실패 시 별도 전략
-            logger.warning("기본 선택자로 버튼을 찾을 수 없음. 좌표 기반 클릭 시도...")
-            return await self.try_coordinate_click(page)
+            # 모든 선택자 실패 시 선택자가 낡은 것이므로 바로 드러낸다 (디버그 모드면 인스펙터에서 멈춤)
+            if self.debug:
+                logger.warning("색인분류 검색 버튼을 찾을 수 없음. 페이지를 일시 정지합니다...")
+                await page.pause()
+            raise RuntimeError("색인분류 검색 버튼을 찾을 수 없습니다. 버튼 선택자를 확인하세요.")
             
+        except RuntimeError:
+            raise
         except Exception as e:
             logger.error(f"색인분류 모달 열기 실패: {e}")
             return False
     
-    async def try_coordinate_click(self, page: Page) -> bool:
-        """좌표 기반으로 색인분류 버튼 클릭 시도"""
-        try:
-            # 일반적인 버튼 위치들을 시도해보기
-            button_coordinates = [
-                (100, 100),   # 좌상단
-                (200, 100),
-                (300, 100),
-                (100, 150),
-                (200, 150),
-                (300, 150),
-                (100, 200),
-                (200, 200),
-                (300, 200)
-            ]
-            
-            for x, y in button_coordinates:
-                try:
-                    logger.info(f"좌표 ({x}, {y}) 클릭 시도")
-                    await page.click(f'body', position={'x': x, 'y': y})
-                    await asyncio.sleep(2)
-                    
-                    # 모달이 열렸는지 확인 (기본적인 모달 요소 찾기)
-                    modal_selectors = ['div[class*="modal"]', 'div[class*="popup"]', 'div[class*="dialog"]']
-                    for modal_sel in modal_selectors:
-                        if await page.locator(modal_sel).is_visible():
-                            logger.info(f"좌표 ({x}, {y}) 클릭으로 모달 열기 성공")
-                            return True
-                            
-                except Exception as e:
-                    logger.debug(f"좌표 ({x}, {y}) 클릭 실패: {e}")
-                    continue
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"좌표 기반 클릭 실패: {e}")
-            return False
+    async def get_tree_texts(self, page: Page) -> List[str]:
+        """현재 보이는 트리 노드의 텍스트만 가져온다 (클릭하지 않을 때는 Locator를 만들지 않음)"""
+        _, nodes = await self._probe_tree_nodes(page)
+        return [node['text'] for node in nodes]
     
-    async def get_tree_elements(self, page: Page, level: str) -> List[Locator]:
-        """
-        트리에서 특정 레벨의 클릭 가능한 요소들을 가져온다.
-        
-        Args:
-            page: Playwright 페이지
-            level: 'major', 'middle', 'minor' 중 하나
-            
-        Returns:
-            클릭 가능한 요소 리스트
-        """
+    async def _probe_tree_nodes(self, page: Page) -> Tuple[Optional[Locator], List[Dict]]:
+        """트리 선택자 후보를 확인해 (선택자 Locator, 보이는 노드의 {i, text} 목록)을 돌려준다"""
         try:
-            # 다양한 선택자로 트리 요소 찾기
-            tree_selectors = [
-                'div[class*="tree"] span',
-                'div[class*="node"] span',
-                'td[class*="tree"]',
-                'span[onclick]',
-                'div[onclick]',
-                'a[href*="#"]',
-                '[class*="folder"]',
-                '[class*="leaf"]'
-            ]
+            # 지난번에 통한 선택자를 먼저 시도하고, 없으면 후보 선택자를 차례로 확인
+            tree_selectors = TREE_SELECTORS
+            if self._winning_tree_selector:
+                tree_selectors = [self._winning_tree_selector] + [
+                    sel for sel in TREE_SELECTORS if sel != self._winning_tree_selector
+                ]
             
-            elements = []
             for selector in tree_selectors:
                 try:
+                    # 보이는지 여부와 텍스트를 요소마다 묻지 않고 한 번에 확인
                     locators = page.locator(selector)
-                    count = await locators.count()
-                    
-                    for i in range(count):
-                        element = locators.nth(i)
-                        if await element.is_visible():
-                            # 텍스트가 있고 클릭 가능한 요소만 추가
-                            text = await element.text_content()
-                            if text and text.strip():
-                                elements.append(element)
+                    nodes = await locators.evaluate_all(VISIBLE_TEXT_NODES_JS)
                     
-                    if elements:
-                        logger.info(f"트리 요소 {len(elements)}개 발견 (선택자: {selector})")
-                        break
+                    if nodes:
+                        # 텍스트가 있고 클릭 가능한 요소만 반환
+                        logger.debug(f"트리 요소 {len(nodes)}개 발견 (선택자: {selector})")
+                        self._winning_tree_selector = selector
+                        return locators, nodes
                         
                 except Exception as e:
                     continue
             
-            return elements
+            return None, []
             
         except Exception as e:
             logger.error(f"트리 요소 가져오기 실패: {e}")
-            return []
+            return None, []
     
-    async def explore_classification_tree(self, page: Page, path: List[str] = None) -> None:
+    async def explore_classification_tree(self, page: Page, path: List[str] = None, root_filter: Optional[str] = None) -> None:
         """
-        색인분류 트리를 재귀적으로 탐색한다.
+        색인분류 트리를 명시적 스택으로 깊이 우선 탐색한다.
+        
+        노드를 클릭해 펼친 뒤 새로 나타난 노드를 자식으로 보고, 하위 탐색이 끝나면 같은 노드를 다시 클릭해 접는다.
+        모달을 다시 여는 것은 소분류 다운로드(모달을 닫아야 함) 뒤와 오류 복구 때뿐이다.
         
         Args:
             page: Playwright 페이지
-            path: 현재까지의 분류 경로
+            path: 탐색을 시작할 분류 경로 (이미 펼쳐진 상태)
+            root_filter: 지정하면 시작 레벨에서 이 텍스트의 노드만 탐색
         """
-        if path is None:
-            path = []
+        path = list(path or [])
+        level_names = ['대분류', '중분류', '소분류']
+        
+        # 이미 하위 탐색을 마친 경로면 다시 돌지 않음
+        if tuple(path) in self.visited_prefixes:
+            return
         
         try:
-            current_level = len(path)
-            level_names = ['대분류', '중분류', '소분류']
-            
-            if current_level >= 3:  # 소분류까지 도달
-                path_str = ' → '.join(path)
-                if path_str not in self.collected_paths:
-                    self.collected_paths.add(path_str)
-                    logger.info(f"분류 경로 완료: {path_str}")
-                    
-                    # 소분류 클릭 후 다운로드 시도
-                    await self.process_final_classification(page, path)
-                return
-            
-            logger.info(f"{level_names[current_level]} 탐색 중... (현재 경로: {' → '.join(path)})")
+            logger.info(f"{level_names[min(len(path), 2)]} 탐색 중... (현재 경로: {' → '.join(path)})")
             
             # 현재 레벨의 요소들 가져오기
-            elements = await self.get_tree_elements(page, level_names[current_level].lower())
-            
-            if not elements:
-                logger.warning(f"{level_names[current_level]} 요소를 찾을 수 없습니다.")
+            root_texts = await self.get_tree_texts(page)
+            if root_filter is not None:
+                root_texts = [text for text in root_texts if text == root_filter]
+            if not root_texts:
+                logger.warning(f"{level_names[min(len(path), 2)]} 요소를 찾을 수 없습니다.")
                 return
             
-            # 각 요소를 순차적으로 클릭하여 탐색
-            for i, element in enumerate(elements):
+            # 스택 프레임: (펼친 노드까지의 경로, 남은 자식 텍스트, 전체 자식 텍스트)
+            stack: List[Tuple[List[str], Deque[str], List[str]]] = [(path, deque(root_texts), root_texts)]
+            
+            while stack:
+                frame_path, remaining, children = stack[-1]
+                
+                if not remaining:
+                    stack.pop()
+                    # 하위 탐색을 마친 노드는 방문 처리하고, 자식이 아직 보이면 다시 클릭해 접는다 (시작 경로는 그대로 둠)
+                    if len(frame_path) > len(path):
+                        self.visited_prefixes.add(tuple(frame_path))
+                        if await self._any_tree_text_visible(page, children):
+                            await self._click_tree_node(page, frame_path[-1])
+                    continue
+                
+                element_text = remaining.popleft()
+                current_level = len(frame_path)
+                new_path = frame_path + [element_text]
+                
+                # 이미 수집한 소분류나 탐색을 마친 하위 트리는 클릭하지 않고 건너뜀
+                path_key = tuple(new_path)
+                if path_key in self.visited_prefixes or path_key in self.collected_paths:
+                    continue
+                
                 try:
-                    # 요소 텍스트 가져오기
-                    element_text = await element.text_content()
-                    if not element_text or not element_text.strip():
-                        continue
+                    logger.info(f"{level_names[current_level]}: '{element_text}' 클릭 시도")
                     
-                    element_text = element_text.strip()
-                    logger.info(f"{level_names[current_level]} [{i+1}/{len(elements)}]: '{element_text}' 클릭 시도")
+                    before = set(await self.get_tree_texts(page))
+                    if not await self._click_tree_node(page, element_text):
+                        logger.warning(f"{level_names[current_level]} '{element_text}' 요소를 찾을 수 없습니다.")
+                        continue
                     
-                    # 요소 클릭
-                    await element.click()
-                    await asyncio.sleep(2)  # 하위 요소 로딩 대기
+                    if len(new_path) >= 3:  # 소분류까지 도달
+                        path_str = ' → '.join(new_path)
+                        async with self._results_lock:
+                            is_new = path_key not in self.collected_paths
+                            if is_new:
+                                self.collected_paths.add(path_key)
+                                self._write_path(path_str)
+                        if is_new:
+                            logger.info(f"분류 경로 완료: {path_str}")
+                            
+                            # 소분류 클릭 후 다운로드 시도 (모달이 닫히므로 다시 열고 상위 경로만 복원)
+                            await self.process_final_classification(page, new_path)
+                            await self.restore_classification_path(page, stack)
+                        continue
                     
-                    # 다음 레벨로 재귀 탐색
-                    new_path = path + [element_text]
-                    await self.explore_classification_tree(page, new_path)
+                    # 클릭으로 새로 나타난 노드를 다음 레벨 자식으로 탐색
+                    new_children = [text for text in await self.get_tree_texts(page) if text not in before]
+                    if not new_children:
+                        logger.warning(f"{level_names[current_level + 1]} 요소를 찾을 수 없습니다. (경로: {' → '.join(new_path)})")
+                        continue
                     
-                    # 백트래킹: 상위 레벨로 돌아가기 위해 모달을 다시 열거나 상위 요소 클릭
-                    if current_level < 2:  # 대분류, 중분류인 경우만 백트래킹
-                        await self.reset_classification_state(page)
+                    stack.append((new_path, deque(new_children), new_children))
                     
                 except Exception as e:
                     logger.error(f"요소 '{element_text}' 처리 중 오류: {e}")
+                    # 오류가 났을 때만 모달을 다시 열어 상위 경로를 복원
+                    await self.reset_classification_state(page)
+                    await self.restore_classification_path(page, stack)
                     continue
                     
         except Exception as e:
             logger.error(f"트리 탐색 중 오류 발생: {e}")
     
+    async def _click_tree_node(self, page: Page, text: str) -> bool:
+        """보이는 트리 노드 중 텍스트가 같은 첫 노드를 클릭하고 DOM 변화를 기다린다"""
+        locators, nodes = await self._probe_tree_nodes(page)
+        for node in nodes:
+            if node['text'] == text:
+                # 클릭할 노드의 Locator만 만들고, 방금 보이는 것을 확인했으므로 JS로 바로 클릭
+                await self.click_and_settle(page, locators.nth(node['i']), js_click=True)
+                return True
+        return False
+    
+    async def _any_tree_text_visible(self, page: Page, texts: List[str]) -> bool:
+        """주어진 텍스트의 트리 노드가 하나라도 보이는지 확인"""
+        wanted = set(texts)
+        return any(text in wanted for text in await self.get_tree_texts(page))
+    
+    async def restore_classification_path(self, page: Page, stack: List[Tuple[List[str], Deque[str], List[str]]]) -> None:
+        """
+        모달이 닫혔거나 다시 열렸을 때, 다음에 탐색할 노드가 보이도록 상위 경로를 펼친다.
+        
+        이미 펼쳐진 단계는 클릭하지 않는다.
+        """
+        try:
+            # 남은 노드가 있는 가장 깊은 프레임이 다음 탐색 위치
+            frame_path, remaining = next(((f, r) for f, r, _ in reversed(stack) if r), ([], deque()))
+            
+            if not await page.locator(self.selectors['modal']).is_visible():
+                await self.open_classification_modal(page)
+            
+            visible = set(await self.get_tree_texts(page))
+            for i, ancestor in enumerate(frame_path):
+                target = frame_path[i + 1] if i + 1 < len(frame_path) else (remaining[0] if remaining else None)
+                if target is None or target in visible:
+                    continue
+                
+                await self._click_tree_node(page, ancestor)
+                visible = set(await self.get_tree_texts(page))
+                
+        except Exception as e:
+            logger.error(f"분류 경로 복원 실패: {e}")
+    
+    async def wait_for_modal_hidden(self, page: Page) -> None:
+        """색인분류 모달이 화면에서 사라질 때까지 기다린다 (시간 초과 시 그대로 진행)"""
+        try:
+            await page.locator(self.selectors['modal']).wait_for(state='hidden', timeout=5000)
+        except Exception as e:
+            logger.debug(f"모달 닫힘 대기 시간 초과: {e}")
+    
     async def reset_classification_state(self, page: Page) -> None:
         """분류 상태를 초기화하여 다른 분류를 탐색할 수 있도록 한다."""
         try:
@@ -363,13 +621,12 @@ class HIRAFullTreeCrawler:
                     close_btn = page.locator(selector).first
                     if await close_btn.is_visible():
                         await close_btn.click()
-                        await asyncio.sleep(1)
                         break
                 except:
                     continue
             
-            # 모달 다시 열기
-            await asyncio.sleep(2)
+            # 고정 대기 대신 모달이 사라질 때까지 기다린 뒤 다시 열기
+            await self.wait_for_modal_hidden(page)
             await self.open_classification_modal(page)
             
         except Exception as e:
@@ -400,8 +657,14 @@ class HIRAFullTreeCrawler:
             # 모달 닫기
             await self.close_classification_modal(page)
             
-            # 검색창에 코드가 입력되었는지 확인
-            await asyncio.sleep(2)
+            # 검색창에 코드가 입력될 때까지 대기 후 확인
+            try:
+                await page.wait_for_function(
+                    "sel => { const el = document.querySelector(sel); return !!(el && el.value.trim()); }",
+                    arg=self.selectors['search_input'], timeout=5000
+                )
+            except Exception:
+                pass
             search_input = page.locator(self.selectors['search_input'])
             input_value = await search_input.input_value()
             logger.info(f"검색창 입력값: '{input_value}'")
@@ -413,57 +676,103 @@ class HIRAFullTreeCrawler:
             
             # 조회 버튼 클릭
             search_button = page.locator(self.selectors['search_button'])
-            await search_button.wait_for(state='visible', timeout=10000)
-            await search_button.wait_for(state='enabled', timeout=5000)
-            await search_button.click()
+            await search_button.wait_for(state='visible')
             
+            # 조회 버튼 클릭 후 결과 그리드가 다시 그려질 때까지 대기
+            await self.click_and_settle(page, search_button, timeout_ms=10000)
             logger.info("조회 버튼 클릭 완료")
-            await asyncio.sleep(5)  # 조회 결과 로딩 대기
             
             # 엑셀 다운로드 시도
             try:
                 excel_button = page.locator(self.selectors['excel_button'])
-                await excel_button.wait_for(state='visible', timeout=10000)
-                await excel_button.wait_for(state='enabled', timeout=5000)
+                await excel_button.wait_for(state='visible')
                 
-                async with page.expect_download(timeout=30000) as download_info:
+                # 다운로드 시작과 '조회 결과 없음' 메시지 중 먼저 오는 쪽으로 판단 (빈 분류에서 다운로드 제한 시간을 다 기다리지 않음)
+                download_task = asyncio.ensure_future(page.wait_for_event('download', timeout=DOWNLOAD_WAIT_TIMEOUT_MS))
+                try:
                     await excel_button.click()
-                    
-                download = await download_info.value
+                except Exception:
+                    download_task.cancel()
+                    raise
+                no_data_task = asyncio.ensure_future(
+                    page.locator(NO_DATA_SELECTOR).first.wait_for(state='visible', timeout=DOWNLOAD_WAIT_TIMEOUT_MS)
+                )
                 
-                # 파일명 생성
-                safe_path = "_".join(path).replace("/", "_").replace("\\", "_")
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"{safe_path}_{timestamp}_{download.suggested_filename}"
-                filepath = self.download_dir / filename
+                done, pending = await asyncio.wait({download_task, no_data_task}, return_when=asyncio.FIRST_COMPLETED)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
                 
-                await download.save_as(filepath)
-                
-                result['success'] = True
-                result['filename'] = filename
-                logger.info(f"다운로드 성공: {filename}")
+                if download_task in done and download_task.exception() is None:
+                    download = download_task.result()
+                    
+                    # 파일명 생성
+                    safe_path = "_".join(path).replace("/", "_").replace("\\", "_")
+                    extension = os.path.splitext(download.suggested_filename)[1] or '.xlsx'
+                    filename = f"{safe_path}_{self._run_ts}_{next(self._download_seq):05d}{extension}"
+                    
+                    await download.save_as(os.path.join(self._download_dir_str, filename))
+                    
+                    result['success'] = True
+                    result['filename'] = filename
+                    logger.info(f"다운로드 성공: {filename}")
+                    
+                elif no_data_task in done and no_data_task.exception() is None:
+                    result['error'] = "조회 결과 없음"
+                    logger.info(f"분류 '{result['path']}': 조회 결과 없음")
+                    
+                else:
+                    # 먼저 끝난 쪽이 실패(시간 초과 등)한 경우 그 예외를 다운로드 실패로 기록
+                    raise next(iter(done)).exception()
                 
             except Exception as e:
                 logger.warning(f"분류 '{result['path']}': 다운로드 불가 - {str(e)}")
                 result['error'] = f"다운로드 불가: {str(e)}"
-                
-                # 조회 결과 없음 확인
-                try:
-                    no_data_msg = page.locator("text=조회된 데이터가 없습니다")
-                    if await no_data_msg.is_visible():
-                        result['error'] = "조회 결과 없음"
-                        logger.info(f"분류 '{result['path']}': 조회 결과 없음")
-                except:
-                    pass
             
         except Exception as e:
             logger.error(f"분류 '{result['path']}' 처리 중 오류: {e}")
             result['error'] = str(e)
         
         # 결과 저장
-        self.results.append(result)
+        async with self._results_lock:
+            self._write_result(result)
         return result
     
+    def _write_result(self, result: Dict):
+        """결과 한 건을 CSV에 바로 기록한다 (첫 결과에서 파일을 열고 헤더 작성)"""
+        if self._results_writer is None:
+            results_file = self.download_dir / f"full_tree_crawling_results_{self._run_ts}.csv"
+            self._results_file = open(results_file, 'w', newline='', encoding='utf-8-sig')
+            self._results_writer = csv.DictWriter(self._results_file, fieldnames=RESULT_FIELDNAMES)
+            self._results_writer.writeheader()
+            logger.info(f"결과 파일 기록 시작: {results_file}")
+        
+        self._results_writer.writerow(result)
+        self._results_file.flush()
+        
+        self.result_count += 1
+        if result['success']:
+            self.success_count += 1
+    
+    def _write_path(self, path_str: str):
+        """새로 발견한 분류 경로 한 줄을 경로 파일에 이어 쓴다"""
+        if self._paths_file is None:
+            paths_file = self.download_dir / f"collected_paths_{self._run_ts}.txt"
+            self._paths_file = open(paths_file, 'a', encoding='utf-8')
+            logger.info(f"분류 경로 파일 기록 시작: {paths_file}")
+        
+        self._paths_file.write(f"{path_str}\n")
+        self._paths_file.flush()
+    
+    def _close_output_files(self):
+        """결과/경로 파일을 닫는다"""
+        for f in (self._results_file, self._paths_file):
+            if f is not None:
+                f.close()
+        self._results_file = None
+        self._results_writer = None
+        self._paths_file = None
+    
     async def close_classification_modal(self, page: Page):
         """분류 모달을 닫는다."""
         try:
@@ -482,7 +791,8 @@ class HIRAFullTreeCrawler:
                     if await close_btn.is_visible():
                         await close_btn.click()
                         logger.info("분류 모달을 닫았습니다.")
-                        await asyncio.sleep(2)
+                        # 고정 대기 대신 모달이 사라질 때까지 대기
+                        await self.wait_for_modal_hidden(page)
                         return
                 except:
                     continue
@@ -492,73 +802,73 @@ class HIRAFullTreeCrawler:
         except Exception as e:
             logger.error(f"모달 닫기 실패: {e}")
     
+    async def _explore_worker(self, browser: Browser, queue: asyncio.Queue, page: Optional[Page] = None) -> None:
+        """
+        큐에서 대분류를 하나씩 꺼내 그 하위 트리를 탐색한다.
+        
+        page가 없으면 공유 브라우저에 자기 컨텍스트를 만들어 모달까지 연다.
+        """
+        context = None
+        try:
+            if page is None:
+                context, page = await self.new_context_page(browser)
+                if not await self.open_popup_page(page):
+                    return
+            
+            while True:
+                try:
+                    major = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                
+                await self.explore_classification_tree(page, root_filter=major)
+                
+        except Exception as e:
+            logger.error(f"탐색 워커 오류: {e}")
+        finally:
+            if context is not None:
+                await self.pool.release_context(context)
+    
     async def run(self):
         """크롤링 메인 실행 함수"""
         logger.info("HIRA 색인분류 트리 전체 탐색 시작")
+        self._run_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         try:
             # 브라우저 설정
             browser, context, page = await self.setup_browser()
             
             try:
-                # HIRA 팝업 페이지 접속
-                logger.info(f"웹사이트 접속: {self.popup_url}")
-                await page.goto(self.popup_url, wait_until='networkidle', timeout=30000)
-                
-                # Nexacro 애플리케이션 로딩 대기
-                logger.info("Nexacro 애플리케이션 로딩 대기...")
-                await asyncio.sleep(10)  # Nexacro 로딩 시간 여유 있게 대기
-                
-                # 페이지 완전 로딩 확인
-                try:
-                    # 기본 검색 입력창이 나타날 때까지 대기
-                    search_input = page.locator(self.selectors['search_input'])
-                    await search_input.wait_for(state='visible', timeout=15000)
-                    logger.info("기본 페이지 로딩 완료")
-                except:
-                    logger.warning("기본 검색 입력창을 찾을 수 없음. 계속 진행...")
-                
-                await asyncio.sleep(3)  # 추가 안정화 대기
+                # HIRA 팝업 페이지 접속 후 색인분류 모달 열기
+                if not await self.open_popup_page(page):
+                    return
                 
-                # 색인분류 모달 열기
-                if not await self.open_classification_modal(page):
-                    logger.error("색인분류 모달 열기 실패")
+                # 대분류 목록을 한 번 읽어 작업 큐로 분배
+                majors = list(dict.fromkeys(await self.get_tree_texts(page)))
+                if not majors:
+                    logger.error("대분류 요소를 찾을 수 없습니다.")
                     return
                 
-                # 트리 전체 탐색 시작
-                logger.info("색인분류 트리 전체 탐색을 시작합니다...")
-                await self.explore_classification_tree(page)
+                queue: asyncio.Queue = asyncio.Queue()
+                for major in majors:
+                    queue.put_nowait(major)
                 
-                # 결과 요약
-                total_paths = len(self.collected_paths)
-                successful_downloads = sum(1 for r in self.results if r['success'])
+                worker_count = min(self.concurrency, len(majors))
+                logger.info(f"색인분류 트리 전체 탐색을 시작합니다... (대분류 {len(majors)}개, 워커 {worker_count}개)")
+                await asyncio.gather(*[self._explore_worker(browser, queue, page if i == 0 else None) for i in range(worker_count)])
                 
+                # 결과 요약 (결과/경로는 처리하면서 이미 파일에 기록됨)
                 logger.info(f"탐색 완료:")
-                logger.info(f"  - 발견된 분류 경로: {total_paths}개")
-                logger.info(f"  - 성공한 다운로드: {successful_downloads}개")
-                logger.info(f"  - 실패한 다운로드: {len(self.results) - successful_downloads}개")
-                
-                # 결과를 CSV로 저장
-                if self.results:
-                    results_df = pd.DataFrame(self.results)
-                    results_file = self.download_dir / f"full_tree_crawling_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                    results_df.to_csv(results_file, index=False, encoding='utf-8-sig')
-                    logger.info(f"결과 파일 저장: {results_file}")
-                
-                # 수집된 분류 경로 저장
-                paths_file = self.download_dir / f"collected_paths_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-                with open(paths_file, 'w', encoding='utf-8') as f:
-                    for path in sorted(self.collected_paths):
-                        f.write(f"{path}\n")
-                logger.info(f"분류 경로 파일 저장: {paths_file}")
+                logger.info(f"  - 발견된 분류 경로: {len(self.collected_paths)}개")
+                logger.info(f"  - 성공한 다운로드: {self.success_count}개")
+                logger.info(f"  - 실패한 다운로드: {self.result_count - self.success_count}개")
                 
             finally:
-                try:
-                    await context.close()
-                    await browser.close()
-                    logger.info("브라우저 정리 완료")
-                except Exception as e:
-                    logger.warning(f"브라우저 정리 중 오류: {e}")
+                self._close_output_files()
+                
+                # 컨텍스트만 닫고 브라우저는 다음 실행을 위해 풀에 남겨 둔다
+                await self.pool.release_context(context)
+                logger.info("컨텍스트 정리 완료")
                 
         except Exception as e:
             logger.error(f"크롤링 실행 중 오류: {e}")
@@ -569,7 +879,10 @@ async def main():
     download_directory = "./downloads"
     
     crawler = HIRAFullTreeCrawler(download_directory)
-    await crawler.run()
+    try:
+        await crawler.run()
+    finally:
+        await crawler.pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -4,14 +4,28 @@ HIRA 요양기관 업무포털 3단계 계층구조 크롤러
 """
 
 import asyncio
+import csv
 import json
 import logging
 import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional
-import pandas as pd
+from typing import IO, List, Dict, Optional
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from hira_base import ALLOWED_STYLESHEET_HOST, BLOCKED_RESOURCE_TYPES, NEXACRO_READY_JS
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 모듈 사용
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # uvloop이 없거나 Windows면 기본 이벤트 루프 사용
+    uvloop = None
 
 # 로깅 설정
 logging.basicConfig(
@@ -24,21 +38,122 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 항목 텍스트에서 명칭/코드를 분리하는 패턴 (호출마다 컴파일하지 않도록 모듈 로드 시 한 번만)
+NAME_PAREN_RE = re.compile(r'^(.+?)\s*\(([^)]+)\)\s*$')   # "명칭(코드)"
+CODE_NAME_RE = re.compile(r'^([A-Z0-9]+)\s+(.+)$')         # "코드 명칭"
+NUM_ALPHA_CODE_RE = re.compile(r'^(\d+[A-Z]*)\s+(.+)$')    # "000 산정방법"
+
+@lru_cache(maxsize=4096)
+def _parse_korean_text(text: str) -> tuple[str, str]:
+    """같은 항목 텍스트가 반복되므로 파싱 결과를 (명칭, 코드) 튜플로 캐시한다"""
+    text = text.strip()
+    if not text:
+        return "", ""
+    
+    # 패턴 1: "명칭(코드)" 형식 (괄호로 끝나는 경우에만 시도)
+    if '(' in text and text.endswith(')'):
+        match1 = NAME_PAREN_RE.match(text)
+        if match1:
+            return match1.group(1).strip(), match1.group(2).strip()
+    
+    # 패턴 2: "코드 명칭" 형식 (숫자나 영문으로 시작하는 코드)
+    match2 = CODE_NAME_RE.match(text)
+    if match2:
+        return match2.group(2).strip(), match2.group(1).strip()
+    
+    # 패턴 3: "숫자+문자" 로 시작하는 경우 (예: "000 산정방법")
+    match3 = NUM_ALPHA_CODE_RE.match(text)
+    if match3:
+        return match3.group(2).strip(), match3.group(1).strip()
+    
+    # 매칭되지 않는 경우 전체를 명칭으로 처리
+    return text, ""
+
+def _json_line(record: Dict[str, str]) -> bytes:
+    """레코드 한 건을 JSONL 한 줄(UTF-8 바이트)로 직렬화한다"""
+    if orjson is not None:
+        return orjson.dumps(record) + b'\n'
+    return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+# 결과 파일 컬럼 (crawl_major에서 만드는 계층구조 레코드 키)
+HIERARCHY_FIELDNAMES = ('대분류코드', '대분류명', '중분류코드', '중분류명', '소분류코드', '소분류명', '수집시간')
+
+# 색인분류검색 모달
+MODAL_SELECTOR = '#InfoBank_RvStdInqIdxPL'
+
+# 행 ID 접두사로 찾은 그리드 행들의 서명 (행 ID + 앞부분 텍스트). 클릭 후 하위 그리드가 다시 채워졌는지 판단용
+GRID_SIGNATURE_BODY = """
+    let s = '';
+    document.querySelectorAll(`[id^="${base}"]`).forEach(r => s += r.id + ':' + (r.textContent || '').slice(0, 20) + '|');
+"""
+GRID_SIGNATURE_JS = f"base => {{{GRID_SIGNATURE_BODY} return s; }}"
+GRID_CHANGED_JS = f"([base, sig]) => {{{GRID_SIGNATURE_BODY} return s !== sig; }}"
+# 실제로 그려진 그리드 행(ID가 접두사 + 숫자)만 골라 보이는 행의 번호와 텍스트를 한 번에 가져온다
+# (행마다 count/is_visible/innerText IPC를 보내지 않고, 없는 번호를 추측해 확인하지도 않음)
+LEVEL_ROWS_JS = """
+(base) => {
+    const out = [];
+    document.querySelectorAll(`[id^="${base}"]`).forEach(el => {
+        const suffix = el.id.slice(base.length);
+        if (!/^\\d+$/.test(suffix)) return;
+        const r = el.getBoundingClientRect();
+        if (r.width === 0 && r.height === 0) return;
+        out.push({index: Number(suffix), text: (el.innerText || el.textContent || '').trim()});
+    });
+    return out.sort((a, b) => a.index - b.index);
+}
+"""
+# 컨테이너를 맨 아래로 스크롤하며 행 수가 두 번 연속 그대로일 때까지 기다린 뒤 맨 위로 복귀 (최대 50회)
+SCROLL_UNTIL_STABLE_JS = """
+async el => {
+    let prev = -1, stable = 0;
+    for (let i = 0; i < 50 && stable < 2; i++) {
+        el.scrollTop = el.scrollHeight;
+        await new Promise(r => setTimeout(r, 100));
+        const cur = el.querySelectorAll('[id*="_body_gridrow_"]').length;
+        if (cur === prev) stable++; else { stable = 0; prev = cur; }
+    }
+    el.scrollTop = 0;
+}
+"""
+# 행 ID로 찾은 항목을 화면 가운데로 스크롤하고 마우스 클릭 이벤트를 전달한다
+# 클릭 직전의 하위 그리드 서명을 함께 돌려준다 (base가 없으면 '', 항목이 없으면 null)
+CLICK_ROW_JS = f"""
+([id, base]) => {{
+    const el = document.getElementById(id);
+    if (!el) return null;
+    const sig = base ? (() => {{{GRID_SIGNATURE_BODY} return s; }})() : '';
+    el.scrollIntoView({{block: 'center'}});
+    for (const type of ['mousedown', 'mouseup', 'click']) {{
+        el.dispatchEvent(new MouseEvent(type, {{bubbles: true, cancelable: true}}));
+    }}
+    return sig;
+}}
+"""
+GRID_HAS_ROWS_JS = "base => !!document.querySelector(`[id^=\"${base}\"]`)"
+
 class HIRAHierarchicalCrawler:
-    def __init__(self, output_dir: str = "./output"):
+    def __init__(self, output_dir: str = "./output", debug: bool = False, concurrency: int = 4):
         """
         HIRA 3단계 계층구조 크롤러 초기화
         
         Args:
             output_dir: 결과 파일 저장 디렉토리
+            debug: 동작 확인용 실행 (브라우저를 화면에 띄우고 동작마다 250ms 지연)
+            concurrency: 대분류를 나눠 순회할 동시 브라우저 컨텍스트 수
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.debug = debug
+        self.concurrency = max(1, concurrency)
         
         # HIRA 웹사이트 URL
         self.main_url = "https://biz.hira.or.kr/index.do"
         self.popup_url = "https://biz.hira.or.kr/popup.ndo?formname=qya_bizcom%3A%3AInfoBank.xfdl&framename=InfoBank"
         
+        # 세션 상태 파일 (있으면 메인 페이지/메뉴를 거치지 않고 팝업 URL로 바로 접속)
+        self.state_path = self.output_dir / 'state.json'
+        
         # DOM 선택자 (사용자 제공)
         self.selectors = {
             # 대분류 선택자
@@ -64,8 +179,24 @@ class HIRAHierarchicalCrawler:
             'excel_button': '#InfoBank_form_divMain_divWork1_btnE0001TextBoxElement'
         }
         
-        # 수집된 데이터
-        self.hierarchical_data: List[Dict] = []
+        # 레벨별 선택자를 미리 묶어 둠 (순회 중에 f-string 키 조합/조회를 반복하지 않음)
+        self._lvl = {
+            level: {
+                'container': self.selectors[f'{level}_container'],
+                'textbox': self.selectors[f'{level}_textbox'],
+                'base': self.selectors[f'{level}_item_base']
+            }
+            for level in ('major', 'middle', 'minor')
+        }
+        
+        # 수집된 데이터는 메모리에 모으지 않고 레코드마다 JSONL/CSV에 바로 기록 (건수만 유지)
+        self.record_count = 0
+        self._run_ts: Optional[str] = None
+        self._collected_at: Optional[str] = None
+        self._jsonl_path: Optional[Path] = None
+        self._jsonl: Optional[IO] = None
+        self._csv_file: Optional[IO] = None
+        self._csv_writer = None
         
     def parse_korean_text(self, text: str) -> Dict[str, str]:
         """
@@ -82,62 +213,89 @@ class HIRAHierarchicalCrawler:
         Returns:
             {"name": "명칭", "code": "코드"}
         """
-        try:
-            text = text.strip()
-            
-            # 패턴 1: "명칭(코드)" 형식
-            match1 = re.match(r'^(.+?)\s*\(([^)]+)\)\s*$', text)
-            if match1:
-                name = match1.group(1).strip()
-                code = match1.group(2).strip()
-                return {"name": name, "code": code}
-            
-            # 패턴 2: "코드 명칭" 형식 (숫자나 영문으로 시작하는 코드)
-            match2 = re.match(r'^([A-Z0-9]+)\s+(.+)$', text)
-            if match2:
-                code = match2.group(1).strip()
-                name = match2.group(2).strip()
-                return {"name": name, "code": code}
-            
-            # 패턴 3: "숫자+문자" 로 시작하는 경우 (예: "000 산정방법")
-            match3 = re.match(r'^(\d+[A-Z]*)\s+(.+)$', text)
-            if match3:
-                code = match3.group(1).strip()
-                name = match3.group(2).strip()
-                return {"name": name, "code": code}
-            
-            # 매칭되지 않는 경우 전체를 명칭으로 처리
-            return {"name": text, "code": ""}
-                
-        except Exception as e:
-            logger.warning(f"텍스트 파싱 실패 '{text}': {e}")
-            return {"name": text, "code": ""}
+        # 정규식 매칭은 예외를 던지지 않으므로 try/except 없이 빈 값만 먼저 걸러냄
+        if not text:
+            return {"name": "", "code": ""}
+        
+        name, code = _parse_korean_text(text)
+        return {"name": name, "code": code}
     
-    async def setup_browser(self) -> tuple[Browser, BrowserContext, Page, Page]:
+    async def setup_browser(self) -> tuple[Browser, BrowserContext, Optional[Page], Page]:
         """브라우저 설정 및 메인/팝업 페이지 생성"""
         playwright = await async_playwright().start()
         
+        # 평소에는 헤드리스로 인위적 지연 없이 실행 (debug일 때만 화면 표시 + 동작 지연)
         browser = await playwright.chromium.launch(
-            headless=False,
-            slow_mo=1000,  # 동작 확인을 위해 1초 대기  
+            headless=not self.debug,
+            slow_mo=250 if self.debug else 0,
             args=['--disable-web-security', '--disable-features=VizDisplayCompositor']
         )
         
+        context, main_page, popup_page = await self.open_popup_context(browser)
+        return browser, context, main_page, popup_page
+    
+    async def create_context(self, browser: Browser, storage_state: Optional[str] = None) -> BrowserContext:
+        """브라우저에 새 컨텍스트를 만들고 불필요한 리소스 요청 차단을 건다"""
         context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080}
+            viewport={'width': 1920, 'height': 1080},
+            storage_state=storage_state
         )
         
+        # 이미지/폰트/미디어 등 불필요한 리소스 차단
+        await context.route('**/*', self._block_unneeded_resources)
+        
+        return context
+    
+    async def _block_unneeded_resources(self, route):
+        """분류 수집에 필요 없는 리소스 요청을 차단한다 (HIRA 자체 스타일시트는 Nexacro 부팅을 위해 허용)"""
+        request = route.request
+        resource_type = request.resource_type
+        
+        if resource_type in BLOCKED_RESOURCE_TYPES and not (
+            resource_type == 'stylesheet' and ALLOWED_STYLESHEET_HOST in request.url
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def open_popup_context(self, browser: Browser) -> tuple[BrowserContext, Optional[Page], Page]:
+        """
+        브라우저에 새 컨텍스트를 만들고 심사기준 종합서비스 팝업을 연다
+        
+        저장된 세션 상태가 있으면 팝업 URL로 바로 접속하고 (메인 페이지는 None),
+        없거나 실패하면 메인 페이지 메뉴를 거쳐 연 뒤 세션 상태를 저장한다.
+        """
+        if self.state_path.exists():
+            context = await self.create_context(browser, storage_state=str(self.state_path))
+            try:
+                popup_page = await context.new_page()
+                logger.info(f"저장된 세션으로 팝업 페이지 직접 접속: {self.popup_url}")
+                await popup_page.goto(self.popup_url, wait_until='domcontentloaded', timeout=30000)
+                await popup_page.wait_for_function(NEXACRO_READY_JS, timeout=30000)
+                logger.info("팝업 페이지 로딩 완료")
+                return context, None, popup_page
+            except Exception as e:
+                logger.warning(f"저장된 세션으로 팝업 접속 실패. 메인 페이지 메뉴로 다시 엽니다: {e}")
+                await context.close()
+        
+        context = await self.create_context(browser)
+        
         # 메인 페이지 생성 및 접속
         main_page = await context.new_page()
         logger.info(f"메인 페이지 접속: {self.main_url}")
         await main_page.goto(self.main_url, wait_until='networkidle', timeout=30000)
         
-        # Nexacro 메인 애플리케이션 로딩 대기
+        # Nexacro 메인 애플리케이션 로딩 대기 (고정 10초 대신 초기화 완료 확인)
         logger.info("Nexacro 메인 애플리케이션 로딩 대기...")
-        await asyncio.sleep(10)
+        await main_page.wait_for_function(NEXACRO_READY_JS, timeout=30000)
         
         # 심사기준 종합서비스 메뉴 찾기 및 클릭
         menu_link = main_page.locator('text=심사기준 종합서비스')
+        try:
+            # Nexacro 준비 완료 후에도 메뉴가 늦게 그려질 수 있으므로 표시될 때까지 대기
+            await menu_link.first.wait_for(state='visible', timeout=30000)
+        except PlaywrightTimeoutError:
+            pass
         if await menu_link.count() > 0:
             logger.info("메뉴 링크 발견: text=심사기준 종합서비스")
             
@@ -149,10 +307,16 @@ class HIRAHierarchicalCrawler:
             await popup_page.wait_for_load_state('networkidle', timeout=30000)
             
             logger.info("Nexacro 팝업 애플리케이션 로딩 대기...")
-            await asyncio.sleep(10)
+            await popup_page.wait_for_function(NEXACRO_READY_JS, timeout=30000)
             logger.info("팝업 페이지 로딩 완료")
             
-            return browser, context, main_page, popup_page
+            # 다음 실행(과 추가 워커)이 메인 페이지를 거치지 않도록 세션 상태 저장
+            try:
+                await context.storage_state(path=str(self.state_path))
+            except Exception as e:
+                logger.warning(f"세션 상태 저장 실패: {e}")
+            
+            return context, main_page, popup_page
         else:
             logger.error("심사기준 종합서비스 메뉴를 찾을 수 없습니다.")
             raise Exception("메뉴 링크를 찾을 수 없습니다")
@@ -162,24 +326,25 @@ class HIRAHierarchicalCrawler:
         try:
             logger.info("색인분류검색 모달 열기 시도...")
             
-            # DOM 완전 로딩 대기
-            await asyncio.sleep(3)
-            await page.wait_for_load_state('networkidle', timeout=10000)
-            
-            # 정확한 버튼 ID로 클릭 (성공한 코드에서 가져옴)
+            # 정확한 버튼 ID로 클릭 (성공한 코드에서 가져옴). 고정 대기 대신 버튼이 보일 때까지 대기
             exact_button_id = '#InfoBank_form_divMain_divWork1_btnIdxDiv'
             btn_element = page.locator(exact_button_id)
+            try:
+                await btn_element.wait_for(state='visible', timeout=10000)
+            except Exception:
+                pass
             
             if await btn_element.count() > 0:
                 logger.info("색인분류검색 버튼 발견!")
                 await btn_element.click()
-                await asyncio.sleep(3)
                 
-                # 모달 열림 확인
-                modal_check = '#InfoBank_RvStdInqIdxPL'
-                if await page.locator(modal_check).count() > 0:
+                # 모달 열림 확인 (화면에 나타날 때까지 대기)
+                try:
+                    await page.locator(MODAL_SELECTOR).wait_for(state='visible', timeout=10000)
                     logger.info("색인분류검색 모달이 성공적으로 열렸습니다")
                     return True
+                except Exception as e:
+                    logger.warning(f"색인분류검색 모달 표시 대기 시간 초과: {e}")
             
             logger.error("색인분류검색 버튼을 찾을 수 없습니다")
             return False
@@ -205,7 +370,11 @@ class HIRAHierarchicalCrawler:
                     if await close_btn.is_visible():
                         await close_btn.click()
                         logger.info("분류 모달을 닫았습니다.")
-                        await asyncio.sleep(2)
+                        # 고정 대기 대신 모달이 사라질 때까지 대기
+                        try:
+                            await page.locator(MODAL_SELECTOR).wait_for(state='hidden', timeout=5000)
+                        except Exception:
+                            pass
                         return
                 except:
                     continue
@@ -227,95 +396,45 @@ class HIRAHierarchicalCrawler:
             항목 리스트 [{"name": "명칭", "code": "코드", "index": 0}, ...]
         """
         items = []
-        item_base = self.selectors[f'{level}_item_base']
+        level_selectors = self._lvl[level]
+        item_base = level_selectors['base']
         
         try:
             # 컨테이너가 로딩될 때까지 대기
-            container_selector = self.selectors[f'{level}_container']
+            container_selector = level_selectors['container']
             container = None
             try:
                 container = page.locator(container_selector)
                 await container.wait_for(state='visible', timeout=10000)
-                await asyncio.sleep(2)  # Nexacro 렌더링 추가 대기
+                # Nexacro 렌더링 대기 (고정 대기 대신 첫 행이 그려질 때까지)
+                await page.wait_for_function(GRID_HAS_ROWS_JS, arg=item_base, timeout=5000)
             except:
                 logger.warning(f"{level} 레벨 컨테이너 로딩 대기 실패")
             
-            # 간단하고 확실한 스크롤로 모든 요소 로딩
+            # 모든 요소 로딩 확보: 행 수가 더 늘지 않을 때까지 브라우저 안에서 스크롤 후 맨 위로 복귀
             if container:
                 try:
-                    # 끝까지 여러 번 스크롤하여 모든 요소 로딩 확보
-                    for _ in range(50):  # 50회 스크롤
-                        await container.evaluate('el => el.scrollTop += 100')
-                        await asyncio.sleep(0.2)
-                    
-                    # 맨 아래까지 스크롤
-                    await container.evaluate('el => el.scrollTop = el.scrollHeight')
-                    await asyncio.sleep(1)
-                    
-                    # 맨 위로 복귀
-                    await container.evaluate('el => el.scrollTop = 0')
-                    await asyncio.sleep(1)
-                    
+                    await container.evaluate(SCROLL_UNTIL_STABLE_JS)
                 except Exception as e:
                     logger.warning(f"스크롤 실패: {e}")
             
-            # 성공 검증된 방식: ID 기반 순차 접근
-            index = 0
-            consecutive_failures = 0
+            # 성공 검증된 방식: ID 기반 순차 접근 (브라우저에서 한 번에 수행)
+            rows = await page.evaluate(LEVEL_ROWS_JS, item_base)
             
-            while consecutive_failures < 10:  # 연속 실패 10회까지 허용
-                # ID 기반으로 각 항목 찾기
-                item_id = f"{item_base}{index}"
-                item_element = page.locator(f"#{item_id}")
-                
-                # 요소 존재 확인
-                if await item_element.count() == 0:
-                    consecutive_failures += 1
-                    index += 1
+            for row in rows:
+                if not row['text']:
                     continue
                 
-                # 요소 가시성 확인 및 스크롤
-                if not await item_element.is_visible():
-                    try:
-                        await item_element.scroll_into_view_if_needed()
-                        await asyncio.sleep(0.1)
-                    except:
-                        pass
-                    
-                    if not await item_element.is_visible():
-                        consecutive_failures += 1
-                        index += 1
-                        continue
-                
-                # 텍스트 추출
-                try:
-                    inner_text = await item_element.evaluate('el => el.innerText')
-                    if not inner_text:
-                        inner_text = await item_element.text_content()
-                    
-                    if inner_text and inner_text.strip():
-                        parsed = self.parse_korean_text(inner_text.strip())
-                        item_data = {
-                            "name": parsed["name"],
-                            "code": parsed["code"],
-                            "index": index,
-                            "element_id": item_id,
-                            "raw_text": inner_text.strip()
-                        }
-                        items.append(item_data)
-                        logger.debug(f"{level} 레벨 항목 발견: {item_data}")
-                        consecutive_failures = 0  # 성공시 카운터 리셋
-                        
-                except Exception as e:
-                    logger.warning(f"{level} 레벨 {item_id} 텍스트 추출 실패: {e}")
-                    consecutive_failures += 1
-                
-                index += 1
-                
-                # 무한 루프 방지 (최대 1000개)
-                if index > 1000:
-                    logger.warning(f"{level} 레벨: 최대 항목 수 초과. 탐색 중단")
-                    break
+                parsed = self.parse_korean_text(row['text'])
+                item_data = {
+                    "name": parsed["name"],
+                    "code": parsed["code"],
+                    "index": row['index'],
+                    "element_id": f"{item_base}{row['index']}",
+                    "raw_text": row['text']
+                }
+                items.append(item_data)
+                logger.debug(f"{level} 레벨 항목 발견: {item_data}")
             
             logger.info(f"{level} 레벨에서 {len(items)}개 항목 발견")
             return items
@@ -324,47 +443,58 @@ class HIRAHierarchicalCrawler:
             logger.error(f"{level} 레벨 항목 가져오기 실패: {e}")
             return []
     
-    async def click_item(self, page: Page, item: Dict[str, str]) -> bool:
+    async def click_item(self, page: Page, item: Dict[str, str], child_level: Optional[str] = None) -> bool:
         """
         특정 항목 클릭
         
         Args:
             page: Playwright 페이지
             item: 클릭할 항목 정보
+            child_level: 클릭으로 채워질 하위 레벨 ('middle', 'minor'). 지정하면 그 컨테이너가 보일 때까지 대기
             
         Returns:
             클릭 성공 여부
         """
         try:
             element_id = item["element_id"]
-            item_element = page.locator(f"#{element_id}")
+            child_selectors = self._lvl[child_level] if child_level else None
+            child_base = child_selectors['base'] if child_selectors else None
             
-            # 요소 존재 및 가시성 확인
-            if await item_element.count() == 0:
+            # 하위 그리드 서명 기록 + 스크롤 + 클릭을 한 번의 evaluate로 처리 (count/is_visible/click 왕복 생략)
+            prev_signature = await page.evaluate(CLICK_ROW_JS, [element_id, child_base])
+            if prev_signature is None:
                 logger.warning(f"항목 {element_id} 요소가 존재하지 않음")
                 return False
-                
-            if not await item_element.is_visible():
-                logger.warning(f"항목 {element_id} 요소가 보이지 않음")
-                return False
             
-            # 클릭
-            await item_element.click()
             logger.info(f"항목 클릭 성공: {item['name']} ({item['code']})")
             
-            # 하위 항목 로딩 대기
-            await asyncio.sleep(2)
+            # slow_mo의 암묵적 지연 대신 하위 레벨 컨테이너 표시를 기다림
+            if child_level:
+                await page.locator(child_selectors['container']).wait_for(state='visible', timeout=10000)
+                
+                # 하위 항목 로딩 대기 (고정 2초 대신 하위 그리드 행이 바뀔 때까지)
+                try:
+                    await page.wait_for_function(GRID_CHANGED_JS, arg=[child_base, prev_signature], timeout=5000)
+                except Exception:
+                    logger.debug(f"하위 그리드 변화 없음: {item['name']}")
             return True
             
         except Exception as e:
             logger.error(f"항목 클릭 실패 {item['name']}: {e}")
             return False
     
-    async def crawl_hierarchy(self, page: Page) -> None:
-        """3단계 계층구조 크롤링 메인 로직"""
+    async def crawl_hierarchy(self, page: Page, browser: Optional[Browser] = None) -> None:
+        """
+        3단계 계층구조 크롤링 메인 로직
+        
+        대분류 목록을 한 번 읽은 뒤 작업 큐로 나눠, 이 페이지와 (browser가 있으면) 추가 컨텍스트들이 동시에 순회한다.
+        """
         try:
             logger.info("=== 3단계 계층구조 크롤링 시작 ===")
             
+            # 수집시간은 실행 단위로 한 번만 계산해 모든 레코드가 공유
+            self._collected_at = datetime.now().isoformat()
+            
             # 1단계: 대분류 항목들 가져오기
             major_items = await self.get_level_items(page, 'major')
             if not major_items:
@@ -373,105 +503,178 @@ class HIRAHierarchicalCrawler:
             
             logger.info(f"대분류 {len(major_items)}개 발견")
             
-            # 각 대분류 순회
+            queue: asyncio.Queue = asyncio.Queue()
             for major_idx, major_item in enumerate(major_items):
-                logger.info(f"\n[대분류 {major_idx + 1}/{len(major_items)}] {major_item['name']} ({major_item['code']})")
-                
-                # 대분류 클릭
-                if not await self.click_item(page, major_item):
-                    logger.error(f"대분류 {major_item['name']} 클릭 실패")
-                    continue
-                
-                # 2단계: 중분류 항목들 가져오기
-                middle_items = await self.get_level_items(page, 'middle')
-                if not middle_items:
-                    logger.warning(f"대분류 {major_item['name']}에 중분류 항목이 없습니다.")
-                    continue
-                
-                logger.info(f"  중분류 {len(middle_items)}개 발견")
-                
-                # 각 중분류 순회
-                for middle_idx, middle_item in enumerate(middle_items):
-                    logger.info(f"  [중분류 {middle_idx + 1}/{len(middle_items)}] {middle_item['name']} ({middle_item['code']})")
-                    
-                    # 중분류 클릭
-                    if not await self.click_item(page, middle_item):
-                        logger.error(f"중분류 {middle_item['name']} 클릭 실패")
-                        continue
-                    
-                    # 3단계: 소분류 항목들 가져오기
-                    minor_items = await self.get_level_items(page, 'minor')
-                    if not minor_items:
-                        logger.warning(f"중분류 {middle_item['name']}에 소분류 항목이 없습니다.")
-                        continue
-                    
-                    logger.info(f"    소분류 {len(minor_items)}개 발견")
-                    
-                    # 각 소분류 순회
-                    for minor_idx, minor_item in enumerate(minor_items):
-                        logger.info(f"    [소분류 {minor_idx + 1}/{len(minor_items)}] {minor_item['name']} ({minor_item['code']})")
-                        
-                        # 계층구조 데이터 저장
-                        hierarchy_record = {
-                            "대분류코드": major_item["code"],
-                            "대분류명": major_item["name"],
-                            "중분류코드": middle_item["code"],
-                            "중분류명": middle_item["name"],
-                            "소분류코드": minor_item["code"],
-                            "소분류명": minor_item["name"],
-                            "수집시간": datetime.now().isoformat()
-                        }
-                        
-                        self.hierarchical_data.append(hierarchy_record)
-                        logger.debug(f"계층구조 데이터 저장: {hierarchy_record}")
-                    
-                    # 다음 중분류로 이동하기 전 잠시 대기
-                    await asyncio.sleep(1)
-                
-                # 다음 대분류로 이동하기 전 잠시 대기
-                await asyncio.sleep(1)
+                queue.put_nowait((major_idx, major_item))
+            
+            worker_count = min(self.concurrency, len(major_items)) if browser else 1
+            await asyncio.gather(*[
+                self._crawl_worker(browser, queue, len(major_items), page if i == 0 else None)
+                for i in range(worker_count)
+            ])
             
             logger.info(f"\n=== 계층구조 크롤링 완료 ===")
-            logger.info(f"총 {len(self.hierarchical_data)}개의 소분류 수집")
+            logger.info(f"총 {self.record_count}개의 소분류 수집")
             
         except Exception as e:
             logger.error(f"계층구조 크롤링 중 오류: {e}")
     
-    def save_results(self) -> None:
-        """수집된 데이터를 JSON과 CSV로 저장"""
+    async def _crawl_worker(self, browser: Optional[Browser], queue: asyncio.Queue, total: int, page: Optional[Page] = None) -> None:
+        """
+        큐에서 대분류를 하나씩 꺼내 순회한다
+        
+        page가 없으면 자기 컨텍스트에서 팝업과 색인분류 모달을 연 뒤 시작한다.
+        """
+        context = None
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            if page is None:
+                context, _, page = await self.open_popup_context(browser)
+                if not await self.open_classification_modal(page):
+                    logger.error("워커 색인분류 모달 열기 실패")
+                    return
             
-            if not self.hierarchical_data:
+            while True:
+                try:
+                    major_idx, major_item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                
+                try:
+                    await self.crawl_major(page, major_idx, total, major_item)
+                except Exception as e:
+                    logger.error(f"대분류 {major_item['name']} 순회 중 오류: {e}")
+                    
+        except Exception as e:
+            logger.error(f"크롤링 워커 오류: {e}")
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"워커 컨텍스트 정리 중 오류: {e}")
+    
+    async def crawl_major(self, page: Page, major_idx: int, total: int, major_item: Dict[str, str]) -> None:
+        """대분류 하나를 클릭해 그 아래 중분류/소분류를 모두 수집한다"""
+        logger.info(f"\n[대분류 {major_idx + 1}/{total}] {major_item['name']} ({major_item['code']})")
+        
+        # 대분류 클릭
+        if not await self.click_item(page, major_item, 'middle'):
+            logger.error(f"대분류 {major_item['name']} 클릭 실패")
+            return
+        
+        # 2단계: 중분류 항목들 가져오기
+        middle_items = await self.get_level_items(page, 'middle')
+        if not middle_items:
+            logger.warning(f"대분류 {major_item['name']}에 중분류 항목이 없습니다.")
+            return
+        
+        logger.info(f"  중분류 {len(middle_items)}개 발견")
+        
+        # 각 중분류 순회
+        for middle_idx, middle_item in enumerate(middle_items):
+            logger.info("  [중분류 %d/%d] %s (%s)", middle_idx + 1, len(middle_items), middle_item['name'], middle_item['code'])
+            
+            # 중분류 클릭
+            if not await self.click_item(page, middle_item, 'minor'):
+                logger.error(f"중분류 {middle_item['name']} 클릭 실패")
+                continue
+            
+            # 3단계: 소분류 항목들 가져오기
+            minor_items = await self.get_level_items(page, 'minor')
+            if not minor_items:
+                logger.warning(f"중분류 {middle_item['name']}에 소분류 항목이 없습니다.")
+                continue
+            
+            logger.info("    소분류 %d개 발견", len(minor_items))
+            
+            # 각 소분류 순회
+            # 대/중분류 열은 중분류 안에서 고정이므로 한 번만 만들어 두고 소분류 열만 덧붙임
+            prefix = (major_item["code"], major_item["name"], middle_item["code"], middle_item["name"])
+            
+            for minor_idx, minor_item in enumerate(minor_items):
+                logger.debug("    [소분류 %d/%d] %s (%s)", minor_idx + 1, len(minor_items), minor_item['name'], minor_item['code'])
+                
+                # 계층구조 데이터 저장 (기록 중에 await가 없으므로 워커 간 락 불필요)
+                row = prefix + (minor_item["code"], minor_item["name"], self._collected_at)
+                
+                self._write_record(row)
+                logger.debug("계층구조 데이터 저장: %s", row)
+            
+            # 중분류 단위로 디스크에 반영 (중간에 중단돼도 그때까지의 결과는 남음)
+            self._flush_output()
+    
+    def open_output_files(self) -> None:
+        """이번 실행의 JSONL/CSV 결과 파일을 열고 CSV 헤더를 쓴다"""
+        self._run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        self._jsonl_path = self.output_dir / f"hira_hierarchy_{self._run_ts}.jsonl"
+        self._jsonl = open(self._jsonl_path, 'wb')
+        
+        csv_file = self.output_dir / f"hira_hierarchy_{self._run_ts}.csv"
+        self._csv_file = open(csv_file, 'w', encoding='utf-8-sig', newline='')
+        self._csv_writer = csv.writer(self._csv_file)
+        self._csv_writer.writerow(HIERARCHY_FIELDNAMES)
+        
+        logger.info(f"결과 파일 기록 시작: {self._jsonl_path}, {csv_file}")
+    
+    def _write_record(self, row: tuple) -> None:
+        """HIERARCHY_FIELDNAMES 순서의 행 튜플 한 건을 JSONL과 CSV에 기록한다"""
+        # 키는 JSONL 직렬화 시점에만 붙이고, CSV에는 튜플을 그대로 기록
+        self._jsonl.write(_json_line(dict(zip(HIERARCHY_FIELDNAMES, row))))
+        self._csv_writer.writerow(row)
+        self.record_count += 1
+    
+    def _flush_output(self) -> None:
+        """결과 파일 버퍼를 디스크에 반영한다"""
+        for f in (self._jsonl, self._csv_file):
+            if f is not None:
+                f.flush()
+    
+    def close_output_files(self) -> None:
+        """결과 파일을 닫는다"""
+        for f in (self._jsonl, self._csv_file):
+            if f is not None:
+                f.close()
+        self._jsonl = None
+        self._csv_file = None
+        self._csv_writer = None
+    
+    def save_results(self) -> None:
+        """기록된 JSONL을 한 번 훑어 통계 정보를 저장 (레코드는 수집하면서 이미 JSONL/CSV에 저장됨)"""
+        try:
+            if not self.record_count:
                 logger.warning("저장할 데이터가 없습니다.")
                 return
             
-            # JSON 저장
-            json_file = self.output_dir / f"hira_hierarchy_{timestamp}.json"
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(self.hierarchical_data, f, ensure_ascii=False, indent=2)
-            logger.info(f"JSON 파일 저장: {json_file}")
-            
-            # CSV 저장
-            csv_file = self.output_dir / f"hira_hierarchy_{timestamp}.csv"
-            df = pd.DataFrame(self.hierarchical_data)
-            df.to_csv(csv_file, index=False, encoding='utf-8-sig')
-            logger.info(f"CSV 파일 저장: {csv_file}")
+            # 통계 정보 계산 (파일을 한 줄씩 읽어 메모리에 전체를 올리지 않음)
+            majors = set()
+            middles = set()
+            total = 0
+            loads = orjson.loads if orjson is not None else json.loads
+            with open(self._jsonl_path, 'rb') as f:
+                for line in f:
+                    record = loads(line)
+                    majors.add(record['대분류코드'])
+                    middles.add((record['대분류코드'], record['중분류코드']))
+                    total += 1
             
-            # 통계 정보 저장
             stats = {
-                "총_소분류_수": len(self.hierarchical_data),
-                "대분류_수": len(df['대분류코드'].unique()),
-                "중분류_수": len(df[['대분류코드', '중분류코드']].drop_duplicates()),
+                "총_소분류_수": total,
+                "대분류_수": len(majors),
+                "중분류_수": len(middles),
                 "수집_완료_시간": datetime.now().isoformat()
             }
             
-            stats_file = self.output_dir / f"hira_hierarchy_stats_{timestamp}.json"
-            with open(stats_file, 'w', encoding='utf-8') as f:
-                json.dump(stats, f, ensure_ascii=False, indent=2)
+            stats_file = self.output_dir / f"hira_hierarchy_stats_{self._run_ts}.json"
+            if orjson is not None:
+                with open(stats_file, 'wb') as f:
+                    f.write(orjson.dumps(stats, option=orjson.OPT_INDENT_2))
+            else:
+                with open(stats_file, 'w', encoding='utf-8') as f:
+                    json.dump(stats, f, ensure_ascii=False, indent=2)
             logger.info(f"통계 파일 저장: {stats_file}")
             
-            logger.info(f"결과 저장 완료: {len(self.hierarchical_data)}개 항목")
+            logger.info(f"결과 저장 완료: {total}개 항목")
             
         except Exception as e:
             logger.error(f"결과 저장 실패: {e}")
@@ -492,16 +695,19 @@ class HIRAHierarchicalCrawler:
                     logger.error("색인분류 모달 열기 실패")
                     return
                 
-                # 계층구조 크롤링 실행
-                await self.crawl_hierarchy(popup_page)
+                # 계층구조 크롤링 실행 (레코드는 수집하면서 파일에 기록)
+                self.open_output_files()
+                await self.crawl_hierarchy(popup_page, browser)
+                self.close_output_files()
                 
                 # 모달 닫기
                 await self.close_classification_modal(popup_page)
                 
-                # 결과 저장
+                # 통계 저장
                 self.save_results()
                 
             finally:
+                self.close_output_files()
                 try:
                     await context.close()
                     await browser.close()
@@ -521,4 +727,8 @@ async def main():
     await crawler.run()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # await 지점이 많은 크롤러이므로 가능하면 libuv 기반 이벤트 루프로 실행
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file